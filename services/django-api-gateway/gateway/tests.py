@@ -0,0 +1,43 @@
+from unittest import mock
+
+import requests
+from django.test import TestCase
+
+ARROW_MIMETYPE = 'application/vnd.apache.arrow.stream'
+# An Arrow IPC stream starts with a continuation marker that isn't valid UTF-8
+ARROW_BODY = b'\xff\xff\xff\xff\x78\x00\x00\x00' + bytes(range(256))
+
+
+def flask_reply(body, content_type, status=200, headers=None):
+    reply = requests.Response()
+    reply.status_code = status
+    reply._content = body
+    reply.headers.update({'Content-Type': content_type, **(headers or {})})
+    return reply
+
+
+class ColumnarBatchProxyTests(TestCase):
+    def test_arrow_results_are_relayed_unchanged(self):
+        with mock.patch('gateway.views.requests.post',
+                        return_value=flask_reply(ARROW_BODY, ARROW_MIMETYPE, headers={'X-Model': 'heavy'})) as post:
+            response = self.client.post('/sentiment/analyze-batch/', {'texts': ['a', 'b'], 'format': 'arrow'},
+                                        content_type='application/json')
+
+        self.assertEqual(post.call_args.kwargs['json']['format'], 'arrow')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], ARROW_MIMETYPE)
+        self.assertEqual(response['X-Model'], 'heavy')
+        self.assertEqual(response.content, ARROW_BODY)
+
+    def test_json_results_and_errors(self):
+        with mock.patch('gateway.views.requests.post',
+                        return_value=flask_reply(b'{"error": "bad format"}', 'application/json', status=400)):
+            response = self.client.post('/sentiment/predict-batch/', {'texts': ['a'], 'format': 'csv'},
+                                        content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'bad format'})
+
+        with mock.patch('gateway.views.requests.post', side_effect=requests.exceptions.ConnectionError):
+            response = self.client.post('/sentiment/predict-batch/', {'texts': ['a']},
+                                        content_type='application/json')
+        self.assertEqual(response.status_code, 503)
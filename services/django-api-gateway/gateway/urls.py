@@ -10,7 +10,17 @@ urlpatterns = [
     path('sentiment/predict/', views.sentiment_predict, name='sentiment_predict'), # ? light TextBlob
     path('sentiment/analyze/', views.sentiment_analyze, name='sentiment_analyze'), # ? heavy BERT
     path('sentiment/analyze-light/', views.sentiment_analyze_light, name='sentiment_analyze_light'), # ? light VADER
+    path('sentiment/analyze-all/', views.sentiment_analyze_all, name='sentiment_analyze_all'), # ? all three models
     path('sentiment/moodify/', views.sentiment_moodify, name='sentiment_moodify'),
+    path('sentiment/moodify-stream/', views.sentiment_moodify_stream, name='sentiment_moodify_stream'),
+    path('sentiment/moodify-batch/', views.sentiment_moodify_batch, name='sentiment_moodify_batch'),
+    path('sentiment/moodify-jobs/', views.sentiment_moodify_jobs, name='sentiment_moodify_jobs'),
+    path('sentiment/moodify-jobs/<str:job_id>/', views.sentiment_moodify_job_status, name='sentiment_moodify_job_status'),
+    path('sentiment/moodify-jobs/<str:job_id>/stream/', views.sentiment_moodify_job_stream, name='sentiment_moodify_job_stream'),
+    path('sentiment/predict-batch/', views.sentiment_predict_batch, name='sentiment_predict_batch'),
+    path('sentiment/analyze-batch/', views.sentiment_analyze_batch, name='sentiment_analyze_batch'),
+    path('sentiment/analyze-light-batch/', views.sentiment_analyze_light_batch, name='sentiment_analyze_light_batch'),
+    path('sentiment/score-stream/', views.sentiment_score_stream, name='sentiment_score_stream'),
     
     # Express microservice endpoints (placeholder for future implementation)
     path('express/health/', views.express_health, name='express_health'),
@@ -6,22 +6,36 @@ from datetime import datetime
 
 import requests
 from django.conf import settings
-from django.http import HttpResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
 
 logger = logging.getLogger(__name__)
 
-def check_service_health(service_url):
+# Piece size when forwarding a streamed request body to Flask
+UPLOAD_CHUNK_BYTES = 64 * 1024
+
+def check_service_health(service_url, path="/"):
     """Check if a microservice is healthy"""
     try:
-        response = requests.get(f"{service_url}/", timeout=5)
+        response = requests.get(f"{service_url}{path}", timeout=5)
         return response.status_code == 200
     except requests.exceptions.RequestException:
         return False
 
+def check_flask_status(flask_url):
+    """
+    Probe the Flask service: /healthz (alive) then /readyz (models warmed up).
+    Returns "healthy", "starting" (alive but still loading models) or "unhealthy".
+    """
+    if not check_service_health(flask_url, "/healthz"):
+        return "unhealthy"
+    return "healthy" if check_service_health(flask_url, "/readyz") else "starting"
+
 def health_check(request):
     """Homepage endpoint displaying Django API Gateway information"""
     # Check if request accepts HTML (browser) or JSON (API)
@@ -69,7 +83,15 @@ def health_check(request):
                     "predict": "/sentiment/predict/",
                     "analyze": "/sentiment/analyze/",
                     "analyze_light": "/sentiment/analyze-light/",
-                    "moodify": "/sentiment/moodify/"
+                    "analyze_all": "/sentiment/analyze-all/",
+                    "moodify": "/sentiment/moodify/",
+                    "moodify_stream": "/sentiment/moodify-stream/",
+                    "moodify_batch": "/sentiment/moodify-batch/",
+                    "moodify_jobs": "/sentiment/moodify-jobs/",
+                    "predict_batch": "/sentiment/predict-batch/",
+                    "analyze_batch": "/sentiment/analyze-batch/",
+                    "analyze_light_batch": "/sentiment/analyze-light-batch/",
+                    "score_stream": "/sentiment/score-stream/"
                 },
                 "express_service": {
                     "health": "/express/health/"
@@ -78,7 +100,9 @@ def health_check(request):
             "microservices": {
                 "flask_microservice": {
                     "purpose": "Sentiment analysis using VADER, TextBlob, and BERT models",
-                    "endpoints": ["predict", "analyze", "analyze-light", "moodify"]
+                    "endpoints": ["predict", "analyze", "analyze-light", "analyze-all", "moodify", "moodify-stream",
+                                  "moodify-batch", "moodify-jobs", "predict-batch", "analyze-batch", "analyze-light-batch",
+                                  "score-stream"]
                 },
                 "express_microservice": {
                     "purpose": "Planned for additional functionality",
@@ -101,7 +125,7 @@ def gateway_status(request):
     flask_url = settings.FLASK_MICROSERVICE_URL
     express_url = settings.EXPRESS_MICROSERVICE_URL
 
-    flask_healthy = check_service_health(flask_url)
+    flask_status = check_flask_status(flask_url)
     express_healthy = check_service_health(express_url)
 
     return Response({
@@ -109,9 +133,11 @@ def gateway_status(request):
         "services": {
             "flask_microservice": {
                 "url": flask_url,
-                "status": "healthy" if flask_healthy else "unhealthy",
-                "endpoints": (["/predict", "/analyze", "/analyze-light", "/moodify"]
-                             if flask_healthy else [])
+                "status": flask_status,
+                "endpoints": (["/predict", "/analyze", "/analyze-light", "/analyze-all", "/moodify", "/moodify-stream",
+                               "/moodify-batch", "/moodify-jobs", "/predict-batch", "/analyze-batch", "/analyze-light-batch",
+                               "/score-stream"]
+                             if flask_status != "unhealthy" else [])
             },
             "express_microservice": {
                 "url": express_url,
@@ -121,35 +147,120 @@ def gateway_status(request):
         }
     })
 
-def proxy_to_flask(endpoint, request_data=None, method='GET'):
+def flask_request_error(error, url):
+    """The (data, status) reply for a request to the Flask service that failed"""
+    if isinstance(error, requests.exceptions.Timeout):
+        logger.error("Timeout when calling Flask service: %s", url)
+        return {"error": "Service timeout"}, 504
+    if isinstance(error, requests.exceptions.ConnectionError):
+        logger.error("Connection error when calling Flask service: %s", url)
+        return {"error": "Service unavailable"}, 503
+    logger.error("Request error when calling Flask service: %s", error)
+    return {"error": "Service error"}, 500
+
+def proxy_to_flask(endpoint, request_data=None, method='GET', timeout=30):
     """Proxy requests to Flask microservice"""
     flask_url = settings.FLASK_MICROSERVICE_URL
     url = f"{flask_url}{endpoint}"
 
     try:
         if method == 'POST':
+            # X-Request-Timeout lets Flask size LLM deadlines to fit inside this timeout
             response = requests.post(
                 url,
                 json=request_data,
-                headers={'Content-Type': 'application/json'},
-                timeout=30
+                headers={'Content-Type': 'application/json', 'X-Request-Timeout': str(timeout)},
+                timeout=timeout
             )
         else:
             response = requests.get(url, timeout=10)
 
         return response.json(), response.status_code
+    except requests.exceptions.RequestException as e:
+        return flask_request_error(e, url)
+    except json.JSONDecodeError:
+        logger.error("Invalid JSON response from Flask service")
+        return {"error": "Invalid service response"}, 502
+
+def proxy_batch_to_flask(endpoint, request_data, timeout=120):
+    """
+    Proxy a batch request to Flask and return the response to send back.
+    Columnar results ("format": "arrow" or "parquet") are binary, so a reply
+    that isn't JSON is relayed byte for byte with Flask's Content-Type.
+    """
+    url = f"{settings.FLASK_MICROSERVICE_URL}{endpoint}"
+    try:
+        response = requests.post(
+            url,
+            json=request_data,
+            headers={'Content-Type': 'application/json', 'X-Request-Timeout': str(timeout)},
+            timeout=timeout
+        )
+    except requests.exceptions.RequestException as e:
+        response_data, response_status = flask_request_error(e, url)
+        return Response(response_data, status=response_status)
+
+    content_type = response.headers.get('Content-Type', '')
+    if not content_type.startswith('application/json'):
+        relayed = HttpResponse(response.content, content_type=content_type, status=response.status_code)
+        if 'X-Model' in response.headers:
+            relayed['X-Model'] = response.headers['X-Model']
+        return relayed
+    try:
+        return Response(response.json(), status=response.status_code)
+    except json.JSONDecodeError:
+        logger.error("Invalid JSON response from Flask service")
+        return Response({"error": "Invalid service response"}, status=502)
+
+def stream_from_flask(endpoint, request_data=None, method='POST', timeout=60, upload=None):
+    """
+    Proxy a request to a streaming Flask endpoint and relay its body chunk by chunk,
+    without buffering. timeout bounds the gap between chunks, not the whole stream.
+    upload is an incoming request whose raw body is forwarded as a chunked
+    upload (request_data is then sent as the query string).
+    """
+    flask_url = settings.FLASK_MICROSERVICE_URL
+    url = f"{flask_url}{endpoint}"
+
+    try:
+        if upload is not None:
+            upstream = requests.post(url, data=iter(lambda: upload.read(UPLOAD_CHUNK_BYTES), b''),
+                                     params=request_data, stream=True, timeout=timeout,
+                                     headers={'Content-Type': upload.content_type or 'application/x-ndjson'})
+        elif method == 'POST':
+            upstream = requests.post(url, json=request_data, stream=True, timeout=timeout)
+        else:
+            upstream = requests.get(url, params=request_data, stream=True, timeout=timeout)
     except requests.exceptions.Timeout:
         logger.error("Timeout when calling Flask service: %s", url)
-        return {"error": "Service timeout"}, 504
+        return JsonResponse({"error": "Service timeout"}, status=504)
     except requests.exceptions.ConnectionError:
         logger.error("Connection error when calling Flask service: %s", url)
-        return {"error": "Service unavailable"}, 503
+        return JsonResponse({"error": "Service unavailable"}, status=503)
     except requests.exceptions.RequestException as e:
         logger.error("Request error when calling Flask service: %s", e)
-        return {"error": "Service error"}, 500
-    except json.JSONDecodeError:
-        logger.error("Invalid JSON response from Flask service")
-        return {"error": "Invalid service response"}, 502
+        return JsonResponse({"error": "Service error"}, status=500)
+
+    def relay():
+        try:
+            # chunk_size=None yields data as soon as it is received
+            for chunk in upstream.iter_content(chunk_size=None):
+                yield chunk
+        except requests.exceptions.RequestException as e:
+            logger.error("Flask stream interrupted: %s", e)
+        finally:
+            upstream.close()
+
+    response = StreamingHttpResponse(
+        relay(),
+        status=upstream.status_code,
+        content_type=upstream.headers.get('Content-Type', 'application/octet-stream')
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    if 'Retry-After' in upstream.headers:
+        response['Retry-After'] = upstream.headers['Retry-After']
+    return response
 
 @api_view(['POST'])
 def sentiment_predict(request):
@@ -193,6 +304,20 @@ def sentiment_analyze_light(request):
     response_data, response_status = proxy_to_flask('/analyze-light', request.data, 'POST')
     return Response(response_data, status=response_status)
 
+@api_view(['POST'])
+def sentiment_analyze_all(request):
+    """Proxy to Flask /analyze-all endpoint: TextBlob, VADER and BERT in one call"""
+    if not request.data:
+        return Response({"error": "Request body is required"},
+                       status=status.HTTP_400_BAD_REQUEST)
+
+    if 'text' not in request.data:
+        return Response({"error": "Missing 'text' field"},
+                       status=status.HTTP_400_BAD_REQUEST)
+
+    response_data, response_status = proxy_to_flask('/analyze-all', request.data, 'POST')
+    return Response(response_data, status=response_status)
+
 @api_view(['POST'])
 def sentiment_moodify(request):
     """Proxy to Flask /moodify endpoint for text mood transformation"""
@@ -209,6 +334,116 @@ def sentiment_moodify(request):
     response_data, response_status = proxy_to_flask('/moodify', request.data, 'POST')
     return Response(response_data, status=response_status)
 
+# Plain Django view: DRF content negotiation would reject Accept: text/event-stream
+@csrf_exempt
+@require_POST
+def sentiment_moodify_stream(request):
+    """Proxy to Flask /moodify-stream, relaying its Server-Sent Events as they arrive"""
+    try:
+        request_data = json.loads(request.body) if request.body else None
+    except json.JSONDecodeError:
+        return JsonResponse({"error": "Invalid JSON body"}, status=400)
+
+    if not request_data:
+        return JsonResponse({"error": "Request body is required"}, status=400)
+
+    for field in ['text', 'target_sentiment']:
+        if field not in request_data:
+            return JsonResponse({"error": f"Missing '{field}' field"}, status=400)
+
+    return stream_from_flask('/moodify-stream', request_data)
+
+@api_view(['POST'])
+def sentiment_moodify_batch(request):
+    """Proxy to Flask /moodify-batch endpoint for multi-text mood transformation"""
+    if not request.data:
+        return Response({"error": "Request body is required"},
+                       status=status.HTTP_400_BAD_REQUEST)
+
+    if 'tasks' not in request.data and 'texts' not in request.data:
+        return Response({"error": "Missing 'tasks' or 'texts' field"},
+                       status=status.HTTP_400_BAD_REQUEST)
+
+    response_data, response_status = proxy_to_flask('/moodify-batch', request.data, 'POST', timeout=120)
+    return Response(response_data, status=response_status)
+
+@api_view(['POST'])
+def sentiment_moodify_jobs(request):
+    """Proxy to Flask /moodify-jobs to queue many moodify tasks as one job"""
+    if not request.data:
+        return Response({"error": "Request body is required"},
+                       status=status.HTTP_400_BAD_REQUEST)
+
+    if 'tasks' not in request.data and 'texts' not in request.data:
+        return Response({"error": "Missing 'tasks' or 'texts' field"},
+                       status=status.HTTP_400_BAD_REQUEST)
+
+    response_data, response_status = proxy_to_flask('/moodify-jobs', request.data, 'POST')
+    return Response(response_data, status=response_status)
+
+@api_view(['GET'])
+def sentiment_moodify_job_status(request, job_id):
+    """Proxy to Flask /moodify-jobs/<job_id> to poll a moodify job"""
+    query = request.GET.urlencode()
+    endpoint = f'/moodify-jobs/{job_id}' + (f'?{query}' if query else '')
+    response_data, response_status = proxy_to_flask(endpoint)
+    return Response(response_data, status=response_status)
+
+@require_GET
+def sentiment_moodify_job_stream(request, job_id):
+    """Proxy to Flask /moodify-jobs/<job_id>/stream, relaying its Server-Sent Events"""
+    return stream_from_flask(f'/moodify-jobs/{job_id}/stream', method='GET')
+
+# Plain Django view: the NDJSON body is streamed through, never parsed by DRF
+@csrf_exempt
+@require_POST
+def sentiment_score_stream(request):
+    """Proxy to Flask /score-stream: NDJSON upload in, NDJSON results streamed back"""
+    return stream_from_flask('/score-stream', request.GET, timeout=120, upload=request)
+
+def validate_batch_request(request):
+    """Return an error Response for an invalid {"texts": [...]} body, or None"""
+    if not request.data:
+        return Response({"error": "Request body is required"},
+                       status=status.HTTP_400_BAD_REQUEST)
+
+    if 'texts' not in request.data:
+        return Response({"error": "Missing 'texts' field"},
+                       status=status.HTTP_400_BAD_REQUEST)
+
+    if not isinstance(request.data['texts'], list):
+        return Response({"error": "'texts' must be a list of strings"},
+                       status=status.HTTP_400_BAD_REQUEST)
+
+    return None
+
+@api_view(['POST'])
+def sentiment_predict_batch(request):
+    """Proxy to Flask /predict-batch endpoint for batch sentiment analysis"""
+    error_response = validate_batch_request(request)
+    if error_response:
+        return error_response
+
+    return proxy_batch_to_flask('/predict-batch', request.data)
+
+@api_view(['POST'])
+def sentiment_analyze_batch(request):
+    """Proxy to Flask /analyze-batch endpoint for batch emotion analysis"""
+    error_response = validate_batch_request(request)
+    if error_response:
+        return error_response
+
+    return proxy_batch_to_flask('/analyze-batch', request.data)
+
+@api_view(['POST'])
+def sentiment_analyze_light_batch(request):
+    """Proxy to Flask /analyze-light-batch endpoint for batch lightweight emotion analysis"""
+    error_response = validate_batch_request(request)
+    if error_response:
+        return error_response
+
+    return proxy_batch_to_flask('/analyze-light-batch', request.data)
+
 @api_view(['GET'])
 def express_health(request):
     """Check Express microservice health (placeholder)"""
@@ -1,12 +1,80 @@
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, Response, request, jsonify, render_template, stream_with_context
 from flask_cors import CORS
+import json
 import os
-from model import analyze_sentiment, moodify_text, LightweightEmotionAnalyzer
+import threading
+import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from model import (analyze_sentiment, analyze_sentiment_batch, LightweightEmotionAnalyzer,
+                   SENTIMENT_MODEL_VERSION, MOODIFY_BATCH_SIZE, moodify_cache, set_torch_threads)
+from batching import MicroBatcher
+from long_text import AGGREGATIONS, LONG_TEXT_AGGREGATION, long_text_mode
+from bulk_stream import BULK_MAX_UPLOAD_BYTES, InputSpool, stream_results
+import columnar
+from cache import ResultCache, TieredCache, create_shared_backend, cached_call, cached_batch
+from async_moodify import MoodifyGate, run_moodify, run_moodify_batch, run_moodify_candidates, stream_moodify
+from jobs import JobStore, JobWorkerPool
+from llm_client import llm_policy
+from memory_report import process_memory
+from inference_sidecar import INFERENCE_SOCKET, InferenceClient
 
 # Check if we should disable heavy models (for deployment)
+# On small instances prefer EMOTION_QUANTIZE=int8 (optionally with EMOTION_BACKEND=onnx) over disabling BERT
 DISABLE_HEAVY_MODELS = os.getenv('DISABLE_HEAVY_MODELS', 'false').lower() == 'true'
 LIGHTWEIGHT_ONLY = os.getenv('LIGHTWEIGHT_ONLY', 'false').lower() == 'true'
 
+# Upper bound on the number of texts accepted by the batch endpoints
+MAX_BATCH_SIZE = int(os.getenv('MAX_BATCH_SIZE', '1000'))
+
+# Dynamic micro-batching of concurrent /analyze calls (needs threaded workers to have any effect)
+MICRO_BATCHING = os.getenv('MICRO_BATCHING', 'false').lower() == 'true'
+MICRO_BATCH_MAX_SIZE = int(os.getenv('MICRO_BATCH_MAX_SIZE', '16'))
+MICRO_BATCH_WINDOW_MS = float(os.getenv('MICRO_BATCH_WINDOW_MS', '5'))
+
+# In-process LRU + TTL cache in front of the analyzers
+RESULT_CACHE_ENABLED = os.getenv('RESULT_CACHE_ENABLED', 'true').lower() == 'true'
+RESULT_CACHE_SIZE = int(os.getenv('RESULT_CACHE_SIZE', '10000'))
+RESULT_CACHE_TTL = float(os.getenv('RESULT_CACHE_TTL', '3600'))
+
+# Second-tier cache shared by all workers: "none", "sqlite" (single host) or "redis"
+SHARED_CACHE_BACKEND = os.getenv('SHARED_CACHE_BACKEND', 'none').lower()
+SHARED_CACHE_PATH = os.getenv('SHARED_CACHE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'results.sqlite3'))
+SHARED_CACHE_MAX_ENTRIES = int(os.getenv('SHARED_CACHE_MAX_ENTRIES', '100000'))
+SHARED_CACHE_ERROR_BACKOFF = float(os.getenv('SHARED_CACHE_ERROR_BACKOFF', '30'))
+REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+
+# Texts longer than BERT's 512 tokens: "auto" scores them as overlapping sentence windows,
+# "off" keeps the old truncation to the first 512 tokens (see long_text.py)
+LONG_TEXT_MODE = long_text_mode(os.getenv('LONG_TEXT_MODE', 'auto'))
+if LONG_TEXT_MODE is None:
+    print(f"⚠️  Unknown LONG_TEXT_MODE '{os.getenv('LONG_TEXT_MODE')}', using 'auto' (choose auto, true or false)")
+    LONG_TEXT_MODE = "auto"
+
+# /analyze-all runs TextBlob and VADER on this pool while BERT runs on the request thread
+ANALYZE_ALL_THREADS = int(os.getenv('ANALYZE_ALL_THREADS', '4'))
+
+# /score-stream (NDJSON bulk scoring) batches run on this pool; see bulk_stream.py for batch size and in-flight limits
+BULK_WORKERS = int(os.getenv('BULK_WORKERS', '2'))
+
+# /moodify runs its OpenRouter call on an asyncio loop; this caps in-flight calls per worker
+# so slow LLM responses can never occupy every request thread (see gunicorn.conf.py)
+MOODIFY_MAX_CONCURRENCY = int(os.getenv('MOODIFY_MAX_CONCURRENCY', '8'))
+MOODIFY_TIMEOUT = float(os.getenv('MOODIFY_TIMEOUT', '60'))
+# Upper bound for the "candidates" option of /moodify (concurrent rewrites, best one returned)
+MOODIFY_MAX_CANDIDATES = int(os.getenv('MOODIFY_MAX_CANDIDATES', '5'))
+# Texts accepted by one /moodify-batch request (larger sets go through /moodify-jobs),
+# and how many of a batch's LLM calls may run at once
+MOODIFY_BATCH_MAX_TEXTS = int(os.getenv('MOODIFY_BATCH_MAX_TEXTS', '100'))
+MOODIFY_BATCH_CONCURRENCY = int(os.getenv('MOODIFY_BATCH_CONCURRENCY', '4'))
+
+# Persistent moodify job queue (/moodify-jobs); the SQLite file is shared by all workers on a host
+MOODIFY_JOBS_ENABLED = os.getenv('MOODIFY_JOBS_ENABLED', 'true').lower() == 'true'
+MOODIFY_JOBS_PATH = os.getenv('MOODIFY_JOBS_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'moodify_jobs.sqlite3'))
+MOODIFY_JOB_WORKERS = int(os.getenv('MOODIFY_JOB_WORKERS', '4'))
+MOODIFY_JOB_MAX_TASKS = int(os.getenv('MOODIFY_JOB_MAX_TASKS', '1000'))
+MOODIFY_JOB_RETENTION = float(os.getenv('MOODIFY_JOB_RETENTION', str(7 * 24 * 3600)))
+
 app = Flask(__name__)
 # CORS(app, origins=[
 #     ""
@@ -15,32 +83,291 @@ app = Flask(__name__)
 #     "http://localhost:5173"   # For Vite dev server
 # ])
 
-# Initialize analyzers with environment-controlled loading
+# Models are loaded (and warmed up) in a background thread so workers can bind
+# immediately. Set LAZY_MODEL_LOADING=false to load synchronously at import time.
+LAZY_MODEL_LOADING = os.getenv('LAZY_MODEL_LOADING', 'true').lower() == 'true'
+
+# With PRELOAD_MODELS=true, gunicorn imports the app in the master (preload_app) and the models
+# are loaded there once; forked workers share the weights copy-on-write (see gunicorn.conf.py)
+PRELOAD_MODELS = os.getenv('PRELOAD_MODELS', 'false').lower() == 'true'
+# Intra-op threads per worker for BERT; gunicorn.conf.py divides the cores between the workers
+TORCH_NUM_THREADS = int(os.getenv('TORCH_NUM_THREADS', '0'))
+# ONNX Runtime sessions own thread pools that do not survive fork(), so that backend is loaded per worker
+# With INFERENCE_SOCKET set, BERT runs in the inference sidecar process (inference_sidecar.py) instead of
+# in each worker; workers wait up to INFERENCE_CONNECT_TIMEOUT seconds for it to come up. The master
+# has nothing to preload then: gunicorn starts the sidecar after preloading the app.
+INFERENCE_CONNECT_TIMEOUT = float(os.getenv('INFERENCE_CONNECT_TIMEOUT', '300'))
+PRELOAD_HEAVY_MODEL = (PRELOAD_MODELS and not INFERENCE_SOCKET
+                       and os.getenv('EMOTION_BACKEND', 'pytorch').lower() != 'onnx')
+
 heavy_model_available = False
 analyzer = None
+heavy_batcher = None
+lightweight_model_available = False
+lightweight_analyzer = None
+
+# Per-model state: "loading", "warming_up", "ready", "failed" or "disabled"
+model_status = {"textblob": "loading", "lightweight": "loading", "heavy": "loading"}
+models_ready = threading.Event()
+
+WARMUP_TEXTS = [
+    "I am so excited about this new opportunity!",
+    "This is absolutely terrible and I hate it.",
+    "The meeting is at 3pm.",
+]
+
+def warmup_textblob():
+    # The first TextBlob call loads the pattern lexicon from disk
+    model_status["textblob"] = "warming_up"
+    for text in WARMUP_TEXTS:
+        analyze_sentiment(text)
+    model_status["textblob"] = "ready"
 
-if not DISABLE_HEAVY_MODELS and not LIGHTWEIGHT_ONLY:
+def load_lightweight_model():
+    global lightweight_analyzer, lightweight_model_available
     try:
-        from model import EmotionAnalyzer
-        analyzer = EmotionAnalyzer()
+        lightweight_analyzer = LightweightEmotionAnalyzer()
+        model_status["lightweight"] = "warming_up"
+        lightweight_analyzer.analyze_emotion_batch(WARMUP_TEXTS)
+        lightweight_model_available = True
+        model_status["lightweight"] = "ready"
+        print("✅ Lightweight VADER model loaded successfully")
+    except Exception as e:
+        lightweight_model_available = False
+        model_status["lightweight"] = "failed"
+        print(f"⚠️  Lightweight model failed to load: {e}")
+
+def load_heavy_model():
+    global analyzer, heavy_batcher, heavy_model_available
+    if DISABLE_HEAVY_MODELS or LIGHTWEIGHT_ONLY:
+        model_status["heavy"] = "disabled"
+        print("🚀 Heavy models disabled via environment variable (DISABLE_HEAVY_MODELS=true or LIGHTWEIGHT_ONLY=true)")
+        return
+
+    try:
+        if INFERENCE_SOCKET:
+            analyzer = InferenceClient(INFERENCE_SOCKET)
+            analyzer.wait_ready(INFERENCE_CONNECT_TIMEOUT)
+        else:
+            from model import EmotionAnalyzer
+            analyzer = EmotionAnalyzer()
+        model_status["heavy"] = "warming_up"
+        # Run both the single-text and padded batch paths once before serving traffic
+        analyzer.analyze_emotion(WARMUP_TEXTS[0])
+        analyzer.analyze_emotion_batch(WARMUP_TEXTS)
+        # The sidecar batches requests from every worker itself
+        if MICRO_BATCHING and not INFERENCE_SOCKET:
+            heavy_batcher = MicroBatcher(
+                analyzer.analyze_emotion_batch,
+                max_batch_size=MICRO_BATCH_MAX_SIZE,
+                max_wait_ms=MICRO_BATCH_WINDOW_MS
+            )
+            print(f"✅ Micro-batching enabled (max {MICRO_BATCH_MAX_SIZE} texts, {MICRO_BATCH_WINDOW_MS}ms window)")
         heavy_model_available = True
-        print("✅ Heavy BERT model loaded successfully")
+        model_status["heavy"] = "ready"
+        print(f"✅ Heavy BERT model loaded successfully: {analyzer.describe()}")
     except Exception as e:
         heavy_model_available = False
+        model_status["heavy"] = "failed"
         print(f"⚠️  Heavy model failed to load: {e}")
-else:
-    print("🚀 Heavy models disabled via environment variable (DISABLE_HEAVY_MODELS=true or LIGHTWEIGHT_ONLY=true)")
 
-try:
-    lightweight_analyzer = LightweightEmotionAnalyzer()
-    lightweight_model_available = True
-    print("✅ Lightweight VADER model loaded successfully")
-except Exception as e:
-    lightweight_model_available = False
-    print(f"⚠️  Lightweight model failed to load: {e}")
+def load_models(heavy=True):
+    """Load and warm up every model, cheapest first so the fallbacks are serving early"""
+    start = time.monotonic()
+    try:
+        warmup_textblob()
+    except Exception as e:
+        model_status["textblob"] = "failed"
+        print(f"⚠️  TextBlob warmup failed: {e}")
+    load_lightweight_model()
+    if not heavy:
+        return
+    load_heavy_model()
+    models_ready.set()
+    print(f"✅ Models ready in {time.monotonic() - start:.1f}s: {model_status}")
+
+def load_heavy_model_in_worker():
+    load_heavy_model()
+    models_ready.set()
+    print(f"✅ Models ready in worker {os.getpid()}: {model_status}")
+
+def model_unavailable(model_name, message):
+    """503 response for a model that is still loading, or has failed/been disabled"""
+    if model_status[model_name] in ("loading", "warming_up"):
+        response = jsonify({"error": "Model is still loading, please retry shortly", "model_status": model_status})
+        response.headers["Retry-After"] = "5"
+        return response, 503
+    return jsonify({"error": message}), 503
+
+if PRELOAD_MODELS:
+    # Loaded synchronously: a loader thread in the master would not exist in the workers.
+    # One thread while warming up, so torch's OpenMP pool is never started before fork()
+    set_torch_threads(1)
+    load_models(heavy=PRELOAD_HEAVY_MODEL)
+elif LAZY_MODEL_LOADING:
+    threading.Thread(target=load_models, name="model-loader", daemon=True).start()
+else:
+    load_models()
 
 CORS(app, origins="*")
 
+def build_result_cache():
+    if not RESULT_CACHE_ENABLED:
+        return None
+
+    local_cache = ResultCache(RESULT_CACHE_SIZE, RESULT_CACHE_TTL)
+    try:
+        shared_backend = create_shared_backend(SHARED_CACHE_BACKEND, SHARED_CACHE_PATH, REDIS_URL,
+                                               SHARED_CACHE_MAX_ENTRIES)
+    except Exception as e:
+        print(f"⚠️  Shared cache '{SHARED_CACHE_BACKEND}' unavailable, using per-worker cache only: {e}")
+        return local_cache
+
+    if shared_backend is None:
+        return local_cache
+    print(f"✅ Shared result cache enabled ({SHARED_CACHE_BACKEND})")
+    return TieredCache(local_cache, shared_backend, error_backoff=SHARED_CACHE_ERROR_BACKOFF)
+
+result_cache = build_result_cache()
+moodify_gate = MoodifyGate(MOODIFY_MAX_CONCURRENCY)
+analyze_all_executor = ThreadPoolExecutor(max_workers=ANALYZE_ALL_THREADS, thread_name_prefix="analyze-all")
+bulk_executor = ThreadPoolExecutor(max_workers=BULK_WORKERS, thread_name_prefix="bulk-score")
+
+def build_job_pool():
+    if not MOODIFY_JOBS_ENABLED:
+        return None
+
+    try:
+        # A claimed task's lease must outlast the LLM call, or another worker would re-run it
+        store = JobStore(MOODIFY_JOBS_PATH, lease_seconds=MOODIFY_TIMEOUT + 60)
+    except Exception as e:
+        print(f"⚠️  Moodify job queue unavailable: {e}")
+        return None
+
+    # Each worker claims up to MOODIFY_BATCH_SIZE tasks of a job and rewrites them in one LLM call
+    pool = JobWorkerPool(
+        store,
+        lambda text, target, use_cache: run_moodify(text, target, use_cache=use_cache, timeout=MOODIFY_TIMEOUT),
+        concurrency=MOODIFY_JOB_WORKERS,
+        retention_seconds=MOODIFY_JOB_RETENTION,
+        batch_fn=lambda items, use_cache: run_moodify_batch(items, use_cache=use_cache, timeout=MOODIFY_TIMEOUT,
+                                                            max_concurrency=MOODIFY_BATCH_CONCURRENCY),
+        batch_size=MOODIFY_BATCH_SIZE
+    )
+    # A preloaded master must not start job threads; each worker resumes jobs in after_fork
+    if not PRELOAD_MODELS:
+        resume_moodify_jobs(pool)
+    return pool
+
+def resume_moodify_jobs(pool):
+    """Restart job threads if a previous run left jobs queued or in flight"""
+    try:
+        if pool.store.has_runnable():
+            print("🔁 Resuming queued moodify jobs")
+            pool.ensure_started()
+    except Exception as e:
+        print(f"⚠️  Could not check for queued moodify jobs: {e}")
+
+job_pool = build_job_pool()
+
+def after_fork():
+    """
+    Per-worker setup when the app was preloaded in the gunicorn master
+    (called from post_fork in gunicorn.conf.py). Threads do not survive
+    fork(), so anything that runs on one is started again here.
+    """
+    set_torch_threads(TORCH_NUM_THREADS)
+    if not PRELOAD_HEAVY_MODEL:
+        threading.Thread(target=load_heavy_model_in_worker, name="model-loader", daemon=True).start()
+    if job_pool is not None:
+        resume_moodify_jobs(job_pool)
+    # The micro-batcher, async LLM loop, SQLite connections and Redis pool all
+    # notice the new pid on first use and start over on their own
+
+def cache_bypassed(data):
+    """Per-request cache opt-out: {"cache": false} in the body or a Cache-Control: no-cache header"""
+    if isinstance(data, dict) and data.get("cache") is False:
+        return True
+    return "no-cache" in request.headers.get("Cache-Control", "")
+
+def run_sentiment(text, bypass=False):
+    return cached_call(result_cache, "textblob", SENTIMENT_MODEL_VERSION, analyze_sentiment, text, bypass)
+
+def run_sentiment_batch(texts, bypass=False):
+    return cached_batch(result_cache, "textblob", SENTIMENT_MODEL_VERSION, analyze_sentiment_batch, texts, bypass)
+
+def run_lightweight(text, bypass=False):
+    return cached_call(result_cache, "vader", lightweight_analyzer.model_version,
+                       lightweight_analyzer.analyze_emotion, text, bypass)
+
+def run_lightweight_batch(texts, bypass=False):
+    return cached_batch(result_cache, "vader", lightweight_analyzer.model_version,
+                        lightweight_analyzer.analyze_emotion_batch, texts, bypass)
+
+def run_heavy(text, bypass=False, long_text=None, aggregation=None, segments=False):
+    """
+    BERT emotions for one text. long_text is "auto" (window texts over 512
+    tokens), "on" or "off"; defaults to LONG_TEXT_MODE.
+    """
+    long_text = long_text or LONG_TEXT_MODE
+    if long_text == "on" or (long_text == "auto" and analyzer.is_long(text)):
+        aggregation = aggregation or LONG_TEXT_AGGREGATION
+        # Newlines are sentence boundaries and segment offsets index the raw text, so the key is exact
+        return cached_call(result_cache, "bert-long", f"{analyzer.model_version}:{aggregation}:{int(segments)}",
+                           lambda t: analyzer.analyze_long_text(t, aggregation, segments), text, bypass, exact=True)
+    analyze_fn = heavy_batcher.submit if heavy_batcher is not None else analyzer.analyze_emotion
+    return cached_call(result_cache, "bert", analyzer.model_version, analyze_fn, text, bypass)
+
+def run_heavy_batch(texts, bypass=False):
+    return cached_batch(result_cache, "bert", analyzer.model_version,
+                        analyzer.analyze_emotion_batch, texts, bypass)
+
+def get_batch_texts(data):
+    """
+    Validate a batch request body of the form {"texts": [...]}.
+    Returns (texts, None) on success or (None, error_response) on failure.
+    """
+    if not data or "texts" not in data:
+        return None, (jsonify({"error": "Missing 'texts' in request body"}), 400)
+
+    texts = data["texts"]
+    if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+        return None, (jsonify({"error": "'texts' must be a list of strings"}), 400)
+    if len(texts) > MAX_BATCH_SIZE:
+        return None, (jsonify({"error": f"Too many texts: maximum batch size is {MAX_BATCH_SIZE}"}), 413)
+
+    return texts, None
+
+def get_output_format(data):
+    """
+    The "format" of a batch request: "json" (default), or "arrow"/"parquet" for
+    columnar results (see columnar.py). Returns (format, None) or (None, error_response).
+    """
+    output_format = str(data.get("format") or request.args.get("format") or "json").lower()
+    if output_format == "json":
+        return output_format, None
+    if output_format not in columnar.FORMATS:
+        return None, (jsonify({"error": f"'format' must be one of json, {', '.join(columnar.FORMATS)}"}), 400)
+    if not columnar.PYARROW_AVAILABLE:
+        return None, (jsonify({"error": "Columnar output needs pyarrow. Install with: pip install pyarrow"}), 501)
+    ids = data.get("ids")
+    if ids is not None and (not isinstance(ids, list) or len(ids) != len(data["texts"])):
+        return None, (jsonify({"error": "'ids' must be a list with one id per text"}), 400)
+    return output_format, None
+
+def columnar_response(model, model_analyzer, data, output_format):
+    """
+    Score a batch request straight into columns and return it as an Arrow IPC
+    stream or Parquet file. Columnar results skip the result cache, which holds
+    per-text dicts.
+    """
+    texts = data["texts"]
+    ids = data.get("ids") or list(range(len(texts)))
+    batch = columnar.score_batch(model, model_analyzer, texts, ids)
+    response = Response(columnar.to_bytes(batch, output_format), mimetype=columnar.MIMETYPES[output_format])
+    response.headers["X-Model"] = model
+    return response
+
 @app.route("/predict", methods=["POST"])
 def predict():
     data = request.get_json()
@@ -50,11 +377,41 @@ def predict():
 
     text = data["text"]
     try:
-        result = analyze_sentiment(text)
+        result = run_sentiment(text, cache_bypassed(data))
         return jsonify(result)
     except Exception as e:
         return jsonify({"error": f"Analysis failed: {str(e)}"}), 500
 
+@app.route("/predict-batch", methods=["POST"])
+def predict_batch():
+    data = request.get_json(silent=True)
+    texts, error = get_batch_texts(data)
+    if error:
+        return error
+    output_format, error = get_output_format(data)
+    if error:
+        return error
+
+    try:
+        if output_format != "json":
+            return columnar_response("textblob", None, data, output_format)
+        results = run_sentiment_batch(texts, cache_bypassed(data))
+        return jsonify({"results": results, "count": len(results)})
+    except Exception as e:
+        return jsonify({"error": f"Batch analysis failed: {str(e)}"}), 500
+
+def moodify_timeout():
+    """
+    Seconds the LLM call may take for this request: MOODIFY_TIMEOUT, shortened to
+    fit the caller's own deadline when it sends X-Request-Timeout (seconds)
+    """
+    try:
+        caller_timeout = float(request.headers.get("X-Request-Timeout", ""))
+    except ValueError:
+        return MOODIFY_TIMEOUT
+    # Keep a second for the fallback and for sending the response
+    return max(1.0, min(MOODIFY_TIMEOUT, caller_timeout - 1.0))
+
 @app.route("/moodify", methods=["POST"])
 def moodify():
     data = request.get_json()
@@ -64,12 +421,246 @@ def moodify():
 
     text = data["text"]
     target_sentiment = data["target_sentiment"]
+
+    # Each candidate is a concurrent LLM call and takes its own moodify permit
+    max_candidates = min(MOODIFY_MAX_CANDIDATES, moodify_gate.max_concurrency)
+    candidates = data.get("candidates", 1)
+    if not isinstance(candidates, int) or isinstance(candidates, bool) or not 1 <= candidates <= max_candidates:
+        return jsonify({"error": f"'candidates' must be an integer between 1 and {max_candidates}"}), 400
     
+    if not moodify_gate.try_acquire(candidates):
+        response = jsonify({"error": "Too many moodify requests in progress, please retry shortly"})
+        response.headers["Retry-After"] = "2"
+        return response, 503
+
     try:
-        result = moodify_text(text, target_sentiment)
+        if candidates > 1:
+            result = run_moodify_candidates(text, target_sentiment, candidates, use_cache=not cache_bypassed(data),
+                                            timeout=moodify_timeout(), early_stop=data.get("early_stop", True) is not False)
+        else:
+            result = run_moodify(text, target_sentiment, use_cache=not cache_bypassed(data), timeout=moodify_timeout())
         return jsonify(result)
     except Exception as e:
         return jsonify({"error": f"Moodification failed: {str(e)}"}), 500
+    finally:
+        moodify_gate.release(candidates)
+
+def sse_event(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+@app.route("/moodify-stream", methods=["POST"])
+def moodify_stream():
+    """Same as /moodify, but streams LLM tokens as Server-Sent Events; the final "done" event carries the result"""
+    data = request.get_json()
+
+    if not data or "text" not in data or "target_sentiment" not in data:
+        return jsonify({"error": "Missing 'text' or 'target_sentiment' in request body"}), 400
+
+    text = data["text"]
+    target_sentiment = data["target_sentiment"]
+
+    if not moodify_gate.try_acquire():
+        response = jsonify({"error": "Too many moodify requests in progress, please retry shortly"})
+        response.headers["Retry-After"] = "2"
+        return response, 503
+
+    use_cache = not cache_bypassed(data)
+    timeout = moodify_timeout()
+
+    def generate():
+        # The slot is held for the lifetime of the stream, not just this view call
+        try:
+            for event, payload in stream_moodify(text, target_sentiment, use_cache=use_cache, timeout=timeout):
+                yield sse_event(event, payload)
+        finally:
+            moodify_gate.release()
+
+    return Response(stream_with_context(generate()), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    })
+
+def get_moodify_tasks(data, max_tasks):
+    """
+    Validate a multi-text moodify body: {"tasks": [{"text": ..., "target_sentiment": ...}, ...]}
+    or {"texts": [...], "target_sentiment": ...}. A top-level target_sentiment is the
+    default for tasks that omit one. Returns (tasks, None) or (None, error_response).
+    """
+    if not data or ("tasks" not in data and "texts" not in data):
+        return None, (jsonify({"error": "Missing 'tasks' or 'texts' in request body"}), 400)
+
+    default_target = data.get("target_sentiment")
+    if "tasks" in data:
+        items = data["tasks"]
+        if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+            return None, (jsonify({"error": "'tasks' must be a list of objects"}), 400)
+        tasks = [(item.get("text"), item.get("target_sentiment", default_target)) for item in items]
+    else:
+        if not isinstance(data["texts"], list):
+            return None, (jsonify({"error": "'texts' must be a list of strings"}), 400)
+        tasks = [(text, default_target) for text in data["texts"]]
+
+    if not tasks:
+        return None, (jsonify({"error": "A job needs at least one task"}), 400)
+    if not all(isinstance(text, str) and isinstance(target, str) for text, target in tasks):
+        return None, (jsonify({"error": "Every task needs a string 'text' and 'target_sentiment'"}), 400)
+    if len(tasks) > max_tasks:
+        return None, (jsonify({"error": f"Too many tasks: maximum is {max_tasks} per request"}), 413)
+
+    return tasks, None
+
+@app.route("/moodify-batch", methods=["POST"])
+def moodify_batch_route():
+    """
+    Transform several texts in one request; up to MOODIFY_BATCH_SIZE texts share
+    each LLM call. Results are returned in input order.
+    """
+    data = request.get_json(silent=True)
+    tasks, error = get_moodify_tasks(data, MOODIFY_BATCH_MAX_TEXTS)
+    if error:
+        return error
+
+    # One moodify permit per LLM call the batch may have in flight at once
+    chunks = -(-len(tasks) // MOODIFY_BATCH_SIZE)
+    permits = min(chunks, MOODIFY_BATCH_CONCURRENCY, moodify_gate.max_concurrency)
+    if not moodify_gate.try_acquire(permits):
+        response = jsonify({"error": "Too many moodify requests in progress, please retry shortly"})
+        response.headers["Retry-After"] = "2"
+        return response, 503
+
+    try:
+        results = run_moodify_batch(tasks, use_cache=not cache_bypassed(data), timeout=moodify_timeout(),
+                                    max_concurrency=permits)
+        return jsonify({"results": results, "count": len(results)})
+    except Exception as e:
+        return jsonify({"error": f"Moodification failed: {str(e)}"}), 500
+    finally:
+        moodify_gate.release(permits)
+
+def jobs_unavailable():
+    return jsonify({"error": "Moodify job queue is disabled (set MOODIFY_JOBS_ENABLED=true)"}), 503
+
+@app.route("/moodify-jobs", methods=["POST"])
+def submit_moodify_job():
+    """Queue moodify tasks and return a job ID immediately (202)"""
+    if job_pool is None:
+        return jobs_unavailable()
+
+    data = request.get_json(silent=True)
+    tasks, error = get_moodify_tasks(data, MOODIFY_JOB_MAX_TASKS)
+    if error:
+        return error
+
+    job_id = job_pool.store.create_job(tasks, use_cache=not cache_bypassed(data))
+    job_pool.notify()
+
+    response = jsonify({
+        "job_id": job_id,
+        "status": "queued",
+        "total": len(tasks),
+        "status_url": f"/moodify-jobs/{job_id}",
+        "stream_url": f"/moodify-jobs/{job_id}/stream",
+    })
+    response.headers["Location"] = f"/moodify-jobs/{job_id}"
+    return response, 202
+
+@app.route("/moodify-jobs/<job_id>", methods=["GET"])
+def get_moodify_job(job_id):
+    """Job progress; finished results are included unless ?results=false (use ?since=N to page)"""
+    if job_pool is None:
+        return jobs_unavailable()
+
+    include_results = request.args.get("results", "true").lower() != "false"
+    since = request.args.get("since", 0, type=int)
+    job = job_pool.store.get_job(job_id, include_results=include_results, since=since)
+    if job is None:
+        return jsonify({"error": f"Unknown job '{job_id}'"}), 404
+    return jsonify(job)
+
+@app.route("/moodify-jobs/<job_id>/stream", methods=["GET"])
+def stream_moodify_job(job_id):
+    """Server-Sent Events: a 'result' event per finished task, 'progress' after each batch, then 'done'"""
+    if job_pool is None:
+        return jobs_unavailable()
+
+    store = job_pool.store
+    if store.get_job(job_id, include_results=False) is None:
+        return jsonify({"error": f"Unknown job '{job_id}'"}), 404
+
+    # A stream holds a request thread until the job completes, so it takes a moodify slot like /moodify-stream
+    if not moodify_gate.try_acquire():
+        response = jsonify({
+            "error": "Too many moodify requests in progress; retry shortly or poll the job instead",
+            "status_url": f"/moodify-jobs/{job_id}",
+        })
+        response.headers["Retry-After"] = "2"
+        return response, 503
+
+    def generate():
+        try:
+            yield from job_events(store, job_id)
+        finally:
+            moodify_gate.release()
+
+    return Response(stream_with_context(generate()), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    })
+
+def job_events(store, job_id):
+    """SSE events of a job until it completes, polling the job store"""
+    seen = set()
+    cursor = 0.0
+    last_sent = time.monotonic()
+    while True:
+        # Read the status first so a job that completes meanwhile still has all its results sent below
+        job = store.get_job(job_id, include_results=False)
+
+        # Re-read a few seconds back: another worker may commit a slightly older finish time late
+        finished = [task for task in store.finished_since(job_id, cursor - 5.0) if task["index"] not in seen]
+        for task in finished:
+            seen.add(task["index"])
+            cursor = max(cursor, task.pop("finished_at"))
+            yield sse_event("result", task)
+
+        # Only the status read before fetching results may end the stream
+        completed = job["status"] == "completed"
+        if finished and not completed:
+            job = store.get_job(job_id, include_results=False)
+        if finished or completed:
+            yield sse_event("progress", job)
+            last_sent = time.monotonic()
+        if completed:
+            yield sse_event("done", job)
+            return
+
+        if time.monotonic() - last_sent > 15:
+            # SSE comment line keeps idle proxies from closing the connection
+            yield ": keep-alive\n\n"
+            last_sent = time.monotonic()
+        time.sleep(0.5)
+
+def get_long_text_options(data):
+    """
+    Long-document options of an /analyze body: "long_text" (true, false or
+    "auto"), "aggregation" (mean, max, weighted) and "segments" (bool).
+    Only options the client sent are validated; the defaults were checked at startup.
+    Returns (options, None) or (None, error_response).
+    """
+    options = {"long_text": LONG_TEXT_MODE, "aggregation": LONG_TEXT_AGGREGATION,
+               "segments": data.get("segments") is True}
+
+    if "long_text" in data:
+        options["long_text"] = long_text_mode(data["long_text"])
+        if options["long_text"] is None:
+            return None, (jsonify({"error": "'long_text' must be true, false or \"auto\""}), 400)
+
+    if "aggregation" in data:
+        options["aggregation"] = data["aggregation"]
+        if options["aggregation"] not in AGGREGATIONS:
+            return None, (jsonify({"error": f"'aggregation' must be one of {', '.join(AGGREGATIONS)}"}), 400)
+
+    return options, None
 
 @app.route('/analyze', methods=['POST'])
 def analyze():
@@ -78,11 +669,15 @@ def analyze():
         return jsonify({"error": "Missing 'text' field"}), 400
     
     text = data['text']
+    bypass = cache_bypassed(data)
+    options, error = get_long_text_options(data)
+    if error:
+        return error
     
     # Try heavy model first, fallback to lightweight
     if heavy_model_available:
         try:
-            result = analyzer.analyze_emotion(text)
+            result = run_heavy(text, bypass, **options)
             result['analysis_type'] = 'heavy_bert'
             return jsonify(result)
         except Exception as e:
@@ -91,12 +686,47 @@ def analyze():
     # Fallback to lightweight model
     if lightweight_model_available:
         try:
-            result = lightweight_analyzer.analyze_emotion(text)
+            result = run_lightweight(text, bypass)
             return jsonify(result)
         except Exception as e:
             return jsonify({"error": f"Both models failed: {str(e)}"}), 500
     
-    return jsonify({"error": "No emotion analysis models available"}), 503
+    return model_unavailable("lightweight", "No emotion analysis models available")
+
+
+@app.route('/analyze-batch', methods=['POST'])
+def analyze_batch():
+    data = request.get_json(silent=True)
+    texts, error = get_batch_texts(data)
+    if error:
+        return error
+    output_format, error = get_output_format(data)
+    if error:
+        return error
+    bypass = cache_bypassed(data)
+
+    # Try heavy model first, fallback to lightweight
+    if heavy_model_available:
+        try:
+            if output_format != "json":
+                return columnar_response("heavy", analyzer, data, output_format)
+            results = run_heavy_batch(texts, bypass)
+            for result in results:
+                result['analysis_type'] = 'heavy_bert'
+            return jsonify({"results": results, "count": len(results)})
+        except Exception as e:
+            print(f"Heavy model batch failed, falling back to lightweight: {e}")
+
+    if lightweight_model_available:
+        try:
+            if output_format != "json":
+                return columnar_response("lightweight", lightweight_analyzer, data, output_format)
+            results = run_lightweight_batch(texts, bypass)
+            return jsonify({"results": results, "count": len(results)})
+        except Exception as e:
+            return jsonify({"error": f"Both models failed: {str(e)}"}), 500
+
+    return model_unavailable("lightweight", "No emotion analysis models available")
 
 
 @app.route('/analyze-light', methods=['POST'])
@@ -112,28 +742,208 @@ def analyze_light():
     text = data['text']
     
     if not lightweight_model_available:
-        return jsonify({"error": "Lightweight model not available. Please install vaderSentiment."}), 503
+        return model_unavailable("lightweight", "Lightweight model not available. Please install vaderSentiment.")
     
     try:
-        result = lightweight_analyzer.analyze_emotion(text)
+        result = run_lightweight(text, cache_bypassed(data))
         return jsonify(result)
     except Exception as e:
         return jsonify({"error": f"Lightweight analysis failed: {str(e)}"}), 500
 
 
+@app.route('/analyze-light-batch', methods=['POST'])
+def analyze_light_batch():
+    """Batch variant of /analyze-light: {"texts": [...]} in, results in the same order out"""
+    data = request.get_json(silent=True)
+    texts, error = get_batch_texts(data)
+    if error:
+        return error
+    output_format, error = get_output_format(data)
+    if error:
+        return error
+
+    if not lightweight_model_available:
+        return model_unavailable("lightweight", "Lightweight model not available. Please install vaderSentiment.")
+
+    try:
+        if output_format != "json":
+            return columnar_response("lightweight", lightweight_analyzer, data, output_format)
+        results = run_lightweight_batch(texts, cache_bypassed(data))
+        return jsonify({"results": results, "count": len(results)})
+    except Exception as e:
+        return jsonify({"error": f"Lightweight batch analysis failed: {str(e)}"}), 500
+
+
+def normalize_text(text):
+    """Canonical form of a text shared by every model in /analyze-all"""
+    return unicodedata.normalize("NFC", text).strip()
+
+def timed_run(run_fn, text, bypass):
+    """Run one model, returning (result, report) where report has its status and elapsed time"""
+    start = time.perf_counter()
+    try:
+        result, report = run_fn(text, bypass), {"status": "ok"}
+    except Exception as e:
+        result, report = None, {"status": "error", "error": str(e)}
+    report["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    return result, report
+
+@app.route('/analyze-all', methods=['POST'])
+def analyze_all():
+    """
+    TextBlob sentiment, VADER and BERT emotions for one text in a single call.
+    The models run concurrently, so latency is that of the slowest one; models
+    that are unavailable are reported in "models" instead of failing the request.
+    """
+    data = request.get_json(silent=True)
+    if not data or not isinstance(data.get("text"), str):
+        return jsonify({"error": "Missing 'text' field"}), 400
+
+    text = normalize_text(data["text"])
+    bypass = cache_bypassed(data)
+    start = time.perf_counter()
+
+    runs = {"textblob": run_sentiment}
+    if lightweight_model_available:
+        runs["lightweight"] = run_lightweight
+    if heavy_model_available:
+        runs["heavy"] = run_heavy
+
+    # The slowest model (BERT when loaded) runs on this thread; the others overlap with it
+    *pooled, inline = runs
+    futures = {name: analyze_all_executor.submit(timed_run, runs[name], text, bypass) for name in pooled}
+    outcomes = {inline: timed_run(runs[inline], text, bypass)}
+    for name, future in futures.items():
+        outcomes[name] = future.result()
+
+    body = {"text": text, "models": {}}
+    for name in model_status:
+        result, report = outcomes.get(name, (None, {"status": model_status[name]}))
+        body[name] = result
+        body["models"][name] = report
+    body["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    return jsonify(body)
+
+
+@app.route('/score-stream', methods=['POST'])
+def score_stream():
+    """
+    Bulk scoring over NDJSON: upload one {"id", "text"} object per line (chunked
+    uploads welcome), get one result line per input line back as batches finish,
+    then a {"done": true} summary line. ?models=textblob,lightweight,heavy picks
+    the models (default textblob); ?cache=true uses the result cache.
+    """
+    runners = {"textblob": run_sentiment_batch, "lightweight": run_lightweight_batch, "heavy": run_heavy_batch}
+    available = {"textblob": True, "lightweight": lightweight_model_available, "heavy": heavy_model_available}
+
+    models = [name.strip() for name in request.args.get("models", "textblob").split(",") if name.strip()]
+    unknown = [name for name in models if name not in runners]
+    if not models or unknown:
+        return jsonify({"error": f"'models' must be a comma-separated subset of {', '.join(runners)}"}), 400
+    for name in models:
+        if not available[name]:
+            return model_unavailable(name, f"Model '{name}' is not available")
+
+    # Nightly re-scoring would just churn the cache, so it is opt-in here
+    bypass = request.args.get("cache", "false").lower() != "true"
+
+    def score_batch(texts):
+        results = [{} for _ in texts]
+        for name in models:
+            for result, model_result in zip(results, runners[name](texts, bypass)):
+                result[name] = model_result
+        return results
+
+    if (request.content_length or 0) > BULK_MAX_UPLOAD_BYTES:
+        return jsonify({"error": f"Upload too large: maximum is {BULK_MAX_UPLOAD_BYTES} bytes"}), 413
+
+    spool = InputSpool(request.stream)
+
+    def generate():
+        start = time.perf_counter()
+        count = errors = 0
+        try:
+            for result in stream_results(spool.iter_lines(), score_batch, bulk_executor):
+                count += 1
+                errors += "error" in result
+                yield json.dumps(result) + "\n"
+            summary = {"done": True, "count": count, "errors": errors,
+                       "elapsed_ms": round((time.perf_counter() - start) * 1000, 2)}
+            if spool.truncated:
+                summary["error"] = spool.error
+            elif spool.error:
+                summary["error"] = f"Upload interrupted: {spool.error}"
+            yield json.dumps(summary) + "\n"
+        finally:
+            spool.close()
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    })
+
+
+@app.route("/healthz", methods=["GET"])
+def healthz():
+    """Liveness probe: the worker is up and serving requests"""
+    return jsonify({"status": "ok"})
+
+
+@app.route("/readyz", methods=["GET"])
+def readyz():
+    """Readiness probe: 200 only once every enabled model is loaded and warmed up"""
+    ready = models_ready.is_set()
+    body = {"status": "ready" if ready else "loading", "models": model_status}
+    return jsonify(body), 200 if ready else 503
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Runtime metrics for the analysis pipeline"""
+    return jsonify({
+        "heavy_model": analyzer.describe() if heavy_model_available else {"loaded": False},
+        "micro_batching": heavy_batcher.stats() if heavy_batcher is not None else {"enabled": False},
+        "inference_sidecar": sidecar_stats(),
+        "result_cache": result_cache.stats() if result_cache is not None else {"enabled": False},
+        "moodify_cache": moodify_cache.stats() if moodify_cache is not None else {"enabled": False},
+        "moodify_concurrency": moodify_gate.stats(),
+        "llm": llm_policy.stats(),
+        "moodify_jobs": job_pool.stats() if job_pool is not None else {"enabled": False},
+        "memory": worker_memory()
+    })
+
+def sidecar_stats():
+    if not INFERENCE_SOCKET:
+        return {"enabled": False}
+    try:
+        return {"enabled": True, "socket": INFERENCE_SOCKET, **analyzer.stats()}
+    except Exception as e:
+        return {"enabled": True, "socket": INFERENCE_SOCKET, "error": str(e)}
+
+def worker_memory():
+    """This worker's memory; uss_mb is what it does not share with the master or other workers"""
+    try:
+        memory = process_memory()
+    except OSError:
+        memory = {}
+    return {"pid": os.getpid(), "preloaded": PRELOAD_MODELS, **memory}
+
+
 @app.route("/", methods=["GET"])
 def health():
     # Check which models are available
-    model_status = []
+    available_models = []
     if heavy_model_available:
-        model_status.append("🤖 BERT model (high accuracy, high memory)")
+        available_models.append("🤖 BERT model (high accuracy, high memory)")
     if lightweight_model_available:
-        model_status.append("⚡ VADER model (fast, low memory)")
-    model_status.append("✅ TextBlob Model (Ultra-Light)")
+        available_models.append("⚡ VADER model (fast, low memory)")
+    available_models.append("✅ TextBlob Model (Ultra-Light)")
     
 
     status_message = "✅ Server is running!"
-    if not heavy_model_available and not lightweight_model_available:
+    if not models_ready.is_set():
+        status_message = "⏳ Server running, models are still warming up"
+    elif not heavy_model_available and not lightweight_model_available:
         status_message = "⚠️  Server running but no emotion models available"
     elif not heavy_model_available:
         status_message = "✅ Server running with lightweight model only"
@@ -144,7 +954,7 @@ def health():
         "emoji": "🎭",
         "service_name": "Ice's Sentiment Analysis Microservice",
         "status": status_message,
-        "model_status": model_status,
+        "model_status": available_models,
         "endpoints": [
             {
                 "method": "GET",
@@ -171,11 +981,60 @@ def health():
                 "body": '{"text": "your text here"}',
                 "note": "🚀 Optimized for Render free tier (512Mi memory limit)"
             },
+            {
+                "method": "POST",
+                "path": "/analyze-all",
+                "description": "🧩 TextBlob, VADER and BERT in one call, run concurrently, with per-model timings",
+                "body": '{"text": "your text here"}'
+            },
+            {
+                "method": "POST",
+                "path": "/score-stream?models=textblob,lightweight,heavy",
+                "description": "🚚 Bulk scoring: NDJSON upload ({\"id\", \"text\"} per line), NDJSON results streamed back",
+                "body": '{"id": 1, "text": "first text"}\n{"id": 2, "text": "second text"}'
+            },
+            {
+                "method": "POST",
+                "path": "/predict-batch, /analyze-batch, /analyze-light-batch",
+                "description": "📦 Batch variants: analyze many texts in one call (duplicates scored once, order preserved)",
+                "body": '{"texts": ["first text", "second text"]}',
+                "note": f"Up to {MAX_BATCH_SIZE} texts per request; \"format\": \"arrow\" or \"parquet\" returns columnar results"
+            },
+            {
+                "method": "GET",
+                "path": "/healthz, /readyz",
+                "description": "Liveness and readiness probes (readyz returns 503 until models are warmed up)",
+                "body": None
+            },
+            {
+                "method": "GET",
+                "path": "/metrics",
+                "description": "📈 Runtime metrics (micro-batch sizes and queueing delay)",
+                "body": None
+            },
             {
                 "method": "POST",
                 "path": "/moodify",
                 "description": "Transform text to target sentiment",
                 "body": '{"text": "your text", "target_sentiment": "positive|negative|neutral"}'
+            },
+            {
+                "method": "POST",
+                "path": "/moodify-batch",
+                "description": "📦 Transform several texts at once (up to MOODIFY_BATCH_SIZE texts per LLM call)",
+                "body": '{"texts": ["first text", "second text"], "target_sentiment": "positive"}'
+            },
+            {
+                "method": "POST",
+                "path": "/moodify-jobs",
+                "description": "🧾 Queue many moodify tasks, get a job ID back; poll GET /moodify-jobs/<id> or stream /moodify-jobs/<id>/stream",
+                "body": '{"texts": ["first text", "second text"], "target_sentiment": "positive"}'
+            },
+            {
+                "method": "POST",
+                "path": "/moodify-stream",
+                "description": "🌊 Streaming /moodify: LLM tokens as Server-Sent Events, final 'done' event carries the result",
+                "body": '{"text": "your text", "target_sentiment": "positive|negative|neutral"}'
             }
         ],
         "example_curl": """curl -X POST https://moodify-tk9p.onrender.com/analyze-light \\
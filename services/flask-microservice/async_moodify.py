@@ -0,0 +1,379 @@
+"""
+Non-blocking /moodify: OpenRouter calls run on an asyncio event loop.
+
+Each worker process runs one background event loop thread with an AsyncOpenAI
+client, so any number of in-flight LLM calls share that loop instead of each
+holding a blocked request thread doing network I/O. Request threads only wait
+on a future, and MoodifyGate caps how many of them may do so at once; with
+gunicorn's gthread workers (see gunicorn.conf.py) the remaining threads are
+always free for the CPU-bound analysis endpoints. /moodify-stream uses the same
+loop with a streaming completion and forwards deltas to the request thread.
+"""
+
+import asyncio
+import os
+import queue
+import threading
+
+from llm_client import Deadline, create_async_client, llm_policy, request_timeout, scaled_max_tokens
+from model import (MOODIFY_MODEL, analyze_sentiment, batch_max_tokens, build_moodify_batch_messages,
+                   build_moodify_messages, candidate_score, clean_moodify_output, finish_moodify,
+                   finish_moodify_batch, moodify_fallback, start_moodify, start_moodify_batch)
+
+
+class MoodifyGate:
+    """
+    Admission control: at most max_concurrency moodify LLM calls in flight per
+    worker. A request takes one permit per LLM call it may run at once.
+    """
+
+    def __init__(self, max_concurrency):
+        self.max_concurrency = max(1, int(max_concurrency))
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.rejected = 0
+
+    def try_acquire(self, permits=1):
+        """Take permits all at once, or none of them"""
+        with self._lock:
+            if self.in_flight + permits > self.max_concurrency:
+                self.rejected += 1
+                return False
+            self.in_flight += permits
+        return True
+
+    def release(self, permits=1):
+        with self._lock:
+            self.in_flight -= permits
+
+    def stats(self):
+        with self._lock:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "in_flight": self.in_flight,
+                "rejected": self.rejected,
+            }
+
+
+class AsyncLLMRunner:
+    """Owns a background event loop and the AsyncOpenAI client that lives on it"""
+
+    def __init__(self):
+        self._loop = None
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.client = None
+
+    def _ensure_loop(self):
+        # Started lazily (and again after a fork) since threads do not survive fork()
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return self._loop
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return self._loop
+            ready = threading.Event()
+
+            def run():
+                self._loop = asyncio.new_event_loop()
+                asyncio.set_event_loop(self._loop)
+                self.client = self._create_client()
+                ready.set()
+                self._loop.run_forever()
+
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=run, name="async-llm-loop", daemon=True)
+            self._thread.start()
+            ready.wait()
+            return self._loop
+
+    @staticmethod
+    def _create_client():
+        try:
+            return create_async_client()
+        except Exception as e:
+            print(f"Warning: Could not initialize async OpenAI client: {e}")
+            return None
+
+    def get_client(self):
+        """The AsyncOpenAI client (None without an API key); only use it on this runner's loop"""
+        self._ensure_loop()
+        return self.client
+
+    def submit(self, coroutine_fn):
+        """Schedule coroutine_fn() on the loop and return its concurrent.futures.Future"""
+        loop = self._ensure_loop()
+        return asyncio.run_coroutine_threadsafe(coroutine_fn(), loop)
+
+    def run(self, coroutine_fn, timeout):
+        """Run coroutine_fn() on the loop and block the calling thread until it finishes"""
+        future = self.submit(coroutine_fn)
+        try:
+            return future.result(timeout)
+        except Exception:
+            future.cancel()
+            raise
+
+
+runner = AsyncLLMRunner()
+
+# Candidate rewrites are sampled at temperatures spread evenly over this range
+CANDIDATE_TEMPERATURES = (0.7, 1.1)
+
+
+def candidate_temperatures(count):
+    low, high = CANDIDATE_TEMPERATURES
+    if count == 1:
+        return [low]
+    return [round(low + (high - low) * i / (count - 1), 2) for i in range(count)]
+
+
+async def _complete(async_client, messages, max_tokens, deadline, temperature=0.7):
+    """One chat completion under the shared LLM policy; returns the message text"""
+    response = await llm_policy.acall(lambda seconds: async_client.chat.completions.create(
+        model=MOODIFY_MODEL,
+        messages=messages,
+        max_tokens=max_tokens,
+        temperature=temperature,
+        timeout=request_timeout(seconds)
+    ), deadline)
+    return response.choices[0].message.content
+
+
+def run_moodify(text, target_sentiment, use_cache=True, timeout=60):
+    """
+    Blocking moodify for Flask views. TextBlob work runs on the calling thread;
+    only the OpenRouter round-trip is awaited on the event loop.
+    """
+    result, original_sentiment = start_moodify(text, target_sentiment, use_cache)
+    if result is not None:
+        return result
+
+    async_client = runner.get_client()
+    if async_client is None:
+        return moodify_fallback(text, target_sentiment, original_sentiment, "OpenAI client not available")
+
+    deadline = Deadline(timeout)
+    try:
+        llm_output = runner.run(lambda: _complete(
+            async_client, build_moodify_messages(text, target_sentiment), scaled_max_tokens(text), deadline
+        ), timeout + 1)  # acall enforces the deadline; this is only a backstop
+        return finish_moodify(text, target_sentiment, original_sentiment, llm_output)
+    except Exception as e:
+        return moodify_fallback(text, target_sentiment, original_sentiment, str(e) or f"LLM call exceeded {timeout}s")
+
+
+def run_moodify_candidates(text, target_sentiment, candidates=3, use_cache=True, timeout=60, early_stop=True):
+    """
+    run_moodify with several candidate rewrites requested concurrently (parallel
+    calls at spread temperatures, so wall-clock time stays near one call). The
+    caller holds one MoodifyGate permit per candidate. Each
+    candidate is scored with analyze_sentiment as it arrives and the best match
+    is returned; with early_stop, the remaining calls are cancelled as soon as a
+    candidate hits the target.
+    """
+    result, original_sentiment = start_moodify(text, target_sentiment, use_cache)
+    if result is not None:
+        return result
+
+    async_client = runner.get_client()
+    if async_client is None:
+        return moodify_fallback(text, target_sentiment, original_sentiment, "OpenAI client not available")
+
+    deadline = Deadline(timeout)
+    messages = build_moodify_messages(text, target_sentiment)
+    max_tokens = scaled_max_tokens(text)
+    arrivals = queue.Queue()
+
+    async def produce():
+        async def one(temperature):
+            try:
+                output = await _complete(async_client, messages, max_tokens, deadline, temperature=temperature)
+                arrivals.put((output, None))
+            except Exception as e:
+                arrivals.put((None, e))
+
+        await asyncio.gather(*(one(temperature) for temperature in candidate_temperatures(candidates)))
+
+    future = runner.submit(produce)
+    best, best_score, evaluated, errors, stopped_early = None, None, 0, [], False
+    try:
+        for _ in range(candidates):
+            try:
+                output, error = arrivals.get(timeout=deadline.remaining())
+            except queue.Empty:
+                break
+            if error is not None:
+                errors.append(error)
+                continue
+
+            # Scored on this thread so TextBlob never blocks the event loop
+            evaluated += 1
+            cleaned = clean_moodify_output(output)
+            score = candidate_score(analyze_sentiment(cleaned), target_sentiment)
+            if best_score is None or score > best_score:
+                best, best_score = cleaned, score
+            if early_stop and score[0]:
+                stopped_early = evaluated < candidates
+                break
+    finally:
+        future.cancel()
+
+    if best is None:
+        error = str(errors[0]) if errors and str(errors[0]) else f"LLM call exceeded {timeout}s"
+        return moodify_fallback(text, target_sentiment, original_sentiment, error)
+
+    result = finish_moodify(text, target_sentiment, original_sentiment, best)
+    result["candidates"] = {
+        "requested": candidates,
+        "evaluated": evaluated,
+        "failed": len(errors),
+        "stopped_early": stopped_early,
+    }
+    return result
+
+
+def _gather_on_loop(coroutine_fns, timeout, max_concurrency):
+    """
+    Run the coroutines on the loop, at most max_concurrency at a time; each
+    result is a value or the exception it raised
+    """
+    async def gather():
+        slots = asyncio.Semaphore(max_concurrency)
+
+        async def bounded(fn):
+            async with slots:
+                return await fn()
+
+        return await asyncio.gather(*(bounded(fn) for fn in coroutine_fns), return_exceptions=True)
+
+    try:
+        return runner.run(gather, timeout)
+    except Exception as e:
+        return [e] * len(coroutine_fns)
+
+
+def run_moodify_batch(items, use_cache=True, timeout=60, max_concurrency=4):
+    """
+    Blocking batch moodify for Flask views and job workers. Same contract as
+    model.moodify_batch, but the chunks' LLM calls (and the individual retries
+    of items a response left out) run on the event loop, up to max_concurrency
+    at once.
+    """
+    deadline = Deadline(timeout)
+    results, originals, chunks = start_moodify_batch(items, use_cache)
+    if not chunks:
+        return results
+
+    async_client = runner.get_client()
+    if async_client is None:
+        for chunk in chunks:
+            for index in chunk:
+                text, target_sentiment = items[index]
+                results[index] = moodify_fallback(text, target_sentiment, originals[index],
+                                                  "OpenAI client not available")
+        return results
+
+    def chunk_call(chunk_items):
+        return lambda: _complete(async_client, build_moodify_batch_messages(chunk_items),
+                                 batch_max_tokens(chunk_items), deadline)
+
+    outputs = _gather_on_loop([chunk_call([items[i] for i in chunk]) for chunk in chunks], timeout + 1,
+                              max_concurrency)
+
+    retry, errors = [], {}
+    for chunk, output in zip(chunks, outputs):
+        if isinstance(output, BaseException):
+            errors.update((index, str(output) or "Batch LLM call failed") for index in chunk)
+            continue
+        try:
+            retry.extend(finish_moodify_batch(items, originals, chunk, output, results))
+        except Exception as e:
+            errors.update((index, str(e)) for index in chunk if results[index] is None)
+
+    if retry:
+        def single_call(text, target_sentiment):
+            return lambda: _complete(async_client, build_moodify_messages(text, target_sentiment),
+                                     scaled_max_tokens(text), deadline)
+
+        outputs = _gather_on_loop([single_call(*items[i]) for i in retry], deadline.remaining() + 1,
+                                  max_concurrency)
+        for index, output in zip(retry, outputs):
+            text, target_sentiment = items[index]
+            if isinstance(output, BaseException):
+                errors[index] = str(output) or f"LLM call exceeded {timeout}s"
+                continue
+            try:
+                results[index] = finish_moodify(text, target_sentiment, originals[index], output)
+            except Exception as e:
+                errors[index] = str(e)
+
+    for index, error in errors.items():
+        text, target_sentiment = items[index]
+        results[index] = moodify_fallback(text, target_sentiment, originals[index], error)
+    return results
+
+
+_STREAM_END = object()
+
+
+def stream_moodify(text, target_sentiment, use_cache=True, timeout=60):
+    """
+    Streaming moodify. Yields ("token", {"token": ...}) for each LLM text delta as
+    it arrives, then exactly one ("done", result) with the same dict run_moodify
+    returns; the final result is authoritative (quotes stripped, sentiment
+    verified, or the word-replacement fallback if the stream failed).
+    """
+    result, original_sentiment = start_moodify(text, target_sentiment, use_cache)
+    if result is not None:
+        yield "done", result
+        return
+
+    async_client = runner.get_client()
+    if async_client is None:
+        yield "done", moodify_fallback(text, target_sentiment, original_sentiment, "OpenAI client not available")
+        return
+
+    # The loop pushes deltas into a thread-safe queue the request thread drains
+    deltas = queue.Queue()
+
+    deadline = Deadline(timeout)
+
+    async def produce():
+        try:
+            # Only opening the stream is retried; once tokens flow a failure ends it
+            stream = await llm_policy.acall(lambda seconds: async_client.chat.completions.create(
+                model=MOODIFY_MODEL,
+                messages=build_moodify_messages(text, target_sentiment),
+                max_tokens=scaled_max_tokens(text),
+                temperature=0.7,
+                stream=True,
+                timeout=request_timeout(seconds)
+            ), deadline)
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    deltas.put(delta)
+        finally:
+            deltas.put(_STREAM_END)
+
+    future = runner.submit(produce)
+    parts = []
+    try:
+        while True:
+            try:
+                delta = deltas.get(timeout=deadline.remaining())
+            except queue.Empty:
+                raise TimeoutError(f"LLM call exceeded {timeout}s")
+            if delta is _STREAM_END:
+                break
+            parts.append(delta)
+            yield "token", {"token": delta}
+
+        future.result()  # re-raises API errors from the stream
+        yield "done", finish_moodify(text, target_sentiment, original_sentiment, "".join(parts))
+    except Exception as e:
+        yield "done", moodify_fallback(text, target_sentiment, original_sentiment, str(e) or "LLM stream failed")
+    finally:
+        # Also runs when the client disconnects mid-stream (GeneratorExit)
+        future.cancel()
@@ -0,0 +1,163 @@
+"""
+Dynamic micro-batching for the heavy BERT model.
+
+Concurrent /analyze requests are collected for up to a short window (or until
+a maximum batch size is reached) and scored with a single padded forward pass
+via EmotionAnalyzer.analyze_emotion_batch. Each caller blocks until its own
+result is ready.
+"""
+
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+
+class _PendingRequest:
+    """One caller waiting for its text to be scored"""
+
+    __slots__ = ("text", "enqueued_at", "done", "result", "error")
+
+    def __init__(self, text):
+        self.text = text
+        self.enqueued_at = time.monotonic()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MicroBatcher:
+    """
+    Collect concurrent single-text requests into batches for batch_fn.
+
+    batch_fn takes a list of texts and returns a list of results in the same
+    order. A batch is dispatched as soon as max_batch_size requests are queued
+    or max_wait_ms has passed since the oldest request arrived.
+    """
+
+    def __init__(self, batch_fn, max_batch_size=16, max_wait_ms=5.0):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+        self._worker_pid = None
+
+        # Metrics
+        self._total_requests = 0
+        self._total_batches = 0
+        self._max_batch_seen = 0
+        self._batch_size_histogram = {}
+        self._recent_delays_ms = deque(maxlen=1000)
+        self._total_delay_ms = 0.0
+        self._max_delay_ms = 0.0
+
+    def submit(self, text, timeout=None):
+        """Queue text for the next batch and block until its result is ready"""
+        self._ensure_worker()
+        pending = _PendingRequest(text)
+        self._queue.put(pending)
+
+        if not pending.done.wait(timeout):
+            raise TimeoutError("Timed out waiting for batched inference")
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def stats(self):
+        """Batch size and queueing delay metrics since startup"""
+        with self._lock:
+            delays = sorted(self._recent_delays_ms)
+            batches = self._total_batches
+            return {
+                "enabled": True,
+                "requests": self._total_requests,
+                "batches": batches,
+                "avg_batch_size": round(self._total_requests / batches, 2) if batches else 0.0,
+                "max_batch_size": self._max_batch_seen,
+                "batch_size_histogram": dict(sorted(self._batch_size_histogram.items())),
+                "queue_delay_ms": {
+                    "avg": round(self._total_delay_ms / self._total_requests, 3) if self._total_requests else 0.0,
+                    "p50": round(_percentile(delays, 0.50), 3),
+                    "p95": round(_percentile(delays, 0.95), 3),
+                    "max": round(self._max_delay_ms, 3),
+                },
+                "config": {
+                    "max_batch_size": self.max_batch_size,
+                    "max_wait_ms": self.max_wait * 1000.0,
+                },
+            }
+
+    def _ensure_worker(self):
+        # The worker is started lazily (and restarted after a fork) because
+        # threads created in a gunicorn master do not survive into workers.
+        if self._worker is not None and self._worker_pid == os.getpid() and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is not None and self._worker_pid == os.getpid() and self._worker.is_alive():
+                return
+            if self._worker_pid != os.getpid():
+                self._queue = queue.Queue()
+            self._worker_pid = os.getpid()
+            self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+            self._worker.start()
+
+    def _collect_batch(self):
+        """Block for the first request, then gather more until the window closes or the batch is full"""
+        first = self._queue.get()
+        batch = [first]
+        deadline = first.enqueued_at + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            dispatched_at = time.monotonic()
+            self._record(batch, dispatched_at)
+
+            try:
+                results = self.batch_fn([pending.text for pending in batch])
+                if len(results) != len(batch):
+                    raise RuntimeError(f"batch_fn returned {len(results)} results for {len(batch)} inputs")
+            except Exception as e:
+                for pending in batch:
+                    pending.error = e
+                    pending.done.set()
+                continue
+
+            for pending, result in zip(batch, results):
+                pending.result = result
+                pending.done.set()
+
+    def _record(self, batch, dispatched_at):
+        with self._lock:
+            size = len(batch)
+            self._total_batches += 1
+            self._total_requests += size
+            self._max_batch_seen = max(self._max_batch_seen, size)
+            self._batch_size_histogram[size] = self._batch_size_histogram.get(size, 0) + 1
+            for pending in batch:
+                delay_ms = (dispatched_at - pending.enqueued_at) * 1000.0
+                self._recent_delays_ms.append(delay_ms)
+                self._total_delay_ms += delay_ms
+                self._max_delay_ms = max(self._max_delay_ms, delay_ms)
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
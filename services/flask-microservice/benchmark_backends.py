@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Latency benchmark for the EmotionAnalyzer backends on CPU
+
+Usage:
+    python benchmark_backends.py                      # all backends
+    python benchmark_backends.py --backends pytorch onnx --runs 50
+"""
+
+import argparse
+import statistics
+import sys
+import os
+import time
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from model import EmotionAnalyzer, HEAVY_MODELS_AVAILABLE
+
+SAMPLE_TEXTS = [
+    "I am so excited about this new opportunity!",
+    "This is absolutely terrible and I hate it.",
+    "The weather is okay today, nothing special.",
+    "I love spending time with my family and friends.",
+    "I'm really disappointed with the service.",
+    "This is an amazing breakthrough in technology!",
+    "Honestly I don't know how I feel about the move, it's a lot to process.",
+    "Thanks so much for helping me out yesterday, it meant a lot.",
+]
+
+
+def time_call(fn, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        "p50": statistics.median(timings),
+        "p95": timings[min(len(timings) - 1, int(0.95 * len(timings)))],
+        "mean": statistics.mean(timings),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["pytorch", "onnx", "torchscript"])
+    parser.add_argument("--runs", type=int, default=30)
+    parser.add_argument("--batch-size", type=int, default=16)
+    args = parser.parse_args()
+
+    if not HEAVY_MODELS_AVAILABLE:
+        print("❌ torch/transformers not installed")
+        sys.exit(1)
+
+    batch = (SAMPLE_TEXTS * (args.batch_size // len(SAMPLE_TEXTS) + 1))[:args.batch_size]
+    # Make every text unique so dedupe does not shrink the batch
+    batch = [f"{text} ({i})" for i, text in enumerate(batch)]
+
+    print(f"{'backend':<12} {'load s':>8} {'single p50':>11} {'single p95':>11} {'batch p50':>10} {'batch p95':>10}")
+    print("-" * 68)
+    for backend in args.backends:
+        start = time.perf_counter()
+        try:
+            analyzer = EmotionAnalyzer(backend=backend)
+        except Exception as e:
+            print(f"{backend:<12} failed to load: {e}")
+            continue
+        load_seconds = time.perf_counter() - start
+
+        # Warm up kernels and allocator before timing
+        for text in SAMPLE_TEXTS:
+            analyzer.analyze_emotion(text)
+
+        single = time_call(lambda: analyzer.analyze_emotion(SAMPLE_TEXTS[0]), args.runs)
+        batched = time_call(lambda: analyzer.analyze_emotion_batch(batch), max(3, args.runs // 5))
+        print(f"{backend:<12} {load_seconds:>8.1f} {single['p50']:>9.1f}ms {single['p95']:>9.1f}ms "
+              f"{batched['p50']:>8.1f}ms {batched['p95']:>8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+NDJSON bulk scoring for /score-stream.
+
+Upload: one {"id": ..., "text": ...} object per line, usually sent chunked.
+Response: one result object per input line, streamed back as batches finish,
+then a final {"done": true, ...} summary line.
+
+- InputSpool drains the request body to a temporary file on its own thread.
+  Many HTTP clients (and the Django gateways) upload the whole body before
+  reading any of the response. If the upload could only be read as fast as
+  results are written, their unread results would fill the socket buffers and
+  both sides would wait on each other. Memory use is one read chunk; the upload
+  itself lives on disk, up to max_bytes (BULK_MAX_UPLOAD_BYTES), after which
+  the spool stops reading and the stream ends with an error.
+- stream_results groups lines into batches, runs at most max_in_flight
+  batches at a time on an executor, and yields each batch's output as soon as
+  it is done, so only a bounded number of lines is ever held in memory.
+"""
+
+import json
+import os
+import tempfile
+import threading
+from concurrent.futures import FIRST_COMPLETED, wait
+
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "64"))
+BULK_MAX_IN_FLIGHT = int(os.getenv("BULK_MAX_IN_FLIGHT", "4"))
+BULK_MAX_LINE_BYTES = int(os.getenv("BULK_MAX_LINE_BYTES", str(1024 * 1024)))
+BULK_MAX_UPLOAD_BYTES = int(os.getenv("BULK_MAX_UPLOAD_BYTES", str(256 * 1024 * 1024)))
+
+READ_CHUNK_BYTES = 64 * 1024
+
+
+class InputSpool:
+    """Reads a stream to EOF on a background thread; iter_lines() replays it as it arrives"""
+
+    def __init__(self, stream, chunk_size=READ_CHUNK_BYTES, max_bytes=BULK_MAX_UPLOAD_BYTES):
+        self._file = tempfile.TemporaryFile()
+        self._chunk_size = chunk_size
+        self._max_bytes = max_bytes
+        self._written = 0
+        self._finished = False
+        self._closed = False
+        self.error = None
+        self.truncated = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._drain, args=(stream,), name="ndjson-spool", daemon=True)
+        self._thread.start()
+
+    def _drain(self, stream):
+        try:
+            while True:
+                chunk = stream.read(self._chunk_size)
+                if not chunk:
+                    break
+                if self._written + len(chunk) > self._max_bytes:
+                    self.truncated = True
+                    self.error = f"Upload is larger than {self._max_bytes} bytes (BULK_MAX_UPLOAD_BYTES)"
+                    break
+                with self._cond:
+                    if self._closed:
+                        break
+                    os.pwrite(self._file.fileno(), chunk, self._written)
+                    self._written += len(chunk)
+                    self._cond.notify_all()
+        except Exception as e:
+            self.error = str(e) or "Upload interrupted"
+        finally:
+            with self._cond:
+                self._finished = True
+                self._cond.notify_all()
+
+    def _chunks(self):
+        offset = 0
+        while True:
+            with self._cond:
+                while offset >= self._written and not self._finished:
+                    self._cond.wait()
+                available = self._written - offset
+                if available <= 0:
+                    return
+            chunk = os.pread(self._file.fileno(), min(available, self._chunk_size), offset)
+            offset += len(chunk)
+            yield chunk
+
+    def iter_lines(self, max_line_bytes=BULK_MAX_LINE_BYTES):
+        """
+        Yield (line_number, bytes) for every line of the upload. Lines longer
+        than max_line_bytes are yielded as None instead of being buffered. When
+        the upload was cut off at max_bytes, the partial last line is dropped.
+        """
+        buffer = b""
+        overlong = False
+        number = 0
+        for chunk in self._chunks():
+            lines = (buffer + chunk).split(b"\n")
+            buffer = lines.pop()
+            for line in lines:
+                number += 1
+                yield number, None if overlong or len(line) > max_line_bytes else line
+                overlong = False
+            if len(buffer) > max_line_bytes:
+                buffer, overlong = b"", True
+        if (buffer or overlong) and not self.truncated:
+            yield number + 1, None if overlong else buffer
+
+    def close(self):
+        # Under the lock, so the drain thread never writes to a closed (or reused) descriptor
+        with self._cond:
+            self._closed = True
+            self._file.close()
+
+
+def parse_line(number, raw):
+    """A record {"line", "id", "text"} or an error record {"line", "id", "error"}"""
+    if raw is None:
+        return {"line": number, "id": None, "error": "Line too long"}
+    try:
+        item = json.loads(raw)
+    except ValueError:
+        return {"line": number, "id": None, "error": "Invalid JSON"}
+    if not isinstance(item, dict) or not isinstance(item.get("text"), str):
+        item_id = item.get("id") if isinstance(item, dict) else None
+        return {"line": number, "id": item_id, "error": "Each line must be an object with a string 'text'"}
+    return {"line": number, "id": item.get("id"), "text": item["text"]}
+
+
+def _records(lines):
+    for number, raw in lines:
+        if raw is not None and not raw.strip():
+            continue
+        yield parse_line(number, raw)
+
+
+def _batches(records, batch_size):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _score(score_batch, batch):
+    """Run score_batch on the valid records of a batch; returns NDJSON lines in batch order"""
+    valid = [record for record in batch if "error" not in record]
+    scored = {}
+    if valid:
+        try:
+            for record, result in zip(valid, score_batch([record["text"] for record in valid])):
+                scored[record["line"]] = {"id": record["id"], "line": record["line"], **result}
+        except Exception as e:
+            for record in valid:
+                scored[record["line"]] = {"id": record["id"], "line": record["line"], "error": str(e) or "Scoring failed"}
+
+    out = []
+    for record in batch:
+        if "error" in record:
+            out.append({"id": record["id"], "line": record["line"], "error": record["error"]})
+        else:
+            out.append(scored[record["line"]])
+    return out
+
+
+def stream_results(lines, score_batch, executor, batch_size=BULK_BATCH_SIZE, max_in_flight=BULK_MAX_IN_FLIGHT):
+    """
+    Yield result dicts for lines ((number, bytes) pairs). score_batch(texts)
+    returns one result dict per text, in order. At most max_in_flight batches
+    are queued or running at once; results come out as batches complete.
+    """
+    pending = set()
+    try:
+        for batch in _batches(_records(lines), batch_size):
+            if len(pending) >= max_in_flight:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+            pending.add(executor.submit(_score, score_batch, batch))
+            # Hand back whatever has finished without waiting for more input
+            for future in [f for f in pending if f.done()]:
+                pending.discard(future)
+                yield from future.result()
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from future.result()
+    finally:
+        for future in pending:
+            future.cancel()
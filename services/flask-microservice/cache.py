@@ -0,0 +1,372 @@
+"""
+Result caches for the analysis functions.
+
+Results are keyed by a hash of the model name, model version and the
+normalized input text, so changing a model (or its backend/precision) never
+serves stale scores.
+
+- ResultCache: in-process LRU bounded by entry count, every entry has a TTL
+- SQLiteCacheBackend / RedisCacheBackend: shared second tier that every
+  gunicorn worker on a host (SQLite) or in a deployment (Redis) can read, and
+  that survives restarts
+- TieredCache: ResultCache in front of a shared backend, with the same
+  get/set interface so it can be used anywhere a ResultCache is
+
+Every cache also has get_many/set_many, which batch endpoints use so a batch
+costs one round trip to the shared backend instead of one per text.
+"""
+
+import copy
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    redis = None
+    REDIS_AVAILABLE = False
+
+
+def normalize_text(text):
+    """Collapse runs of whitespace; none of the analyzers are sensitive to it"""
+    return " ".join(text.split())
+
+
+def make_key(model, version, text, exact=False):
+    """Cache key for text; exact keys skip normalize_text, for results that depend on the raw layout"""
+    raw = f"{model}\x00{version}\x00{text if exact else normalize_text(text)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """Thread-safe LRU cache with per-entry TTL and hit/miss counters"""
+
+    def __init__(self, max_entries=10000, ttl_seconds=3600):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = float(ttl_seconds)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        """Return a copy of the cached value, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+        # Callers annotate results (e.g. analysis_type), so never hand out the stored object
+        return copy.deepcopy(value)
+
+    def set(self, key, value, ttl_seconds=None):
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        stored = copy.deepcopy(value)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, stored)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_many(self, keys):
+        return [self.get(key) for key in keys]
+
+    def set_many(self, items, ttl_seconds=None):
+        for key, value in items:
+            self.set(key, value, ttl_seconds)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": True,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+class SQLiteCacheBackend:
+    """
+    Shared cache in a local SQLite file (WAL mode), for single-host deployments.
+    Entries are stored as JSON with an absolute expiry time; expired rows and
+    the oldest rows beyond max_entries are pruned every prune_every writes.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path, max_entries=100000, prune_every=500):
+        self.path = path
+        self.max_entries = int(max_entries)
+        self.prune_every = int(prune_every)
+        self._local = threading.local()
+        self._writes = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS results_expires_at ON results (expires_at)")
+
+    def _connection(self):
+        # sqlite3 connections must not be shared across threads or forked processes
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key):
+        row = self._connection().execute(
+            "SELECT value FROM results WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_many(self, keys):
+        conn = self._connection()
+        found = {}
+        now = time.time()
+        # Stay under SQLite's limit on bound parameters per statement
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            rows = conn.execute(
+                f"SELECT key, value FROM results WHERE key IN ({', '.join('?' * len(chunk))}) AND expires_at > ?",
+                (*chunk, now)
+            ).fetchall()
+            found.update(rows)
+        return [json.loads(found[key]) if key in found else None for key in keys]
+
+    def set(self, key, value, ttl_seconds):
+        self.set_many([(key, value)], ttl_seconds)
+
+    def set_many(self, items, ttl_seconds):
+        expires_at = time.time() + ttl_seconds
+        conn = self._connection()
+        # One transaction for the whole batch instead of one per row
+        conn.execute("BEGIN")
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO results (key, value, expires_at) VALUES (?, ?, ?)",
+                [(key, json.dumps(value), expires_at) for key, value in items]
+            )
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        with self._lock:
+            before = self._writes
+            self._writes += len(items)
+            should_prune = self._writes // self.prune_every > before // self.prune_every
+        if should_prune:
+            self.prune()
+
+    def prune(self):
+        conn = self._connection()
+        conn.execute("DELETE FROM results WHERE expires_at <= ?", (time.time(),))
+        conn.execute(
+            "DELETE FROM results WHERE key IN ("
+            "SELECT key FROM results ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+
+
+class RedisCacheBackend:
+    """Shared cache in Redis; entries expire server-side via SETEX"""
+
+    name = "redis"
+
+    def __init__(self, client=None, url=None, prefix="moodify:result:"):
+        if client is None:
+            if not REDIS_AVAILABLE:
+                raise ImportError("redis not available. Install with: pip install redis")
+            client = redis.Redis.from_url(url or "redis://localhost:6379/0", socket_timeout=0.5,
+                                          socket_connect_timeout=0.5)
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def get_many(self, keys):
+        if not keys:
+            return []
+        return [json.loads(raw) if raw is not None else None
+                for raw in self.client.mget([self.prefix + key for key in keys])]
+
+    def set(self, key, value, ttl_seconds):
+        self.client.setex(self.prefix + key, max(1, int(ttl_seconds)), json.dumps(value))
+
+    def set_many(self, items, ttl_seconds):
+        pipeline = self.client.pipeline(transaction=False)
+        for key, value in items:
+            pipeline.setex(self.prefix + key, max(1, int(ttl_seconds)), json.dumps(value))
+        pipeline.execute()
+
+
+class TieredCache:
+    """
+    In-process ResultCache (first tier) in front of a shared backend (second tier).
+    Second-tier hits are copied into the first tier. Backend errors are counted
+    and treated as misses so a cache outage never fails a request. After an
+    error the shared tier is skipped for error_backoff seconds, so an
+    unreachable backend doesn't add its timeout to every lookup.
+    """
+
+    def __init__(self, local, shared, error_backoff=30.0):
+        self.local = local
+        self.shared = shared
+        self.ttl_seconds = local.ttl_seconds
+        self.error_backoff = float(error_backoff)
+        self._lock = threading.Lock()
+        self._retry_at = 0.0
+        self.shared_hits = 0
+        self.shared_misses = 0
+        self.shared_errors = 0
+        self.shared_skipped = 0
+
+    def get(self, key):
+        return self.get_many([key])[0]
+
+    def get_many(self, keys):
+        values = self.local.get_many(keys)
+        missing = [i for i, value in enumerate(values) if value is None]
+        if not missing or not self._shared_available():
+            return values
+
+        try:
+            shared_values = self.shared.get_many([keys[i] for i in missing])
+        except Exception as e:
+            self._shared_failed("read", e)
+            return values
+
+        found = []
+        for i, value in zip(missing, shared_values):
+            if value is not None:
+                values[i] = value
+                found.append((keys[i], value))
+        with self._lock:
+            self.shared_hits += len(found)
+            self.shared_misses += len(missing) - len(found)
+        self.local.set_many(found)
+        return values
+
+    def set(self, key, value, ttl_seconds=None):
+        self.set_many([(key, value)], ttl_seconds)
+
+    def set_many(self, items, ttl_seconds=None):
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self.local.set_many(items, ttl)
+        if not items or not self._shared_available():
+            return
+        try:
+            self.shared.set_many(items, ttl)
+        except Exception as e:
+            self._shared_failed("write", e)
+
+    def _shared_available(self):
+        with self._lock:
+            if time.monotonic() >= self._retry_at:
+                return True
+            self.shared_skipped += 1
+            return False
+
+    def _shared_failed(self, operation, error):
+        with self._lock:
+            self.shared_errors += 1
+            self._retry_at = time.monotonic() + self.error_backoff
+        print(f"⚠️  Shared cache {operation} failed, skipping it for {self.error_backoff:g}s: {error}")
+
+    def clear(self):
+        self.local.clear()
+
+    def stats(self):
+        stats = self.local.stats()
+        with self._lock:
+            lookups = self.shared_hits + self.shared_misses
+            stats["shared"] = {
+                "backend": self.shared.name,
+                "hits": self.shared_hits,
+                "misses": self.shared_misses,
+                "hit_rate": round(self.shared_hits / lookups, 4) if lookups else 0.0,
+                "errors": self.shared_errors,
+                "skipped": self.shared_skipped,
+                "backing_off": time.monotonic() < self._retry_at,
+            }
+        return stats
+
+
+def create_shared_backend(kind, sqlite_path=None, redis_url=None, max_entries=100000):
+    """Build the second-tier backend named kind: "sqlite", "redis", or "none" (returns None)"""
+    kind = (kind or "none").lower()
+    if kind == "none":
+        return None
+    if kind == "sqlite":
+        return SQLiteCacheBackend(sqlite_path, max_entries=max_entries)
+    if kind == "redis":
+        return RedisCacheBackend(url=redis_url)
+    raise ValueError(f"Unknown shared cache backend '{kind}'. Choose one of: none, sqlite, redis")
+
+
+def cached_call(cache, model, version, fn, text, bypass=False, exact=False):
+    """Return fn(text), served from cache when possible (see make_key for exact)"""
+    if cache is None or bypass:
+        return fn(text)
+
+    key = make_key(model, version, text, exact)
+    result = cache.get(key)
+    if result is None:
+        result = fn(text)
+        cache.set(key, result)
+    return result
+
+
+def cached_batch(cache, model, version, batch_fn, texts, bypass=False):
+    """Return batch_fn(texts), only running batch_fn on the texts that miss the cache"""
+    if cache is None or bypass:
+        return batch_fn(texts)
+
+    keys = [make_key(model, version, text) for text in texts]
+    results = cache.get_many(keys)
+    missing = [i for i, result in enumerate(results) if result is None]
+    if missing:
+        computed = batch_fn([texts[i] for i in missing])
+        for i, result in zip(missing, computed):
+            results[i] = result
+        cache.set_many([(keys[i], results[i]) for i in missing])
+    return results
@@ -0,0 +1,192 @@
+"""
+Columnar (Apache Arrow) results for batch scoring.
+
+Instead of one JSON object per text, results are laid out as one column per
+value: an id column, the dominant label and its confidence, and a float
+column per score (every GoEmotions label for BERT, compound/positive/
+negative/neutral for VADER, polarity/subjectivity and the positive/negative/
+neutral split for TextBlob). Scores go from the models straight into arrays;
+no per-text result dicts are built.
+
+Results can be written as an Arrow IPC stream or file, or as Parquet, either
+in one go (to_bytes) or a batch at a time (ColumnarWriter).
+"""
+
+import os
+
+try:
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+from model import SENTIMENT_POLARITY_THRESHOLD, dedupe_texts, get_polarity_engine
+
+FORMATS = ("arrow", "parquet")
+MIMETYPES = {"arrow": "application/vnd.apache.arrow.stream", "parquet": "application/vnd.apache.parquet"}
+
+PARQUET_COMPRESSION = os.getenv("PARQUET_COMPRESSION", "zstd")
+# Parquet row groups are buffered up to this many rows; small row groups make files slow to read
+PARQUET_ROW_GROUP_ROWS = int(os.getenv("PARQUET_ROW_GROUP_ROWS", "65536"))
+
+
+def sentiment_columns(texts):
+    """TextBlob columns: sentiment, confidence, polarity, subjectivity and the positive/negative/neutral split"""
+    unique_texts, index_map = dedupe_texts(texts)
+    values = np.array(get_polarity_engine().sentiment_batch(unique_texts), dtype=np.float64).reshape(-1, 2)
+    values = values[np.asarray(index_map, dtype=np.intp)]
+    polarity, subjectivity = values[:, 0], values[:, 1]
+
+    positive = np.maximum(polarity, 0)
+    negative = np.maximum(-polarity, 0)
+    neutral = 1 - np.abs(polarity)
+    total = positive + negative + neutral
+    total[total == 0] = 1
+    sentiment = np.where(polarity > SENTIMENT_POLARITY_THRESHOLD, "positive",
+                         np.where(polarity < -SENTIMENT_POLARITY_THRESHOLD, "negative", "neutral"))
+    return {
+        "sentiment": sentiment.astype(object),
+        "confidence": np.minimum(np.abs(polarity) * 2, 1.0),
+        "polarity": polarity,
+        "subjectivity": subjectivity,
+        "positive": positive / total,
+        "negative": negative / total,
+        "neutral": neutral / total,
+    }
+
+
+def vader_columns(analyzer, texts):
+    """VADER columns: dominant_emotion, confidence and the compound/positive/negative/neutral scores"""
+    unique_texts, index_map = dedupe_texts(texts)
+    dominant = np.empty(len(unique_texts), dtype=object)
+    scores = np.zeros((len(unique_texts), 5), dtype=np.float64)
+    for i, vader in enumerate(analyzer.polarity_scores_batch(unique_texts)):
+        row = (vader["compound"], vader["pos"], vader["neg"], vader["neu"])
+        _, dominant[i], confidence = analyzer.map_emotions(*row)
+        scores[i] = (confidence, *row)
+
+    index = np.asarray(index_map, dtype=np.intp)
+    dominant, scores = dominant[index], scores[index]
+    return {
+        "dominant_emotion": dominant,
+        "confidence": scores[:, 0],
+        "compound": scores[:, 1],
+        "positive": scores[:, 2],
+        "negative": scores[:, 3],
+        "neutral": scores[:, 4],
+    }
+
+
+def emotion_columns(analyzer, texts, batch_size=32):
+    """BERT columns: dominant_emotion, confidence and one probability column per GoEmotions label"""
+    probs = analyzer.predict_probs(texts, batch_size=batch_size)
+    labels = np.array(analyzer.label_names, dtype=object)
+    dominant = probs.argmax(axis=1)
+    columns = {
+        "dominant_emotion": labels[dominant],
+        "confidence": probs[np.arange(len(probs)), dominant],
+    }
+    columns.update((label, probs[:, i]) for i, label in enumerate(analyzer.label_names))
+    return columns
+
+
+def score_columns(model, analyzer, texts):
+    """Columns for model ("textblob", "lightweight" or "heavy"); analyzer is unused for textblob"""
+    if model == "textblob":
+        return sentiment_columns(texts)
+    if model == "lightweight":
+        return vader_columns(analyzer, texts)
+    return emotion_columns(analyzer, texts)
+
+
+def _spread(values, positions, size):
+    """values for the rows at positions, null everywhere else"""
+    # Label columns are object arrays; without a type an all-null one would not be a string column
+    value_type = pa.string() if values.dtype == object else None
+    if len(positions) == size:
+        return pa.array(values, type=value_type)
+    full = np.full(size, None if values.dtype == object else 0, dtype=values.dtype)
+    mask = np.ones(size, dtype=bool)
+    full[positions] = values
+    mask[positions] = False
+    return pa.array(full, mask=mask, type=value_type)
+
+
+def score_batch(model, analyzer, texts, ids, errors=None, rows=None):
+    """
+    A pyarrow RecordBatch with the scores of texts. ids become a string
+    column so the schema doesn't depend on the data. Texts with an entry in
+    errors are not scored; their score columns are null and the message is in
+    an error column. rows adds a leading row-number column.
+    """
+    positions = np.array([i for i in range(len(texts)) if not errors or errors[i] is None], dtype=np.intp)
+    columns = score_columns(model, analyzer, [texts[i] for i in positions])
+
+    names, arrays = [], []
+    if rows is not None:
+        names.append("row")
+        arrays.append(pa.array(rows, type=pa.int64()))
+    names.append("id")
+    arrays.append(pa.array([None if item_id is None else str(item_id) for item_id in ids], type=pa.string()))
+    if errors is not None:
+        names.append("error")
+        arrays.append(pa.array(errors, type=pa.string()))
+    for name, values in columns.items():
+        names.append(name)
+        arrays.append(_spread(values, positions, len(texts)))
+    return pa.RecordBatch.from_arrays(arrays, names=names)
+
+
+def to_bytes(batch, output_format):
+    """Serialize one RecordBatch as an Arrow IPC stream or a Parquet file"""
+    sink = pa.BufferOutputStream()
+    if output_format == "arrow":
+        with pa.ipc.new_stream(sink, batch.schema) as writer:
+            writer.write_batch(batch)
+    else:
+        pq.write_table(pa.Table.from_batches([batch]), sink, compression=PARQUET_COMPRESSION)
+    return sink.getvalue().to_pybytes()
+
+
+class ColumnarWriter:
+    """
+    Writes RecordBatches to an Arrow IPC file or a Parquet file as they come.
+    The file is opened with the schema of the first batch.
+    """
+
+    def __init__(self, path, output_format):
+        if output_format not in FORMATS:
+            raise ValueError(f"output format must be one of {', '.join(FORMATS)}")
+        self.path = path
+        self.output_format = output_format
+        self._writer = None
+        self._pending = []
+        self._pending_rows = 0
+
+    def write(self, batch):
+        if self._writer is None:
+            if self.output_format == "arrow":
+                self._writer = pa.ipc.new_file(self.path, batch.schema)
+            else:
+                self._writer = pq.ParquetWriter(self.path, batch.schema, compression=PARQUET_COMPRESSION)
+        if self.output_format == "arrow":
+            self._writer.write_batch(batch)
+            return
+        self._pending.append(batch)
+        self._pending_rows += batch.num_rows
+        if self._pending_rows >= PARQUET_ROW_GROUP_ROWS:
+            self._flush()
+
+    def _flush(self):
+        if self._pending:
+            self._writer.write_table(pa.Table.from_batches(self._pending), row_group_size=PARQUET_ROW_GROUP_ROWS)
+            self._pending, self._pending_rows = [], 0
+
+    def close(self):
+        if self._writer is not None:
+            if self.output_format == "parquet":
+                self._flush()
+            self._writer.close()
+            self._writer = None
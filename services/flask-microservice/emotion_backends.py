@@ -0,0 +1,237 @@
+"""
+Inference backends for EmotionAnalyzer.
+
+Every backend is a callable that takes the tokenizer output (PyTorch tensors)
+and returns a logits tensor of shape (batch, num_labels), so EmotionAnalyzer
+can post-process the results the same way regardless of how they were computed.
+
+- "pytorch":     eager AutoModelForSequenceClassification (default)
+- "onnx":        model exported once to ONNX and served by ONNX Runtime (CPU)
+- "torchscript": model traced once with torch.jit and loaded from disk
+
+Compiled artifacts are cached in MODEL_CACHE_DIR so the export cost is only
+paid by the first process that needs them.
+
+Every backend can also run in dynamic int8 mode (EMOTION_QUANTIZE=int8): the
+Linear layers' weights are stored as int8 and activations are quantized on the
+fly, which cuts the weight footprint roughly 4x on CPU.
+"""
+
+import os
+import tempfile
+
+import torch
+from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+try:
+    import onnxruntime as ort
+    ONNX_AVAILABLE = True
+except ImportError:
+    ort = None
+    ONNX_AVAILABLE = False
+
+BACKENDS = ("pytorch", "onnx", "torchscript")
+PRECISIONS = ("fp32", "int8")
+
+# Bump when the export procedure changes so stale artifacts are not reused
+EXPORT_VERSION = 1
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".model_cache")
+
+
+def get_cache_dir():
+    cache_dir = os.getenv("MODEL_CACHE_DIR", DEFAULT_CACHE_DIR)
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+
+def artifact_path(model_name, backend, suffix, precision="fp32"):
+    safe_name = model_name.replace("/", "__")
+    return os.path.join(get_cache_dir(), f"{safe_name}.{backend}.{precision}.v{EXPORT_VERSION}{suffix}")
+
+
+def quantize_linear_layers(model):
+    """Dynamic int8 quantization of every nn.Linear (weights int8, activations quantized at runtime)"""
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def state_dict_bytes(model):
+    """Bytes held by a module's parameters and buffers, including packed int8 Linear weights"""
+    def tensor_bytes(value):
+        if isinstance(value, torch.Tensor):
+            return value.element_size() * value.nelement()
+        if isinstance(value, (tuple, list)):
+            return sum(tensor_bytes(item) for item in value)
+        return 0
+
+    return sum(tensor_bytes(value) for value in model.state_dict().values())
+
+
+class _LogitsOnly(torch.nn.Module):
+    """Wrap a sequence classifier so tracing/export sees positional inputs and a single logits output"""
+
+    def __init__(self, model, input_names):
+        super().__init__()
+        self.model = model
+        self.input_names = input_names
+
+    def forward(self, *inputs):
+        return self.model(**dict(zip(self.input_names, inputs)))[0]
+
+
+def _example_inputs(model_name):
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    inputs = tokenizer(["warm up the exporter", "a second, slightly longer example sentence"],
+                       return_tensors="pt", padding=True)
+    input_names = [name for name in tokenizer.model_input_names if name in inputs]
+    return input_names, tuple(inputs[name] for name in input_names)
+
+
+def _load_for_export(model_name, precision="fp32"):
+    model = AutoModelForSequenceClassification.from_pretrained(model_name, torchscript=True)
+    model.eval()
+    if precision == "int8":
+        model = quantize_linear_layers(model)
+    return model
+
+
+def _atomic_save(path, save_fn):
+    """Write to a temporary file first so concurrent workers never load a half-written artifact"""
+    directory = os.path.dirname(path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    os.close(fd)
+    try:
+        save_fn(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+class PyTorchBackend:
+    name = "pytorch"
+
+    def __init__(self, model_name, precision="fp32"):
+        self.precision = precision
+        self.model = AutoModelForSequenceClassification.from_pretrained(model_name)
+        self.model.eval()
+        if precision == "int8":
+            self.model = quantize_linear_layers(self.model)
+
+    def footprint_bytes(self):
+        return state_dict_bytes(self.model)
+
+    def __call__(self, inputs):
+        with torch.no_grad():
+            return self.model(**inputs).logits
+
+
+class OnnxBackend:
+    name = "onnx"
+
+    def __init__(self, model_name, precision="fp32"):
+        if not ONNX_AVAILABLE:
+            raise ImportError("onnxruntime not available. Install with: pip install onnxruntime")
+
+        self.precision = precision
+        fp32_path = artifact_path(model_name, self.name, ".onnx")
+        if not os.path.exists(fp32_path):
+            self.export(model_name, fp32_path)
+
+        self.path = fp32_path
+        if precision == "int8":
+            self.path = artifact_path(model_name, self.name, ".onnx", precision="int8")
+            if not os.path.exists(self.path):
+                self.quantize(fp32_path, self.path)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        threads = int(os.getenv("ONNX_INTRA_OP_THREADS", "0"))
+        if threads > 0:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(self.path, options, providers=["CPUExecutionProvider"])
+        self.input_names = [graph_input.name for graph_input in self.session.get_inputs()]
+
+    @staticmethod
+    def export(model_name, path):
+        print(f"📦 Exporting {model_name} to ONNX at {path} (one-time)")
+        model = _load_for_export(model_name)
+        input_names, example = _example_inputs(model_name)
+        wrapper = _LogitsOnly(model, input_names)
+        dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+        dynamic_axes["logits"] = {0: "batch"}
+
+        def save(tmp_path):
+            with torch.no_grad():
+                torch.onnx.export(
+                    wrapper, example, tmp_path,
+                    input_names=input_names,
+                    output_names=["logits"],
+                    dynamic_axes=dynamic_axes,
+                    opset_version=14,
+                )
+
+        _atomic_save(path, save)
+
+    @staticmethod
+    def quantize(fp32_path, path):
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        print(f"📦 Quantizing {fp32_path} to int8 at {path} (one-time)")
+        _atomic_save(path, lambda tmp_path: quantize_dynamic(fp32_path, tmp_path, weight_type=QuantType.QInt8))
+
+    def footprint_bytes(self):
+        return os.path.getsize(self.path)
+
+    def __call__(self, inputs):
+        feed = {name: inputs[name].cpu().numpy() for name in self.input_names}
+        logits = self.session.run(["logits"], feed)[0]
+        return torch.from_numpy(logits)
+
+
+class TorchScriptBackend:
+    name = "torchscript"
+
+    def __init__(self, model_name, precision="fp32"):
+        self.precision = precision
+        self.path = artifact_path(model_name, self.name, ".pt", precision=precision)
+        if not os.path.exists(self.path):
+            self.export(model_name, self.path, precision)
+
+        extra_files = {"input_names": ""}
+        self.module = torch.jit.load(self.path, map_location="cpu", _extra_files=extra_files)
+        self.module.eval()
+        self.input_names = extra_files["input_names"].decode().split(",")
+
+    @staticmethod
+    def export(model_name, path, precision="fp32"):
+        print(f"📦 Tracing {model_name} ({precision}) with TorchScript at {path} (one-time)")
+        model = _load_for_export(model_name, precision)
+        input_names, example = _example_inputs(model_name)
+        with torch.no_grad():
+            traced = torch.jit.trace(_LogitsOnly(model, input_names), example, strict=False)
+        extra_files = {"input_names": ",".join(input_names)}
+        _atomic_save(path, lambda tmp_path: torch.jit.save(traced, tmp_path, _extra_files=extra_files))
+
+    def footprint_bytes(self):
+        return os.path.getsize(self.path)
+
+    def __call__(self, inputs):
+        with torch.no_grad():
+            return self.module(*(inputs[name] for name in self.input_names))
+
+
+def load_backend(name, model_name, precision="fp32"):
+    """Build the inference backend called name ("pytorch", "onnx" or "torchscript")"""
+    name = (name or "pytorch").lower()
+    precision = (precision or "fp32").lower()
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision '{precision}'. Choose one of: {', '.join(PRECISIONS)}")
+
+    if name == "pytorch":
+        return PyTorchBackend(model_name, precision)
+    if name == "onnx":
+        return OnnxBackend(model_name, precision)
+    if name == "torchscript":
+        return TorchScriptBackend(model_name, precision)
+    raise ValueError(f"Unknown emotion backend '{name}'. Choose one of: {', '.join(BACKENDS)}")
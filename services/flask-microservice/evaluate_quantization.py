@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Compare the int8 quantized emotion model against fp32 on the bundled evaluation set
+
+Reports, for each precision: weight footprint, process RSS growth while loading,
+accuracy against the labels in data/emotion_eval.jsonl and mean latency. Then
+reports the int8 vs fp32 deltas (accuracy, dominant-emotion agreement and the
+mean absolute difference of the per-emotion probabilities).
+
+Usage:
+    python evaluate_quantization.py
+    python evaluate_quantization.py --backend onnx --eval-set data/emotion_eval.jsonl
+"""
+
+import argparse
+import json
+import resource
+import sys
+import os
+import time
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from model import EmotionAnalyzer, HEAVY_MODELS_AVAILABLE
+
+DEFAULT_EVAL_SET = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "emotion_eval.jsonl")
+
+
+def load_eval_set(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def current_rss_mb():
+    """Current resident set size of this process (Linux), falling back to peak RSS"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def evaluate(backend, precision, examples):
+    rss_before = current_rss_mb()
+    analyzer = EmotionAnalyzer(backend=backend, quantize=precision)
+    rss_after = current_rss_mb()
+
+    texts = [example["text"] for example in examples]
+    start = time.perf_counter()
+    results = [analyzer.analyze_emotion(text) for text in texts]
+    latency_ms = (time.perf_counter() - start) * 1000 / len(texts)
+
+    correct = sum(result["dominant_emotion"] == example["label"] for result, example in zip(results, examples))
+    return {
+        "precision": precision,
+        "weights_mb": analyzer.describe()["weights_mb"],
+        "rss_growth_mb": round(rss_after - rss_before, 1),
+        "accuracy": correct / len(examples),
+        "latency_ms": latency_ms,
+        "results": results,
+    }
+
+
+def mean_probability_delta(baseline, candidate):
+    deltas = []
+    for base, cand in zip(baseline, candidate):
+        labels = set(base["emotions"]) | set(cand["emotions"])
+        deltas.extend(abs(base["emotions"].get(label, 0.0) - cand["emotions"].get(label, 0.0)) for label in labels)
+    return sum(deltas) / len(deltas) if deltas else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", default=os.getenv("EMOTION_BACKEND", "pytorch"),
+                        choices=["pytorch", "onnx", "torchscript"])
+    parser.add_argument("--eval-set", default=DEFAULT_EVAL_SET)
+    args = parser.parse_args()
+
+    if not HEAVY_MODELS_AVAILABLE:
+        print("❌ torch/transformers not installed")
+        sys.exit(1)
+
+    examples = load_eval_set(args.eval_set)
+    print(f"📊 Evaluating {args.backend} backend on {len(examples)} labelled examples")
+    print("-" * 60)
+
+    # Load fp32 first so RSS growth for int8 is measured on top of a warm process
+    fp32 = evaluate(args.backend, "fp32", examples)
+    int8 = evaluate(args.backend, "int8", examples)
+
+    print(f"{'precision':<10} {'weights MB':>11} {'RSS +MB':>9} {'accuracy':>9} {'latency':>10}")
+    for report in (fp32, int8):
+        print(f"{report['precision']:<10} {report['weights_mb']:>11.1f} {report['rss_growth_mb']:>9.1f} "
+              f"{report['accuracy']:>9.1%} {report['latency_ms']:>8.1f}ms")
+
+    agreement = sum(
+        a["dominant_emotion"] == b["dominant_emotion"] for a, b in zip(fp32["results"], int8["results"])
+    ) / len(examples)
+
+    print("-" * 60)
+    print(f"Accuracy delta (int8 - fp32):   {int8['accuracy'] - fp32['accuracy']:+.1%}")
+    print(f"Dominant emotion agreement:     {agreement:.1%}")
+    print(f"Mean |probability delta|:       {mean_probability_delta(fp32['results'], int8['results']):.4f}")
+    print(f"Weight footprint reduction:     {1 - int8['weights_mb'] / fp32['weights_mb']:.1%}")
+
+
+if __name__ == "__main__":
+    main()
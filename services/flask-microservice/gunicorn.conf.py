@@ -0,0 +1,92 @@
+"""
+Gunicorn configuration for the sentiment microservice
+
+Workers use the gthread worker class. Each worker gets ANALYSIS_THREADS
+threads for the CPU-bound analysis endpoints plus MOODIFY_MAX_CONCURRENCY
+threads for /moodify. Moodify requests are capped at MOODIFY_MAX_CONCURRENCY
+per worker (extra ones get a 503), so slow OpenRouter calls can never take
+the threads that /predict, /analyze and /analyze-light need.
+
+With PRELOAD_MODELS=true the app is imported once in the master, which loads
+the models before forking; workers then share the model weights copy-on-write
+instead of each holding their own copy. The cores are divided between the
+workers' torch thread pools so they don't oversubscribe the CPU.
+
+With INFERENCE_SOCKET set, BERT runs in a single inference sidecar process
+instead (inference_sidecar.py), which the master starts and stops unless
+INFERENCE_SIDECAR_AUTOSTART=false (e.g. when it runs in its own container).
+
+Usage:
+    gunicorn -c gunicorn.conf.py app:app
+    PRELOAD_MODELS=true WEB_CONCURRENCY=4 gunicorn -c gunicorn.conf.py app:app
+"""
+
+import gc
+import os
+import subprocess
+import sys
+
+bind = os.getenv("BIND", "0.0.0.0:5000")
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+
+worker_class = "gthread"
+analysis_threads = int(os.getenv("ANALYSIS_THREADS", "4"))
+moodify_threads = int(os.getenv("MOODIFY_MAX_CONCURRENCY", "8"))
+threads = analysis_threads + moodify_threads
+
+# LLM calls are bounded by MOODIFY_TIMEOUT; leave headroom above it
+timeout = int(float(os.getenv("MOODIFY_TIMEOUT", "60"))) + 30
+keepalive = 5
+
+# Load the models once in the master (see app.after_fork)
+preload_app = os.getenv("PRELOAD_MODELS", "false").lower() == "true"
+
+
+def available_cores():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+# The inference sidecar is the only process running BERT, so it keeps the environment's thread settings
+sidecar_env = dict(os.environ)
+
+# Exported before the app (and torch) is imported: in the master with preload_app, in each worker otherwise
+torch_threads = int(os.getenv("TORCH_NUM_THREADS") or max(1, available_cores() // workers))
+for name in ("TORCH_NUM_THREADS", "OMP_NUM_THREADS", "MKL_NUM_THREADS", "ONNX_INTRA_OP_THREADS"):
+    os.environ.setdefault(name, str(torch_threads))
+
+
+inference_socket = os.getenv("INFERENCE_SOCKET", "")
+sidecar_autostart = os.getenv("INFERENCE_SIDECAR_AUTOSTART", "true").lower() == "true"
+sidecar = None
+
+
+def on_starting(server):
+    global sidecar
+    if inference_socket and sidecar_autostart:
+        here = os.path.dirname(os.path.abspath(__file__))
+        sidecar = subprocess.Popen([sys.executable, os.path.join(here, "inference_sidecar.py"),
+                                    "--socket", inference_socket], env=sidecar_env)
+        server.log.info("Started inference sidecar (pid %s) on %s", sidecar.pid, inference_socket)
+
+
+def on_exit(server):
+    if sidecar is not None:
+        sidecar.terminate()
+        sidecar.wait(timeout=30)
+
+
+def when_ready(server):
+    if preload_app:
+        # Move everything the master loaded out of the collector's reach. Collections in a
+        # worker would otherwise write to those objects' headers and un-share their pages.
+        gc.collect()
+        gc.freeze()
+
+
+def post_fork(server, worker):
+    if preload_app:
+        import app
+        app.after_fork()
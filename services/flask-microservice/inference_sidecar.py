@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Dedicated BERT inference process for the web workers.
+
+One sidecar process owns the EmotionAnalyzer and torch's thread pool; web
+workers talk to it over a Unix socket through InferenceClient, which stands in
+for EmotionAnalyzer in app.py. Web workers then never load the weights or run
+torch threads. Single-text requests from every worker meet in one
+MicroBatcher here, so concurrent /analyze calls share forward passes.
+
+Messages are length-prefixed JSON: a 4-byte big-endian length, then
+{"method", "args", "kwargs"} in, {"result"} or {"error"} out. Texts are sent
+as they are. Tokenizing only makes sense once a batch is known (it is padded
+to its longest text), and it is cheap next to the forward pass.
+
+Usage:
+    python inference_sidecar.py --socket /tmp/moodify-inference.sock
+    INFERENCE_SOCKET=/tmp/moodify-inference.sock gunicorn -c gunicorn.conf.py app:app
+"""
+
+import argparse
+import json
+import os
+import signal
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import time
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from batching import MicroBatcher
+
+INFERENCE_SOCKET = os.getenv("INFERENCE_SOCKET", "")
+# Seconds a web worker waits for one inference call
+INFERENCE_TIMEOUT = float(os.getenv("INFERENCE_TIMEOUT", "30"))
+# torch threads of the sidecar (default: every core, it is the only process running BERT)
+INFERENCE_THREADS = int(os.getenv("INFERENCE_THREADS", "0"))
+INFERENCE_BATCH_MAX_SIZE = int(os.getenv("INFERENCE_BATCH_MAX_SIZE", "32"))
+INFERENCE_BATCH_WINDOW_MS = float(os.getenv("INFERENCE_BATCH_WINDOW_MS", "5"))
+
+HEADER = struct.Struct(">I")
+MAX_MESSAGE_BYTES = 64 * 1024 * 1024
+
+
+class InferenceError(RuntimeError):
+    """The sidecar is unreachable or failed to run a call"""
+
+
+def _recv_exactly(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1024 * 1024))
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def read_message(sock):
+    """The next message on sock, or None once the peer has closed it"""
+    header = _recv_exactly(sock, HEADER.size)
+    if header is None:
+        return None
+    (size,) = HEADER.unpack(header)
+    if size > MAX_MESSAGE_BYTES:
+        raise ValueError(f"Message of {size} bytes is over the {MAX_MESSAGE_BYTES} byte limit")
+    body = _recv_exactly(sock, size)
+    if body is None:
+        return None
+    return json.loads(body)
+
+
+def write_message(sock, message):
+    body = json.dumps(message, ensure_ascii=False).encode("utf-8")
+    sock.sendall(HEADER.pack(len(body)) + body)
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    """Serves one web worker connection until it closes"""
+
+    def handle(self):
+        while True:
+            try:
+                message = read_message(self.request)
+            except (OSError, ValueError):
+                return
+            if message is None:
+                return
+            try:
+                write_message(self.request, self.server.dispatch(message))
+            except OSError:
+                return
+
+
+class InferenceServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Runs analyzer's methods for clients on a Unix socket, batching single-text calls"""
+
+    daemon_threads = True
+    # Every thread of every web worker holds a connection; Unix socket connects fail with EAGAIN, instead
+    # of waiting, once the backlog is full, e.g. when all workers (re)connect at the same time
+    request_queue_size = 1024
+    METHODS = ("analyze_emotion", "analyze_emotion_batch", "analyze_long_text", "is_long", "count_tokens",
+               "predict_probs", "describe", "info", "stats")
+
+    def __init__(self, path, analyzer, max_batch_size=INFERENCE_BATCH_MAX_SIZE,
+                 max_wait_ms=INFERENCE_BATCH_WINDOW_MS):
+        _remove_stale_socket(path)
+        self.analyzer = analyzer
+        self.batcher = MicroBatcher(analyzer.analyze_emotion_batch, max_batch_size=max_batch_size,
+                                    max_wait_ms=max_wait_ms)
+        super().__init__(path, _Handler)
+
+    def dispatch(self, message):
+        method = message.get("method")
+        if method not in self.METHODS:
+            return {"error": f"Unknown method: {method}"}
+        args, kwargs = message.get("args") or [], message.get("kwargs") or {}
+        # Methods with a handler here get special treatment; the rest go straight to the analyzer
+        handler = getattr(self, f"_{method}", None) or getattr(self.analyzer, method)
+        try:
+            return {"result": handler(*args, **kwargs)}
+        except Exception as e:
+            return {"error": f"{type(e).__name__}: {e}"}
+
+    def _analyze_emotion(self, text):
+        return self.batcher.submit(text)
+
+    def _predict_probs(self, texts, **kwargs):
+        return self.analyzer.predict_probs(texts, **kwargs).tolist()
+
+    def _info(self):
+        return {
+            "model_version": self.analyzer.model_version,
+            "label_names": list(self.analyzer.label_names),
+            "max_tokens": self.analyzer.max_tokens,
+            "pid": os.getpid(),
+        }
+
+    def _stats(self):
+        return {"pid": os.getpid(), "micro_batching": self.batcher.stats()}
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.unlink(self.server_address)
+        except OSError:
+            pass
+
+
+def _remove_stale_socket(path):
+    """Remove a socket file left behind by a dead server; refuse to take over a live one"""
+    if not os.path.exists(path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except OSError:
+        os.unlink(path)
+        return
+    finally:
+        probe.close()
+    raise RuntimeError(f"An inference server is already listening on {path}")
+
+
+class InferenceClient:
+    """
+    Drop-in for EmotionAnalyzer that forwards every call to the sidecar.
+    Each thread keeps its own connection, opened again after a fork.
+    """
+
+    def __init__(self, path=INFERENCE_SOCKET, timeout=INFERENCE_TIMEOUT):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        self.model_version = None
+        self.label_names = []
+        self.max_tokens = 512
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            conn.settimeout(self.timeout)
+            try:
+                conn.connect(self.path)
+            except OSError:
+                conn.close()
+                raise
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _drop_connection(self):
+        conn = getattr(self._local, "conn", None)
+        self._local.conn = None
+        if conn is not None:
+            conn.close()
+
+    def call(self, method, *args, **kwargs):
+        # Every method is read-only, so a call that hit a dead connection is safe to send again
+        for attempt in range(2):
+            try:
+                conn = self._connection()
+                write_message(conn, {"method": method, "args": args, "kwargs": kwargs})
+                response = read_message(conn)
+                if response is None:
+                    raise ConnectionResetError("Inference sidecar closed the connection")
+                break
+            except socket.timeout:
+                self._drop_connection()
+                raise InferenceError(f"Inference sidecar did not answer within {self.timeout}s")
+            except OSError as e:
+                self._drop_connection()
+                if attempt:
+                    raise InferenceError(f"Inference sidecar unavailable at {self.path}: {e}")
+        if "error" in response:
+            raise InferenceError(response["error"])
+        return response["result"]
+
+    def wait_ready(self, timeout=120.0):
+        """Block until the sidecar answers (it may still be loading the model), then fetch its model info"""
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                info = self.call("info")
+                break
+            except InferenceError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.5)
+        self.model_version = info["model_version"]
+        self.label_names = info["label_names"]
+        self.max_tokens = info["max_tokens"]
+        return info
+
+    def analyze_emotion(self, text):
+        return self.call("analyze_emotion", text)
+
+    def analyze_emotion_batch(self, texts, batch_size=32):
+        return self.call("analyze_emotion_batch", list(texts), batch_size=batch_size)
+
+    def analyze_long_text(self, text, aggregation=None, include_segments=False, batch_size=32):
+        return self.call("analyze_long_text", text, aggregation=aggregation, include_segments=include_segments,
+                         batch_size=batch_size)
+
+    def is_long(self, text):
+        # As in EmotionAnalyzer.is_long: a word piece covers at least one character, so only
+        # strings longer than the token budget are worth a round trip
+        return len(text) > self.max_tokens - 2 and self.call("is_long", text)
+
+    def count_tokens(self, texts):
+        return self.call("count_tokens", list(texts))
+
+    def predict_probs(self, texts, batch_size=32):
+        import numpy as np
+        probs = self.call("predict_probs", list(texts), batch_size=batch_size)
+        return np.asarray(probs, dtype=np.float32).reshape(len(texts), len(self.label_names))
+
+    def describe(self):
+        return {**self.call("describe"), "inference_sidecar": self.path}
+
+    def stats(self):
+        return self.call("stats")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--socket", default=INFERENCE_SOCKET or "/tmp/moodify-inference.sock")
+    parser.add_argument("--threads", type=int, default=INFERENCE_THREADS,
+                        help="torch threads (default: all available cores)")
+    args = parser.parse_args()
+
+    from model import EmotionAnalyzer, HEAVY_MODELS_AVAILABLE, set_torch_threads
+    if not HEAVY_MODELS_AVAILABLE:
+        print("❌ torch/transformers not installed")
+        sys.exit(1)
+
+    threads = args.threads or len(os.sched_getaffinity(0))
+    set_torch_threads(threads)
+    analyzer = EmotionAnalyzer()
+    analyzer.analyze_emotion_batch(["I am so excited about this new opportunity!", "The meeting is at 3pm."])
+
+    server = InferenceServer(args.socket, analyzer)
+    # serve_forever runs on this thread, so shut it down from another one
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown).start())
+    print(f"✅ Inference sidecar serving {analyzer.describe()} on {args.socket} with {threads} threads")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+"""
+Persistent moodify job queue.
+
+Clients submit one or many (text, target_sentiment) tasks and get a job ID back
+immediately; a small pool of worker threads in each gunicorn worker drains the
+queue through run_moodify with bounded concurrency.
+
+Jobs and tasks live in a local SQLite file (WAL mode) shared by every worker
+process on the host. A task is claimed with a lease; if the process holding it
+dies, the lease expires and another worker picks the task up again, so queued
+and in-flight jobs survive restarts.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class JobStore:
+    """SQLite-backed storage for jobs and their tasks"""
+
+    def __init__(self, path, lease_seconds=120, max_attempts=3):
+        self.path = path
+        self.lease_seconds = float(lease_seconds)
+        self.max_attempts = int(max_attempts)
+        self._local = threading.local()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, created_at REAL NOT NULL, total INTEGER NOT NULL, use_cache INTEGER NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS tasks ("
+            "job_id TEXT NOT NULL, idx INTEGER NOT NULL, text TEXT NOT NULL, target_sentiment TEXT NOT NULL, "
+            "status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, lease_until REAL, "
+            "result TEXT, error TEXT, finished_at REAL, PRIMARY KEY (job_id, idx))"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, lease_until)")
+
+    def _connection(self):
+        # sqlite3 connections must not be shared across threads or forked processes
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def create_job(self, tasks, use_cache=True):
+        """Store a job for tasks, a list of (text, target_sentiment); returns its ID"""
+        job_id = uuid.uuid4().hex
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("INSERT INTO jobs (id, created_at, total, use_cache) VALUES (?, ?, ?, ?)",
+                         (job_id, time.time(), len(tasks), int(use_cache)))
+            conn.executemany(
+                "INSERT INTO tasks (job_id, idx, text, target_sentiment, status) VALUES (?, ?, ?, ?, ?)",
+                [(job_id, i, text, target, PENDING) for i, (text, target) in enumerate(tasks)]
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return job_id
+
+    def claim(self):
+        """
+        Atomically lease the oldest runnable task: pending, or running with an
+        expired lease (its worker died). Returns a task dict or None.
+        """
+        tasks = self.claim_many(1)
+        return tasks[0] if tasks else None
+
+    def claim_many(self, limit):
+        """
+        Atomically lease up to limit runnable tasks, all from the job that owns
+        the oldest one, so they can share one batched LLM call. Returns a list
+        of task dicts in index order (empty when there is no work).
+        """
+        now = time.time()
+        runnable = "(status = ? OR (status = ? AND lease_until < ?))"
+        rows = self._connection().execute(
+            "UPDATE tasks SET status = ?, attempts = attempts + 1, lease_until = ? "
+            f"WHERE rowid IN (SELECT rowid FROM tasks WHERE {runnable} AND job_id = ("
+            f"SELECT job_id FROM tasks WHERE {runnable} ORDER BY rowid LIMIT 1) ORDER BY rowid LIMIT ?) "
+            "RETURNING job_id, idx, text, target_sentiment, attempts",
+            (RUNNING, now + self.lease_seconds, PENDING, RUNNING, now, PENDING, RUNNING, now, max(1, int(limit)))
+        ).fetchall()
+        if not rows:
+            return []
+
+        job_id = rows[0][0]
+        use_cache = self._connection().execute("SELECT use_cache FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return sorted((
+            {
+                "job_id": job_id,
+                "index": idx,
+                "text": text,
+                "target_sentiment": target_sentiment,
+                "attempts": attempts,
+                "use_cache": bool(use_cache[0]) if use_cache else True,
+            }
+            for job_id, idx, text, target_sentiment, attempts in rows
+        ), key=lambda task: task["index"])
+
+    def complete(self, job_id, index, result):
+        self._connection().execute(
+            "UPDATE tasks SET status = ?, result = ?, lease_until = NULL, finished_at = ? WHERE job_id = ? AND idx = ?",
+            (DONE, json.dumps(result), time.time(), job_id, index)
+        )
+
+    def fail(self, job_id, index, error, attempts):
+        """Record a failed attempt; the task is retried until max_attempts"""
+        status = FAILED if attempts >= self.max_attempts else PENDING
+        self._connection().execute(
+            "UPDATE tasks SET status = ?, error = ?, lease_until = NULL, finished_at = ? WHERE job_id = ? AND idx = ?",
+            (status, error, time.time() if status == FAILED else None, job_id, index)
+        )
+
+    def has_runnable(self):
+        row = self._connection().execute(
+            "SELECT 1 FROM tasks WHERE status = ? OR (status = ? AND lease_until < ?) LIMIT 1",
+            (PENDING, RUNNING, time.time())
+        ).fetchone()
+        return row is not None
+
+    def get_job(self, job_id, include_results=True, since=0):
+        """
+        Job progress, or None if job_id is unknown. With include_results, the
+        finished tasks with index >= since are returned in index order.
+        """
+        conn = self._connection()
+        job = conn.execute("SELECT created_at, total FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if job is None:
+            return None
+
+        created_at, total = job
+        counts = dict(conn.execute("SELECT status, COUNT(*) FROM tasks WHERE job_id = ? GROUP BY status",
+                                   (job_id,)).fetchall())
+        finished = counts.get(DONE, 0) + counts.get(FAILED, 0)
+        if finished == total:
+            state = "completed"
+        elif counts.get(RUNNING, 0) or finished:
+            state = "running"
+        else:
+            state = "queued"
+
+        response = {
+            "job_id": job_id,
+            "status": state,
+            "created_at": created_at,
+            "total": total,
+            "completed": counts.get(DONE, 0),
+            "failed": counts.get(FAILED, 0),
+            "pending": counts.get(PENDING, 0) + counts.get(RUNNING, 0),
+        }
+        if include_results:
+            rows = conn.execute(
+                "SELECT idx, status, result, error FROM tasks WHERE job_id = ? AND idx >= ? AND status IN (?, ?) "
+                "ORDER BY idx", (job_id, since, DONE, FAILED)
+            ).fetchall()
+            response["results"] = [
+                {"index": idx, "status": status, "result": json.loads(result) if result else None, "error": error}
+                for idx, status, result, error in rows
+            ]
+        return response
+
+    def finished_since(self, job_id, finished_after):
+        """
+        Tasks of job_id that finished at or after the finished_after timestamp,
+        oldest first. Inclusive, so callers must skip indices they have seen.
+        """
+        rows = self._connection().execute(
+            "SELECT idx, status, result, error, finished_at FROM tasks "
+            "WHERE job_id = ? AND status IN (?, ?) AND finished_at >= ? ORDER BY finished_at, idx",
+            (job_id, DONE, FAILED, finished_after)
+        ).fetchall()
+        return [
+            {"index": idx, "status": status, "result": json.loads(result) if result else None,
+             "error": error, "finished_at": finished_at}
+            for idx, status, result, error, finished_at in rows
+        ]
+
+    def prune(self, retention_seconds):
+        """Delete jobs whose every task finished more than retention_seconds ago"""
+        cutoff = time.time() - retention_seconds
+        conn = self._connection()
+        conn.execute(
+            "DELETE FROM jobs WHERE created_at < ? AND NOT EXISTS ("
+            "SELECT 1 FROM tasks WHERE tasks.job_id = jobs.id AND (finished_at IS NULL OR finished_at > ?))",
+            (cutoff, cutoff)
+        )
+        conn.execute("DELETE FROM tasks WHERE job_id NOT IN (SELECT id FROM jobs)")
+
+
+class JobWorkerPool:
+    """
+    Worker threads that claim tasks from a JobStore and run them through
+    task_fn(text, target_sentiment, use_cache) -> result dict. With batch_fn and
+    batch_size > 1, each worker instead claims up to batch_size tasks of one job
+    and runs batch_fn([(text, target_sentiment), ...], use_cache) -> [result, ...].
+
+    Threads start lazily (and again after a fork); they wake immediately on
+    local submissions and poll every poll_interval for work queued by other
+    processes or left behind by a crashed one.
+    """
+
+    def __init__(self, store, task_fn, concurrency=4, poll_interval=1.0, retention_seconds=7 * 24 * 3600,
+                 batch_fn=None, batch_size=1):
+        self.store = store
+        self.task_fn = task_fn
+        self.batch_fn = batch_fn
+        self.batch_size = max(1, int(batch_size)) if batch_fn is not None else 1
+        self.concurrency = max(1, int(concurrency))
+        self.poll_interval = float(poll_interval)
+        self.retention_seconds = float(retention_seconds)
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._threads = []
+        self._pid = None
+        self.processed = 0
+        self.batches = 0
+        self.errors = 0
+        self.busy = 0
+
+    def ensure_started(self):
+        if self._threads and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._threads and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._threads = [
+                threading.Thread(target=self._run, name=f"moodify-job-worker-{i}", daemon=True)
+                for i in range(self.concurrency)
+            ]
+            for thread in self._threads:
+                thread.start()
+            try:
+                self.store.prune(self.retention_seconds)
+            except sqlite3.Error as e:
+                print(f"⚠️  Could not prune old moodify jobs: {e}")
+
+    def notify(self):
+        """Wake idle workers after a submission"""
+        self.ensure_started()
+        self._wakeup.set()
+
+    def _run(self):
+        while True:
+            try:
+                tasks = self.store.claim_many(self.batch_size)
+            except sqlite3.Error as e:
+                print(f"⚠️  Moodify job claim failed: {e}")
+                tasks = []
+
+            if not tasks:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+
+            self._count("busy", 1)
+            try:
+                self._process(tasks)
+            finally:
+                self._count("busy", -1)
+
+    def _process(self, tasks):
+        try:
+            if self.batch_size > 1:
+                results = self.batch_fn([(task["text"], task["target_sentiment"]) for task in tasks],
+                                        tasks[0]["use_cache"])
+            else:
+                results = [self.task_fn(tasks[0]["text"], tasks[0]["target_sentiment"], tasks[0]["use_cache"])]
+        except Exception as e:
+            self._count("errors", len(tasks))
+            for task in tasks:
+                self.store.fail(task["job_id"], task["index"], str(e), task["attempts"])
+            return
+
+        for task, result in zip(tasks, results):
+            self.store.complete(task["job_id"], task["index"], result)
+        self._count("processed", len(tasks))
+        self._count("batches", 1)
+
+    def _count(self, counter, delta):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + delta)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "enabled": True,
+                "started": bool(self._threads) and self._pid == os.getpid(),
+                "concurrency": self.concurrency,
+                "batch_size": self.batch_size,
+                "busy": self.busy,
+                "processed": self.processed,
+                "batches": self.batches,
+                "errors": self.errors,
+            }
@@ -0,0 +1,74 @@
+"""
+Length-bucketed batching for the BERT emotion model.
+
+A padded batch costs its size times its longest text, so one 500-token review
+among fifty tweets makes every tweet run at 500 tokens. Texts are sorted by
+token count and cut into batches of neighbours in that order, so each batch is
+padded to the longest of texts of about the same length. A batch is also cut
+short where the next text is so much longer that most of the batch would be
+padding. Results are put back in input order by the caller.
+
+Turning probabilities into responses is done for a whole batch at once:
+rounding, thresholding and the argmax run over the probability matrix, and
+only building the result dicts is left to Python.
+"""
+
+import numpy as np
+
+# Emotions at or below this probability are left out of "emotions"
+MIN_EMOTION_SCORE = 0.01
+# Largest share of a batch's tokens that may be padding before it is cut short
+MAX_PADDING_FRACTION = 0.5
+
+
+def length_sorted_batches(lengths, batch_size, max_padding=MAX_PADDING_FRACTION):
+    """Lists of up to batch_size indexes into lengths, shortest first"""
+    batches = []
+    batch, batch_tokens = [], 0
+    for i in sorted(range(len(lengths)), key=lengths.__getitem__):
+        # lengths[i] is the longest so far, so the batch would be padded to it
+        padded = (len(batch) + 1) * lengths[i]
+        if batch and (len(batch) == batch_size or padded - batch_tokens - lengths[i] > max_padding * padded):
+            batches.append(batch)
+            batch, batch_tokens = [], 0
+        batch.append(i)
+        batch_tokens += lengths[i]
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def padded_tokens(lengths, batches):
+    """Tokens the forward passes over batches run on, padding included"""
+    return sum(len(batch) * max(lengths[i] for i in batch) for batch in batches if batch)
+
+
+def format_emotion_probs(probs, label_names, min_score=MIN_EMOTION_SCORE):
+    """
+    The emotions response for each row of a (texts, labels) probability
+    matrix: the scores above min_score rounded to 4 places, the dominant
+    emotion and its confidence.
+    """
+    probs = np.asarray(probs, dtype=np.float64).reshape(-1, len(label_names))
+    rounded = np.round(probs, 4)
+    dominant = probs.argmax(axis=1)
+    confidence = rounded[np.arange(len(probs)), dominant].tolist()
+
+    keep = probs > min_score
+    rows, columns = np.nonzero(keep)
+    labels = np.asarray(label_names, dtype=object)
+    kept_labels = labels[columns].tolist()
+    kept_scores = rounded[rows, columns].tolist()
+    # np.nonzero goes row by row, so each row's scores are a contiguous run
+    ends = np.cumsum(keep.sum(axis=1)).tolist()
+
+    results = []
+    start = 0
+    for i, end in enumerate(ends):
+        results.append({
+            "emotions": dict(zip(kept_labels[start:end], kept_scores[start:end])),
+            "dominant_emotion": labels[dominant[i]],
+            "confidence": confidence[i]
+        })
+        start = end
+    return results
@@ -0,0 +1,280 @@
+"""
+LLM client layer for the moodify paths.
+
+- create_client / create_async_client: OpenRouter clients over one pooled,
+  keep-alive HTTP connection pool per client, with a short connect timeout and
+  the SDK's own retries disabled (retries are decided here instead)
+- Deadline: the time a request has left, so every attempt (and any backoff)
+  fits inside the caller's budget
+- request_timeout: the per-attempt timeout to pass to chat.completions.create,
+  which keeps the short connect timeout
+- LLMCallPolicy: runs a call under a deadline, retries transient upstream
+  errors while a shared RetryBudget allows it, and opens a circuit breaker
+  after repeated failures so callers go straight to the fallback path
+- scaled_max_tokens: completion budget proportional to the input length
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+
+import openai
+from openai import AsyncOpenAI, OpenAI
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    httpx = None
+    HTTPX_AVAILABLE = False
+
+OPENROUTER_BASE_URL = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "3"))
+LLM_POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", "20"))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "30"))
+LLM_MAX_ATTEMPTS = int(os.getenv("LLM_MAX_ATTEMPTS", "3"))
+LLM_RETRY_BUDGET_RATIO = float(os.getenv("LLM_RETRY_BUDGET_RATIO", "0.2"))
+LLM_BREAKER_THRESHOLD = int(os.getenv("LLM_BREAKER_THRESHOLD", "5"))
+LLM_BREAKER_COOLDOWN = float(os.getenv("LLM_BREAKER_COOLDOWN", "30"))
+MOODIFY_MAX_TOKENS_CAP = int(os.getenv("MOODIFY_MAX_TOKENS_CAP", "1024"))
+
+# Don't start an attempt with less time than this left; fall back instead
+MIN_ATTEMPT_SECONDS = 0.25
+
+RETRYABLE_ERRORS = (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError)
+
+
+class LLMUnavailable(Exception):
+    """Raised instead of calling the LLM when the deadline or circuit breaker rules it out"""
+
+
+def _timeout(read_timeout):
+    if HTTPX_AVAILABLE:
+        return httpx.Timeout(read_timeout, connect=LLM_CONNECT_TIMEOUT)
+    return read_timeout
+
+
+def request_timeout(seconds):
+    """
+    Timeout for one attempt that may take seconds. The SDK applies a plain float
+    to every phase, replacing the client's connect timeout, so the connect
+    timeout is set again here (capped by seconds).
+    """
+    if HTTPX_AVAILABLE:
+        return httpx.Timeout(seconds, connect=min(LLM_CONNECT_TIMEOUT, seconds))
+    return seconds
+
+
+def is_client_error(error):
+    """A 4xx answer other than 429: the upstream is up but rejected this request"""
+    return (isinstance(error, openai.APIStatusError) and 400 <= error.status_code < 500
+            and not isinstance(error, openai.RateLimitError))
+
+
+def _limits():
+    return httpx.Limits(max_connections=LLM_POOL_SIZE, max_keepalive_connections=LLM_POOL_SIZE,
+                        keepalive_expiry=LLM_KEEPALIVE_EXPIRY)
+
+
+def create_client(api_key=None, base_url=None, read_timeout=60):
+    """Synchronous OpenAI-compatible client, or None when no API key is configured"""
+    api_key = api_key or os.getenv("OPENROUTER_API_KEY")
+    if not api_key:
+        return None
+
+    kwargs = {"base_url": base_url or OPENROUTER_BASE_URL, "api_key": api_key,
+              "max_retries": 0, "timeout": _timeout(read_timeout)}
+    if HTTPX_AVAILABLE:
+        kwargs["http_client"] = openai.DefaultHttpxClient(limits=_limits(), timeout=_timeout(read_timeout))
+    return OpenAI(**kwargs)
+
+
+def create_async_client(api_key=None, base_url=None, read_timeout=60):
+    """Async client; create it on the event loop that will use it"""
+    api_key = api_key or os.getenv("OPENROUTER_API_KEY")
+    if not api_key:
+        return None
+
+    kwargs = {"base_url": base_url or OPENROUTER_BASE_URL, "api_key": api_key,
+              "max_retries": 0, "timeout": _timeout(read_timeout)}
+    if HTTPX_AVAILABLE:
+        kwargs["http_client"] = openai.DefaultAsyncHttpxClient(limits=_limits(), timeout=_timeout(read_timeout))
+    return AsyncOpenAI(**kwargs)
+
+
+def scaled_max_tokens(text, floor=64, cap=None):
+    """
+    Completion budget for rewriting text: roughly 1.5x its token count (~4
+    characters per token) plus headroom, so long inputs are not truncated and
+    short ones don't reserve 150 tokens they never use.
+    """
+    cap = MOODIFY_MAX_TOKENS_CAP if cap is None else cap
+    estimated_input_tokens = len(text) / 4
+    return int(min(cap, max(floor, estimated_input_tokens * 1.5 + 32)))
+
+
+class Deadline:
+    """A point in time a request must finish by"""
+
+    def __init__(self, seconds):
+        self.seconds = float(seconds)
+        self.expires_at = time.monotonic() + self.seconds
+
+    def remaining(self):
+        return max(0.0, self.expires_at - time.monotonic())
+
+
+class RetryBudget:
+    """
+    Token bucket limiting retries to a fraction of calls: each call deposits
+    ratio tokens, each retry spends one. During an upstream outage this caps
+    the extra load retries add at ~ratio instead of multiplying it.
+    """
+
+    def __init__(self, ratio=0.2, initial=3.0, cap=10.0):
+        self.ratio = float(ratio)
+        self.cap = float(cap)
+        self._balance = float(initial)
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self._balance = min(self.cap, self._balance + self.ratio)
+
+    def try_spend(self):
+        with self._lock:
+            if self._balance < 1.0:
+                return False
+            self._balance -= 1.0
+            return True
+
+    def balance(self):
+        with self._lock:
+            return round(self._balance, 2)
+
+
+class LLMCallPolicy:
+    """
+    Deadline, retry and circuit-breaker policy shared by the sync, async and
+    streaming moodify paths. fn(timeout) performs one attempt given the seconds
+    it may take; it is retried on RETRYABLE_ERRORS while time and budget remain.
+    Client errors (4xx other than 429) are neither retried nor counted towards
+    the circuit breaker: they say nothing about the upstream's health.
+    """
+
+    def __init__(self, max_attempts=3, retry_budget=None, breaker_threshold=5, breaker_cooldown=30.0,
+                 base_backoff=0.2):
+        self.max_attempts = max(1, int(max_attempts))
+        self.retry_budget = retry_budget or RetryBudget()
+        self.breaker_threshold = max(1, int(breaker_threshold))
+        self.breaker_cooldown = float(breaker_cooldown)
+        self.base_backoff = float(base_backoff)
+
+        self._lock = threading.Lock()
+        self._consecutive_failures = 0
+        self._open_until = 0.0
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.client_errors = 0
+        self.short_circuited = 0
+        self.deadline_exceeded = 0
+
+    def _admit(self, deadline):
+        with self._lock:
+            self.calls += 1
+            if time.monotonic() < self._open_until:
+                self.short_circuited += 1
+                raise LLMUnavailable("LLM circuit open after repeated failures")
+        if deadline.remaining() < MIN_ATTEMPT_SECONDS:
+            self._count("deadline_exceeded")
+            raise LLMUnavailable("No time left for an LLM call")
+        self.retry_budget.deposit()
+
+    def _should_retry(self, error, attempt, deadline):
+        if not isinstance(error, RETRYABLE_ERRORS) or attempt >= self.max_attempts:
+            return None
+        delay = self.base_backoff * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+        if deadline.remaining() - delay < MIN_ATTEMPT_SECONDS or not self.retry_budget.try_spend():
+            return None
+        self._count("retries")
+        return delay
+
+    def _record(self, success, error=None):
+        if error is not None and is_client_error(error):
+            self._count("client_errors")
+            return
+        with self._lock:
+            if success:
+                self._consecutive_failures = 0
+                return
+            self.failures += 1
+            self._consecutive_failures += 1
+            if self._consecutive_failures >= self.breaker_threshold:
+                # Half-open after the cooldown: the next call is a trial
+                self._open_until = time.monotonic() + self.breaker_cooldown
+                self._consecutive_failures = self.breaker_threshold - 1
+
+    def call(self, fn, deadline):
+        """Run fn(timeout) synchronously under deadline; raises on final failure"""
+        self._admit(deadline)
+        attempt = 1
+        while True:
+            try:
+                result = fn(deadline.remaining())
+                self._record(True)
+                return result
+            except Exception as e:
+                delay = self._should_retry(e, attempt, deadline)
+                if delay is None:
+                    self._record(False, e)
+                    raise
+                time.sleep(delay)
+                attempt += 1
+
+    async def acall(self, fn, deadline):
+        """Async call(): fn(timeout) returns an awaitable, hard-capped by the deadline"""
+        self._admit(deadline)
+        attempt = 1
+        while True:
+            try:
+                result = await asyncio.wait_for(fn(deadline.remaining()), deadline.remaining())
+                self._record(True)
+                return result
+            except Exception as e:
+                delay = self._should_retry(e, attempt, deadline)
+                if delay is None:
+                    if isinstance(e, asyncio.TimeoutError):
+                        self._count("deadline_exceeded")
+                    self._record(False, e)
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "retries": self.retries,
+                "failures": self.failures,
+                "client_errors": self.client_errors,
+                "short_circuited": self.short_circuited,
+                "deadline_exceeded": self.deadline_exceeded,
+                "circuit_open": time.monotonic() < self._open_until,
+                "retry_budget": self.retry_budget.balance(),
+                "pooled_http_client": HTTPX_AVAILABLE,
+            }
+
+
+llm_policy = LLMCallPolicy(
+    max_attempts=LLM_MAX_ATTEMPTS,
+    retry_budget=RetryBudget(ratio=LLM_RETRY_BUDGET_RATIO),
+    breaker_threshold=LLM_BREAKER_THRESHOLD,
+    breaker_cooldown=LLM_BREAKER_COOLDOWN
+)
@@ -0,0 +1,157 @@
+"""
+Long-document support for the BERT emotion model.
+
+BERT only sees its first 512 tokens, so longer texts are split into windows
+of whole sentences that fit the model, with a few sentences of overlap
+between neighbouring windows. The windows are scored and their probabilities
+are combined:
+
+- mean: every window counts the same
+- max: strongest signal per emotion anywhere in the text (renormalized)
+- weighted: windows weighted by their token count
+
+Everything here is lazy: sentences are tokenized a block at a time and windows
+are yielded as they fill up, so memory depends on the window batch size, not
+on the length of the document.
+"""
+
+import os
+import re
+from collections import deque
+from itertools import islice
+
+AGGREGATIONS = ("mean", "max", "weighted")
+_LONG_TEXT_MODES = {"true": "on", "false": "off", "on": "on", "off": "off", "auto": "auto"}
+
+
+def long_text_mode(value):
+    """
+    "auto", "on" or "off" for a long_text setting given as a bool or as
+    "true"/"false", "on"/"off" or "auto"; None when it is none of those
+    """
+    if isinstance(value, bool):
+        return "on" if value else "off"
+    if isinstance(value, str):
+        return _LONG_TEXT_MODES.get(value.lower())
+    return None
+
+
+LONG_TEXT_AGGREGATION = os.getenv("LONG_TEXT_AGGREGATION", "mean").lower()
+if LONG_TEXT_AGGREGATION not in AGGREGATIONS:
+    print(f"⚠️  Unknown LONG_TEXT_AGGREGATION '{LONG_TEXT_AGGREGATION}', using 'mean' "
+          f"(choose {', '.join(AGGREGATIONS)})")
+    LONG_TEXT_AGGREGATION = "mean"
+LONG_TEXT_OVERLAP_TOKENS = int(os.getenv("LONG_TEXT_OVERLAP_TOKENS", "64"))
+LONG_TEXT_MAX_SEGMENTS = int(os.getenv("LONG_TEXT_MAX_SEGMENTS", "100"))
+
+# A sentence ends at ., ! or ? followed by whitespace, or at a line break
+SENTENCE_RE = re.compile(r"\S.*?(?:[.!?]+(?=\s|$)|$)", re.MULTILINE)
+WORD_RE = re.compile(r"\S+")
+
+# Sentences tokenized per tokenizer call
+TOKENIZE_BLOCK = 256
+
+
+def batched(iterable, size):
+    """Lists of up to size items from iterable, without reading ahead further"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def sentence_spans(text):
+    """(start, end) character offsets of each sentence in text"""
+    for match in SENTENCE_RE.finditer(text):
+        yield match.start(), match.end()
+
+
+def token_spans(text, count_tokens, budget):
+    """
+    (start, end, tokens) for each sentence of text. count_tokens(list_of_str)
+    returns token counts without special tokens. Sentences over budget are
+    split at word boundaries so no span is longer than the model can see.
+    """
+    for block in batched(sentence_spans(text), TOKENIZE_BLOCK):
+        counts = count_tokens([text[start:end] for start, end in block])
+        for (start, end), tokens in zip(block, counts):
+            if tokens <= budget:
+                yield start, end, tokens
+            else:
+                yield from _split_sentence(text, start, end, count_tokens, budget)
+
+
+def _split_sentence(text, start, end, count_tokens, budget):
+    piece_start, piece_tokens = None, 0
+    for block in batched(WORD_RE.finditer(text, start, end), TOKENIZE_BLOCK):
+        counts = count_tokens([word.group() for word in block])
+        for word, tokens in zip(block, counts):
+            if piece_start is not None and piece_tokens + tokens > budget:
+                yield piece_start, piece_end, piece_tokens
+                piece_start, piece_tokens = None, 0
+            if piece_start is None:
+                piece_start = word.start()
+            piece_end = word.end()
+            piece_tokens += tokens
+    if piece_start is not None:
+        yield piece_start, piece_end, piece_tokens
+
+
+def sentence_windows(text, count_tokens, max_tokens, overlap_tokens=0):
+    """
+    Windows of consecutive sentences, as (start, end, tokens), each holding at
+    most max_tokens tokens. A new window starts with the previous window's
+    last sentences, up to overlap_tokens of them, so context carries across
+    the boundary.
+    """
+    window = deque()
+    total = 0
+    for span in token_spans(text, count_tokens, max_tokens):
+        if window and total + span[2] > max_tokens:
+            yield window[0][0], window[-1][1], total
+            # Carry trailing sentences over, but never the whole window
+            carried = deque()
+            carried_tokens = 0
+            while len(window) > 1 and carried_tokens + window[-1][2] <= overlap_tokens:
+                sentence = window.pop()
+                carried.appendleft(sentence)
+                carried_tokens += sentence[2]
+            while carried and carried_tokens + span[2] > max_tokens:
+                carried_tokens -= carried.popleft()[2]
+            window, total = carried, carried_tokens
+        window.append(span)
+        total += span[2]
+    if window:
+        yield window[0][0], window[-1][1], total
+
+
+class ProbabilityAggregator:
+    """Running combination of per-window probability rows with one of AGGREGATIONS"""
+
+    def __init__(self, strategy=None):
+        self.strategy = (strategy or LONG_TEXT_AGGREGATION).lower()
+        if self.strategy not in AGGREGATIONS:
+            raise ValueError(f"aggregation must be one of {', '.join(AGGREGATIONS)}")
+        self.count = 0
+        self.total_weight = 0.0
+        self._values = None
+
+    def add(self, probs, weight=1.0):
+        probs = [float(p) for p in probs]
+        if self._values is None:
+            self._values = [0.0] * len(probs)
+        if self.strategy == "max":
+            self._values = [max(current, p) for current, p in zip(self._values, probs)]
+        else:
+            weight = float(weight) if self.strategy == "weighted" else 1.0
+            self._values = [current + p * weight for current, p in zip(self._values, probs)]
+            self.total_weight += weight
+        self.count += 1
+
+    def result(self):
+        if self._values is None:
+            raise ValueError("No probabilities were added")
+        total = sum(self._values) if self.strategy == "max" else self.total_weight
+        return [value / total for value in self._values]
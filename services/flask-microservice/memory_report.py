@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Per-process memory of a gunicorn deployment of the service (Linux only)
+
+For the master and each worker, reports:
+- RSS: resident memory, counting pages shared with other processes in full
+- PSS: resident memory with each shared page split between the processes sharing it
+- USS: memory only this process has (private pages); what stopping it would free
+
+By default, starts the service twice, without and with PRELOAD_MODELS, sends
+a few requests to every worker and prints both reports. Pass --pid to
+report on a running gunicorn master instead.
+
+Usage:
+    python memory_report.py                     # before/after comparison, 2 workers
+    python memory_report.py --workers 4
+    python memory_report.py --pid $(cat /tmp/gunicorn.pid)
+"""
+
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+SAMPLE_REQUESTS = [
+    ("/predict", {"text": "I am so excited about this new opportunity!"}),
+    ("/analyze-light", {"text": "This is absolutely terrible and I hate it."}),
+    ("/analyze", {"text": "Thanks so much for helping me out yesterday, it meant a lot."}),
+]
+
+
+def process_memory(pid="self"):
+    """{"rss_mb", "pss_mb", "uss_mb"} of a process, from /proc/<pid>/smaps_rollup"""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1])
+    uss = fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+    return {
+        "rss_mb": round(fields.get("Rss", 0) / 1024, 1),
+        "pss_mb": round(fields.get("Pss", 0) / 1024, 1),
+        "uss_mb": round(uss / 1024, 1),
+    }
+
+
+def child_pids(parent):
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The command name is in parentheses and may contain spaces; ppid follows the state
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == parent:
+            children.append(int(entry))
+    return sorted(children)
+
+
+def report(master_pid):
+    """Memory rows for the master and its workers, plus the totals"""
+    rows = [("master", master_pid, process_memory(master_pid))]
+    rows += [("worker", pid, process_memory(pid)) for pid in child_pids(master_pid)]
+    workers = [memory for role, _, memory in rows if role == "worker"]
+    totals = {name: round(sum(memory[name] for _, _, memory in rows), 1) for name in ("rss_mb", "pss_mb", "uss_mb")}
+    return rows, workers, totals
+
+
+def print_report(title, master_pid):
+    rows, workers, totals = report(master_pid)
+    print(f"\n📊 {title}")
+    print(f"{'process':<8} {'pid':>8} {'RSS MB':>9} {'PSS MB':>9} {'USS MB':>9}")
+    for role, pid, memory in rows:
+        print(f"{role:<8} {pid:>8} {memory['rss_mb']:>9.1f} {memory['pss_mb']:>9.1f} {memory['uss_mb']:>9.1f}")
+    print(f"{'total':<8} {'':>8} {totals['rss_mb']:>9.1f} {totals['pss_mb']:>9.1f} {totals['uss_mb']:>9.1f}")
+    mean_uss = sum(memory["uss_mb"] for memory in workers) / len(workers) if workers else 0.0
+    print(f"Unique memory per worker: {mean_uss:.1f} MB; whole deployment (PSS): {totals['pss_mb']:.1f} MB")
+    return {"workers": len(workers), "worker_uss_mb": round(mean_uss, 1), "total_pss_mb": totals["pss_mb"]}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def call(url, payload=None):
+    data = json.dumps(payload).encode() if payload is not None else None
+    request = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return json.loads(response.read())
+
+
+def run_server(preload, workers, timeout):
+    """Start gunicorn, warm up every worker and report its memory"""
+    port = free_port()
+    env = dict(os.environ, BIND=f"127.0.0.1:{port}", WEB_CONCURRENCY=str(workers),
+               PRELOAD_MODELS="true" if preload else "false", LAZY_MODEL_LOADING="false",
+               MOODIFY_JOBS_ENABLED="false")
+    here = os.path.dirname(os.path.abspath(__file__))
+    server = subprocess.Popen([sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app"],
+                              cwd=here, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        base = f"http://127.0.0.1:{port}"
+        deadline = time.monotonic() + timeout
+        # Keep sending requests until every worker has answered, so each one has served traffic
+        seen = set()
+        while len(seen) < workers:
+            if time.monotonic() > deadline or server.poll() is not None:
+                raise RuntimeError(f"gunicorn did not start {workers} ready workers within {timeout}s")
+            try:
+                for path, payload in SAMPLE_REQUESTS:
+                    try:
+                        call(base + path, payload)
+                    except urllib.error.HTTPError:
+                        pass  # a model may be disabled in this environment
+                seen.add(call(base + "/metrics")["memory"]["pid"])
+            except OSError:
+                time.sleep(0.5)
+        title = f"{workers} workers, PRELOAD_MODELS={'true' if preload else 'false'}"
+        return print_report(title, server.pid)
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pid", type=int, help="report on this running gunicorn master instead")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--timeout", type=float, default=300, help="seconds to wait for the workers to load")
+    args = parser.parse_args()
+
+    if not os.path.exists("/proc/self/smaps_rollup"):
+        print("❌ /proc/<pid>/smaps_rollup not available (Linux 4.14+ only)")
+        sys.exit(1)
+
+    if args.pid:
+        print_report(f"gunicorn master {args.pid}", args.pid)
+        return
+
+    before = run_server(False, args.workers, args.timeout)
+    after = run_server(True, args.workers, args.timeout)
+    print("-" * 60)
+    print(f"Unique memory per worker:  {before['worker_uss_mb']:.1f} MB -> {after['worker_uss_mb']:.1f} MB")
+    print(f"Whole deployment (PSS):    {before['total_pss_mb']:.1f} MB -> {after['total_pss_mb']:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
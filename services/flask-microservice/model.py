@@ -1,15 +1,25 @@
-from textblob import TextBlob
+from importlib.metadata import version as package_version
+import json
 import math
-import re
 import os
-from openai import OpenAI
 from dotenv import load_dotenv
+from cache import ResultCache, make_key
+from llm_client import (Deadline, create_client, llm_policy, request_timeout, scaled_max_tokens,
+                        MOODIFY_MAX_TOKENS_CAP)
+from rewrite_engine import rewrite_engine
+from long_text import (LONG_TEXT_MAX_SEGMENTS, LONG_TEXT_OVERLAP_TOKENS, ProbabilityAggregator, batched,
+                       sentence_windows)
+from vader_batch import VADER_BATCH_AVAILABLE, VaderBatchScorer
+from pattern_polarity import PolarityEngine
 
 # Try to import heavy models, but fallback gracefully
 try:
-    from transformers import AutoTokenizer, AutoModelForSequenceClassification
+    from transformers import AutoTokenizer, AutoConfig
+    import numpy as np
     import torch
     from torch.nn.functional import softmax
+    from emotion_backends import load_backend
+    from length_buckets import format_emotion_probs, length_sorted_batches
     HEAVY_MODELS_AVAILABLE = True
 except ImportError:
     HEAVY_MODELS_AVAILABLE = False
@@ -45,25 +55,55 @@ load_dotenv()
 # Initialize OpenRouter client with error handling
 def get_openai_client():
     try:
-        return OpenAI(
-            base_url="https://openrouter.ai/api/v1",
-            api_key=os.getenv("OPENROUTER_API_KEY")
-        )
+        return create_client()
     except Exception as e:
         print(f"Warning: Could not initialize OpenAI client: {e}")
         return None
 
 client = get_openai_client()
 
+# LLM used by moodify_text; the prompt version is bumped whenever the prompt changes
+MOODIFY_MODEL = "deepseek/deepseek-chat-v3-0324:free"
+MOODIFY_PROMPT_VERSION = "1"
+
+# Texts packed into one LLM call by the batch moodify paths
+MOODIFY_BATCH_SIZE = int(os.getenv("MOODIFY_BATCH_SIZE", "10"))
+
+# Opt-in cache of successful LLM transformations (fallback results are never cached)
+MOODIFY_CACHE_ENABLED = os.getenv("MOODIFY_CACHE_ENABLED", "false").lower() == "true"
+moodify_cache = ResultCache(
+    max_entries=int(os.getenv("MOODIFY_CACHE_SIZE", "1000")),
+    ttl_seconds=float(os.getenv("MOODIFY_CACHE_TTL", "86400"))
+) if MOODIFY_CACHE_ENABLED else None
+
+def moodify_cache_key(text, target_sentiment):
+    return make_key(f"moodify:{target_sentiment}", f"{MOODIFY_MODEL}:{MOODIFY_PROMPT_VERSION}", text)
+
+# Versions identify the scoring logic in cache keys; bump when the output changes
+SENTIMENT_MODEL_VERSION = f"textblob-{package_version('textblob')}"
+
+# Polarity beyond +/- this is labelled positive/negative, anything closer to 0 neutral
+SENTIMENT_POLARITY_THRESHOLD = 0.2
+
+# TextBlob's PatternAnalyzer scores without building a TextBlob per text; loads the lexicon on first use
+_polarity_engine = None
+
+def get_polarity_engine():
+    global _polarity_engine
+    if _polarity_engine is None:
+        _polarity_engine = PolarityEngine()
+    return _polarity_engine
+
 def analyze_sentiment(text):
-    blob = TextBlob(text)
-    polarity = blob.sentiment.polarity
-    subjectivity = blob.sentiment.subjectivity
-    
+    polarity, subjectivity = get_polarity_engine().sentiment(text)
+    return sentiment_result(polarity, subjectivity)
+
+def sentiment_result(polarity, subjectivity):
+    """Build the analyze_sentiment response from TextBlob polarity and subjectivity"""
     # Determine sentiment category
-    if polarity > 0.2:
+    if polarity > SENTIMENT_POLARITY_THRESHOLD:
         sentiment = "positive"
-    elif polarity < -0.2:
+    elif polarity < -SENTIMENT_POLARITY_THRESHOLD:
         sentiment = "negative"
     else:
         sentiment = "neutral"
@@ -97,9 +137,65 @@ def analyze_sentiment(text):
         }
     }
 
-def moodify_text(text, target_sentiment):
-    """Transform text to match the target sentiment using LLM"""
-    
+def dedupe_texts(texts):
+    """
+    Collapse identical texts so each one is only analyzed once.
+    Returns the unique texts (first-seen order) and, for every input position,
+    the index of its text in the unique list.
+    """
+    unique_texts = []
+    positions = {}
+    index_map = []
+    for text in texts:
+        if text not in positions:
+            positions[text] = len(unique_texts)
+            unique_texts.append(text)
+        index_map.append(positions[text])
+    return unique_texts, index_map
+
+def analyze_sentiment_batch(texts):
+    """Run analyze_sentiment over a list of texts, returning results in input order"""
+    unique_texts, index_map = dedupe_texts(texts)
+    unique_results = [sentiment_result(*scores) for scores in get_polarity_engine().sentiment_batch(unique_texts)]
+    return [dict(unique_results[i]) for i in index_map]
+
+MOODIFY_SYSTEM_PROMPT = "You are an expert at transforming text sentiment while preserving meaning. Always respond with just the transformed text, no explanations or quotes."
+
+def build_moodify_messages(text, target_sentiment):
+    """Chat messages asking the LLM to rewrite text with the target sentiment"""
+    # Create prompt for LLM
+    prompt = f"""
+Transform the following text to have a {target_sentiment} sentiment while preserving the core meaning and context. 
+Keep the transformation natural and realistic.
+
+Original text: "{text}"
+Target sentiment: {target_sentiment}
+
+Requirements:
+1. Keep the same general topic and context
+2. Make it sound natural and authentic
+3. Don't change the fundamental message, just the emotional tone
+4. Keep similar length and structure
+
+Transformed text:"""
+
+    return [
+        {
+            "role": "system", 
+            "content": MOODIFY_SYSTEM_PROMPT
+        },
+        {
+            "role": "user", 
+            "content": prompt
+        }
+    ]
+
+def start_moodify(text, target_sentiment, use_cache=True):
+    """
+    Work shared by every moodify path before the LLM is called.
+    Returns (result, original_sentiment); result is only set when no LLM call
+    is needed (the text already has the target sentiment, or a cache hit).
+    """
     # Get original sentiment
     original_sentiment = analyze_sentiment(text)['sentiment']
     
@@ -113,46 +209,112 @@ def moodify_text(text, target_sentiment):
             "new_sentiment": original_sentiment,
             "changes_made": [],
             "success": True,
-            "message": f"Text is already {target_sentiment}! No changes needed."
-        }
+            "message": f"Text is already {target_sentiment}! No changes needed.",
+            "cached": False
+        }, original_sentiment
     
-    # Check if OpenAI client is available
-    if client is None:
-        return fallback_word_replacement(text, target_sentiment, original_sentiment, "OpenAI client not available")
+    if use_cache and moodify_cache is not None:
+        cached_result = moodify_cache.get(moodify_cache_key(text, target_sentiment))
+        if cached_result is not None:
+            cached_result["cached"] = True
+            return cached_result, original_sentiment
     
-    # Create prompt for LLM
-    prompt = f"""
-Transform the following text to have a {target_sentiment} sentiment while preserving the core meaning and context. 
-Keep the transformation natural and realistic.
+    return None, original_sentiment
 
-Original text: "{text}"
-Target sentiment: {target_sentiment}
+def clean_moodify_output(llm_output):
+    """Strip whitespace and the quotes models sometimes wrap their answer in"""
+    modified_text = llm_output.strip()
+    
+    # Remove quotes if the model added them
+    if modified_text.startswith('"') and modified_text.endswith('"'):
+        modified_text = modified_text[1:-1]
+    return modified_text
 
-Requirements:
-1. Keep the same general topic and context
-2. Make it sound natural and authentic
-3. Don't change the fundamental message, just the emotional tone
-4. Keep similar length and structure
+def candidate_score(analysis, target_sentiment):
+    """
+    Rank a candidate rewrite by its sentiment analysis: candidates that hit the
+    target come first, then the one whose polarity is furthest toward the target
+    """
+    polarity = analysis["polarity"]
+    if target_sentiment == "positive":
+        margin = polarity
+    elif target_sentiment == "negative":
+        margin = -polarity
+    else:
+        margin = -abs(polarity)
+    return (analysis["sentiment"] == target_sentiment, margin)
 
-Transformed text:"""
+def finish_moodify(text, target_sentiment, original_sentiment, llm_output):
+    """Clean up the LLM output, verify it with TextBlob and cache it if it hit the target"""
+    modified_text = clean_moodify_output(llm_output)
+    
+    # Analyze the new sentiment
+    new_sentiment_analysis = analyze_sentiment(modified_text)
+    new_sentiment = new_sentiment_analysis['sentiment']
+    
+    # Determine success and changes
+    success = new_sentiment == target_sentiment
+    
+    # Create a summary of changes (simplified since we can't track word-by-word changes with LLM)
+    changes_made = [
+        f"Transformed from {original_sentiment} to {new_sentiment} sentiment",
+        "Used AI language model for natural text transformation"
+    ]
+    
+    if success:
+        message = f"Successfully transformed text to {target_sentiment}!"
+    else:
+        message = f"Transformed text from {original_sentiment} to {new_sentiment} (target was {target_sentiment})"
+    
+    result = {
+        "original_text": text,
+        "modified_text": modified_text,
+        "target_sentiment": target_sentiment,
+        "original_sentiment": original_sentiment,
+        "new_sentiment": new_sentiment,
+        "changes_made": changes_made,
+        "success": success,
+        "message": message
+    }
+    
+    # Only cache transformations that reached the target, so retries of misses can still improve
+    if success and moodify_cache is not None:
+        moodify_cache.set(moodify_cache_key(text, target_sentiment), result)
+    result["cached"] = False
+    return result
+
+def moodify_fallback(text, target_sentiment, original_sentiment, error_message):
+    """Word-replacement fallback; its results are never cached as LLM output"""
+    result = fallback_word_replacement(text, target_sentiment, original_sentiment, error_message)
+    result["cached"] = False
+    return result
+
+def moodify_text(text, target_sentiment, use_cache=True, timeout=60):
+    """
+    Transform text to match the target sentiment using LLM.
+    When the moodify cache is enabled, successful LLM transformations are reused
+    for identical (text, target) pairs; "cached" in the result says which happened.
+    The LLM call (including retries) must finish within timeout seconds, otherwise
+    the word-replacement fallback is used.
+    """
+    deadline = Deadline(timeout)
+    result, original_sentiment = start_moodify(text, target_sentiment, use_cache)
+    if result is not None:
+        return result
+    
+    # Check if OpenAI client is available
+    if client is None:
+        return moodify_fallback(text, target_sentiment, original_sentiment, "OpenAI client not available")
 
     try:
         # Call OpenRouter API with DeepSeek model
-        response = client.chat.completions.create(
-            model="deepseek/deepseek-chat-v3-0324:free",
-            messages=[
-                {
-                    "role": "system", 
-                    "content": "You are an expert at transforming text sentiment while preserving meaning. Always respond with just the transformed text, no explanations or quotes."
-                },
-                {
-                    "role": "user", 
-                    "content": prompt
-                }
-            ],
-            max_tokens=150,
-            temperature=0.7
-        )
+        response = llm_policy.call(lambda seconds: client.chat.completions.create(
+            model=MOODIFY_MODEL,
+            messages=build_moodify_messages(text, target_sentiment),
+            max_tokens=scaled_max_tokens(text),
+            temperature=0.7,
+            timeout=request_timeout(seconds)
+        ), deadline)
         
         # ! Debug: Print the full response for inspection
         # print("=== OpenRouter API Response ===")
@@ -163,103 +325,165 @@ Transformed text:"""
         # print(f"Usage info: {getattr(response, 'usage', 'No usage info')}")
         # print("===============================")
         
-        modified_text = response.choices[0].message.content.strip()
-        
-        # Remove quotes if the model added them
-        if modified_text.startswith('"') and modified_text.endswith('"'):
-            modified_text = modified_text[1:-1]
-        
-        # Analyze the new sentiment
-        new_sentiment_analysis = analyze_sentiment(modified_text)
-        new_sentiment = new_sentiment_analysis['sentiment']
-        
-        # Determine success and changes
-        success = new_sentiment == target_sentiment
-        
-        # Create a summary of changes (simplified since we can't track word-by-word changes with LLM)
-        changes_made = [
-            f"Transformed from {original_sentiment} to {new_sentiment} sentiment",
-            "Used AI language model for natural text transformation"
-        ]
-        
-        if success:
-            message = f"Successfully transformed text to {target_sentiment}!"
-        else:
-            message = f"Transformed text from {original_sentiment} to {new_sentiment} (target was {target_sentiment})"
-        
-        return {
-            "original_text": text,
-            "modified_text": modified_text,
-            "target_sentiment": target_sentiment,
-            "original_sentiment": original_sentiment,
-            "new_sentiment": new_sentiment,
-            "changes_made": changes_made,
-            "success": success,
-            "message": message
-        }
-        
+        return finish_moodify(text, target_sentiment, original_sentiment, response.choices[0].message.content)
     except Exception as e:
         # Fallback to simple word replacement if API fails
-        return fallback_word_replacement(text, target_sentiment, original_sentiment, str(e))
+        return moodify_fallback(text, target_sentiment, original_sentiment, str(e))
+
+MOODIFY_BATCH_SYSTEM_PROMPT = (
+    "You are an expert at transforming text sentiment while preserving meaning. "
+    "You receive a JSON array of texts to rewrite and must respond with only a JSON array, "
+    "no explanations and no markdown."
+)
+
+def build_moodify_batch_messages(items):
+    """Chat messages asking the LLM to rewrite several (text, target_sentiment) items in one response"""
+    payload = json.dumps(
+        [{"id": i, "target_sentiment": target, "text": text} for i, (text, target) in enumerate(items)],
+        ensure_ascii=False
+    )
+    prompt = f"""
+Transform each text below to have its target sentiment while preserving the core meaning and context.
+Keep each transformation natural and realistic.
+
+Input:
+{payload}
+
+Requirements:
+1. Keep the same general topic and context
+2. Make it sound natural and authentic
+3. Don't change the fundamental message, just the emotional tone
+4. Keep similar length and structure
+5. Rewrite every text independently of the others
+
+Respond with a JSON array containing exactly one object per input, in the same order:
+[{{"id": <input id>, "text": "<transformed text>"}}]"""
+
+    return [
+        {"role": "system", "content": MOODIFY_BATCH_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+def batch_max_tokens(items):
+    """Completion budget for a batch: each item's scaled budget plus JSON overhead"""
+    return min(MOODIFY_MAX_TOKENS_CAP * 4,
+               sum(scaled_max_tokens(text) + 16 for text, _ in items))
+
+def parse_moodify_batch_response(content, count):
+    """
+    Split a batch response into one output per input. Returns a list of length
+    count holding the transformed text, or None for items that are missing,
+    duplicated or malformed (those are retried individually).
+    """
+    outputs = [None] * count
+    content = (content or "").strip()
+    # Tolerate markdown fences or chatter around the array
+    start, end = content.find("["), content.rfind("]")
+    if start == -1 or end <= start:
+        return outputs
+    try:
+        parsed = json.loads(content[start:end + 1])
+    except ValueError:
+        return outputs
+    if not isinstance(parsed, list):
+        return outputs
+
+    seen = set()
+    for entry in parsed:
+        if not isinstance(entry, dict):
+            continue
+        item_id, text = entry.get("id"), entry.get("text")
+        if not isinstance(item_id, int) or not 0 <= item_id < count or not isinstance(text, str) or not text.strip():
+            continue
+        if item_id in seen:
+            outputs[item_id] = None  # ambiguous: retry it on its own
+            continue
+        seen.add(item_id)
+        outputs[item_id] = text
+    return outputs
+
+def start_moodify_batch(items, use_cache=True):
+    """
+    start_moodify for many items. Returns (results, originals, chunks): results
+    holds the finished result per item or None, and chunks groups the indices
+    that still need the LLM into lists of at most MOODIFY_BATCH_SIZE.
+    """
+    results, originals = [], []
+    for text, target_sentiment in items:
+        result, original_sentiment = start_moodify(text, target_sentiment, use_cache)
+        results.append(result)
+        originals.append(original_sentiment)
+
+    pending = [i for i, result in enumerate(results) if result is None]
+    size = max(1, MOODIFY_BATCH_SIZE)
+    chunks = [pending[i:i + size] for i in range(0, len(pending), size)]
+    return results, originals, chunks
+
+def finish_moodify_batch(items, originals, chunk, llm_output, results):
+    """
+    Verify and store the parsed outputs of one chunk's LLM response in results.
+    Returns the indices whose output could not be parsed.
+    """
+    outputs = parse_moodify_batch_response(llm_output, len(chunk))
+    unparsed = []
+    for index, output in zip(chunk, outputs):
+        if output is None:
+            unparsed.append(index)
+            continue
+        text, target_sentiment = items[index]
+        results[index] = finish_moodify(text, target_sentiment, originals[index], output)
+    return unparsed
+
+def moodify_batch(items, use_cache=True, timeout=60):
+    """
+    Transform many (text, target_sentiment) items, packing up to MOODIFY_BATCH_SIZE
+    of them into each LLM call. Every output is verified with TextBlob as in
+    moodify_text; items missing from a response are retried on their own, and
+    if a whole batch call fails its items use the word-replacement fallback.
+    Returns the results in input order.
+    """
+    deadline = Deadline(timeout)
+    results, originals, chunks = start_moodify_batch(items, use_cache)
+
+    for chunk in chunks:
+        chunk_items = [items[i] for i in chunk]
+        if client is None:
+            error, unparsed = "OpenAI client not available", []
+        else:
+            try:
+                response = llm_policy.call(lambda seconds: client.chat.completions.create(
+                    model=MOODIFY_MODEL,
+                    messages=build_moodify_batch_messages(chunk_items),
+                    max_tokens=batch_max_tokens(chunk_items),
+                    temperature=0.7,
+                    timeout=request_timeout(seconds)
+                ), deadline)
+                error = None
+                unparsed = finish_moodify_batch(items, originals, chunk, response.choices[0].message.content, results)
+            except Exception as e:
+                error, unparsed = str(e) or "Batch LLM call failed", []
+
+        for index in chunk:
+            if results[index] is not None:
+                continue
+            text, target_sentiment = items[index]
+            if index in unparsed:
+                results[index] = moodify_text(text, target_sentiment, use_cache, timeout=deadline.remaining())
+            else:
+                results[index] = moodify_fallback(text, target_sentiment, originals[index], error)
+    return results
 
 def fallback_word_replacement(text, target_sentiment, original_sentiment, error_message):
-    """Fallback method using simple word replacement if LLM fails"""
-    
-    # Simple word mappings as fallback
-    positive_words = {
-        'bad': 'good', 'terrible': 'wonderful', 'awful': 'amazing', 
-        'hate': 'love', 'dislike': 'like', 'horrible': 'fantastic',
-        'disappointed': 'pleased', 'frustrated': 'satisfied', 
-        'angry': 'happy', 'sad': 'joyful', 'upset': 'delighted',
-        'worst': 'best', 'failed': 'succeeded', 'problem': 'opportunity'
-    }
-    
-    negative_words = {
-        'good': 'bad', 'wonderful': 'terrible', 'amazing': 'awful',
-        'love': 'hate', 'like': 'dislike', 'fantastic': 'horrible',
-        'pleased': 'disappointed', 'satisfied': 'frustrated',
-        'happy': 'angry', 'joyful': 'sad', 'delighted': 'upset',
-        'best': 'worst', 'succeeded': 'failed', 'opportunity': 'problem'
-    }
-    
-    neutral_words = {
-        'love': 'like', 'hate': 'dislike', 'amazing': 'okay',
-        'terrible': 'mediocre', 'wonderful': 'decent', 'awful': 'poor',
-        'fantastic': 'fine', 'horrible': 'average'
-    }
-    
-    # Select word map based on target sentiment
-    if target_sentiment == "positive":
-        word_map = positive_words
-    elif target_sentiment == "negative":
-        word_map = negative_words
-    else:
-        word_map = neutral_words
-    
-    # Apply simple replacements
-    modified_text = text
+    """
+    Fallback used when the LLM fails or no API key is set: the offline rewrite
+    engine swaps lexicon words and phrases for their counterparts in the target
+    sentiment in one pass over the text (see rewrite_engine.py)
+    """
+    # Unknown targets are treated as neutral, as the old word lists did
+    target = target_sentiment if target_sentiment in ("positive", "negative") else "neutral"
+    modified_text, replacements = rewrite_engine.rewrite(text, target)
     changes_made = [f"Fallback method used (API error: {error_message})"]
-    
-    words = text.split()
-    new_words = []
-    
-    for word in words:
-        clean_word = re.sub(r'[^\w]', '', word.lower())
-        if clean_word in word_map:
-            replacement = word_map[clean_word]
-            if word[0].isupper():
-                replacement = replacement.capitalize()
-            
-            punctuation = re.findall(r'[^\w]', word)
-            if punctuation:
-                replacement += ''.join(punctuation)
-            
-            new_words.append(replacement)
-            changes_made.append(f"'{word}' → '{replacement}'")
-        else:
-            new_words.append(word)
-    
-    modified_text = ' '.join(new_words)
+    changes_made.extend(f"'{source}' → '{replacement}'" for source, replacement in replacements)
     
     # Analyze new sentiment
     new_sentiment = analyze_sentiment(modified_text)['sentiment']
@@ -276,38 +500,145 @@ def fallback_word_replacement(text, target_sentiment, original_sentiment, error_
         "message": f"Used fallback method. Result: {new_sentiment} sentiment"
     }
 
+def set_torch_threads(count):
+    """Size torch's intra-op thread pool (no-op without torch or for count < 1)"""
+    if HEAVY_MODELS_AVAILABLE and count > 0:
+        torch.set_num_threads(count)
+
 class EmotionAnalyzer:
-    def __init__(self):
+    MODEL_NAME = "bhadresh-savani/bert-base-go-emotion"
+
+    def __init__(self, backend=None, quantize=None):
+        """
+        backend selects how the model is executed: "pytorch" (eager, default),
+        "onnx" (ONNX Runtime CPU) or "torchscript". Defaults to EMOTION_BACKEND.
+        quantize="int8" loads dynamically quantized Linear layers instead of
+        fp32 weights. Defaults to EMOTION_QUANTIZE.
+        """
         if not HEAVY_MODELS_AVAILABLE:
             raise ImportError("Heavy models (transformers, torch) not available. Use LightweightEmotionAnalyzer instead.")
         
-        model_name = "bhadresh-savani/bert-base-go-emotion"
+        model_name = self.MODEL_NAME
+        self.backend_name = (backend or os.getenv("EMOTION_BACKEND", "pytorch")).lower()
+        self.precision = (quantize or os.getenv("EMOTION_QUANTIZE", "fp32")).lower()
         self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-        self.model = AutoModelForSequenceClassification.from_pretrained(model_name)
-        self.labels = self.model.config.id2label
+        self.backend = load_backend(self.backend_name, model_name, self.precision)
+        # Only the eager backend keeps the transformers model around
+        self.model = getattr(self.backend, "model", None)
+        self.labels = AutoConfig.from_pretrained(model_name).id2label
+        # Labels in output column order, for callers working on probability matrices
+        self.label_names = [self.labels[i] for i in range(len(self.labels))]
+        self.weights_bytes = self.backend.footprint_bytes()
+        # model_max_length is a huge sentinel for some tokenizers; BERT sees 512 tokens
+        self.max_tokens = min(getattr(self.tokenizer, "model_max_length", 512), 512)
+        # Backend and precision both change the scores, so both are part of the version
+        self.model_version = f"{model_name}:{self.backend_name}:{self.precision}"
+
+    def describe(self):
+        """Backend, precision and weight footprint of the loaded model"""
+        return {
+            "model": self.MODEL_NAME,
+            "backend": self.backend_name,
+            "precision": self.precision,
+            "weights_mb": round(self.weights_bytes / (1024 * 1024), 1)
+        }
 
     def analyze_emotion(self, text):
         inputs = self.tokenizer(text, return_tensors="pt", truncation=True)
-        with torch.no_grad():
-            outputs = self.model(**inputs)
-        probs = softmax(outputs.logits, dim=1)[0]
-
-        emotion_scores = {
-            self.labels[i]: round(float(probs[i]), 4)
-            for i in range(len(probs))
-            if float(probs[i]) > 0.01
-        }
+        probs = softmax(self.backend(inputs), dim=1)[0]
+        return self._format_probs(probs)
 
-        # Identify dominant emotion
-        dominant_idx = torch.argmax(probs).item()
-        dominant_emotion = self.labels[dominant_idx]
-        confidence = round(float(probs[dominant_idx]), 4)
+    def analyze_emotion_batch(self, texts, batch_size=32):
+        """
+        Analyze many texts with padded forward passes of up to batch_size texts.
+        Identical texts are only scored once; results are returned in input order.
+        """
+        unique_texts, index_map = dedupe_texts(texts)
+        unique_results = format_emotion_probs(self._batch_probs(unique_texts, batch_size), self.label_names)
+        return [dict(unique_results[i]) for i in index_map]
 
-        return {
-            "emotions": emotion_scores,
-            "dominant_emotion": dominant_emotion,
-            "confidence": confidence
+    def predict_probs(self, texts, batch_size=32):
+        """
+        Softmax probabilities as a float32 array of shape (len(texts), len(label_names)),
+        without formatting a result per text. Identical texts are only scored once.
+        """
+        unique_texts, index_map = dedupe_texts(texts)
+        probs = self._batch_probs(unique_texts, batch_size)
+        return probs[np.asarray(index_map, dtype=np.intp)]
+
+    def _batch_probs(self, texts, batch_size=32):
+        """
+        Softmax probabilities of texts in input order, as a float32 array.
+        Texts are batched by token count (see length_buckets.py), so each
+        batch is only padded to the longest of texts of about its length.
+        """
+        probs = np.zeros((len(texts), len(self.label_names)), dtype=np.float32)
+        if not texts:
+            return probs
+        # Counting tokens is a fast-tokenizer pass; the forward passes it shortens are what costs
+        budget = self.max_tokens - 2
+        # Texts over the budget are truncated to the same length, so they bucket together
+        lengths = [min(length, budget) for length in self.count_tokens(texts)]
+        for batch in length_sorted_batches(lengths, batch_size):
+            inputs = self.tokenizer([texts[i] for i in batch], return_tensors="pt", truncation=True, padding=True)
+            probs[batch] = softmax(self.backend(inputs), dim=1).numpy()
+        return probs
+
+    def count_tokens(self, texts):
+        """Token counts of texts, without the [CLS]/[SEP] special tokens"""
+        encoded = self.tokenizer(list(texts), add_special_tokens=False, verbose=False)
+        return [len(ids) for ids in encoded["input_ids"]]
+
+    def is_long(self, text):
+        """True when text has more tokens than the model can see at once"""
+        # A word piece covers at least one character, so short strings can't be long
+        budget = self.max_tokens - 2
+        return len(text) > budget and self.count_tokens([text])[0] > budget
+
+    def analyze_long_text(self, text, aggregation=None, include_segments=False, batch_size=32):
+        """
+        Score text of any length: it is split on sentence boundaries into
+        overlapping windows that fit the model (see long_text.py), the windows
+        run as padded batches of up to batch_size, and their probabilities are
+        combined with aggregation ("mean", "max" or "weighted"). With
+        include_segments, the first LONG_TEXT_MAX_SEGMENTS windows are returned
+        with their character offsets and scores.
+        """
+        aggregator = ProbabilityAggregator(aggregation)
+        budget = self.max_tokens - 2
+        windows = sentence_windows(text, self.count_tokens, budget, min(LONG_TEXT_OVERLAP_TOKENS, budget // 2))
+        segments = []
+        total_tokens = 0
+
+        for batch in batched(windows, batch_size):
+            inputs = self.tokenizer([text[start:end] for start, end, _ in batch],
+                                    return_tensors="pt", truncation=True, padding=True)
+            probs = softmax(self.backend(inputs), dim=1).numpy()
+            formatted = format_emotion_probs(probs, self.label_names) if include_segments else []
+            for i, ((start, end, tokens), row) in enumerate(zip(batch, probs)):
+                aggregator.add(row.tolist(), tokens)
+                total_tokens += tokens
+                if include_segments and len(segments) < LONG_TEXT_MAX_SEGMENTS:
+                    segments.append({"start": start, "end": end, "tokens": tokens, **formatted[i]})
+
+        if aggregator.count == 0:
+            # Nothing but whitespace
+            return self.analyze_emotion(text)
+
+        result = self._format_probs(torch.tensor(aggregator.result()))
+        result["long_text"] = {
+            "windows": aggregator.count,
+            "aggregation": aggregator.strategy,
+            "window_tokens": total_tokens
         }
+        if include_segments:
+            result["segments"] = segments
+            result["long_text"]["segments_truncated"] = aggregator.count > len(segments)
+        return result
+
+    def _format_probs(self, probs):
+        """Turn one row of softmax probabilities into the emotions response format"""
+        return format_emotion_probs(probs.numpy(), self.label_names)[0]
 
 
 class LightweightEmotionAnalyzer:
@@ -316,11 +647,16 @@ class LightweightEmotionAnalyzer:
     and maps it to common emotion categories. Uses much less memory than BERT models.
     """
     
+    # Identifies the VADER-to-emotion mapping in cache keys
+    model_version = "vader-emotion-map-1"
+    
     def __init__(self):
         if not VADER_AVAILABLE:
             raise ImportError("VADER sentiment not available. Install with: pip install vaderSentiment")
         
         self.analyzer = SentimentIntensityAnalyzer()
+        # Batches are scored with NumPy when it is installed, one text at a time otherwise
+        self.batch_scorer = VaderBatchScorer(self.analyzer) if VADER_BATCH_AVAILABLE else None
         
         # Map VADER scores to emotion categories
         self.emotion_mapping = {
@@ -338,13 +674,31 @@ class LightweightEmotionAnalyzer:
         Analyze emotion using VADER sentiment and map to emotion categories
         Returns format similar to BERT model for compatibility
         """
-        scores = self.analyzer.polarity_scores(text)
-        
+        return self._emotion_result(self.analyzer.polarity_scores(text))
+
+    def _emotion_result(self, scores):
+        """Build the analyze_emotion response from VADER polarity scores"""
         compound = scores['compound']
         pos = scores['pos']
         neg = scores['neg']
         neu = scores['neu']
+        emotion_scores, dominant_emotion, confidence = self.map_emotions(compound, pos, neg, neu)
         
+        return {
+            "emotions": emotion_scores,
+            "dominant_emotion": dominant_emotion,
+            "confidence": confidence,
+            "vader_scores": {
+                "compound": compound,
+                "positive": pos,
+                "negative": neg,
+                "neutral": neu
+            },
+            "analysis_type": "lightweight_vader"
+        }
+
+    def map_emotions(self, compound, pos, neg, neu):
+        """Map VADER scores to (emotion_scores, dominant_emotion, confidence)"""
         # Determine emotion category based on compound score and intensity
         if compound >= 0.5:
             category = 'positive_high'
@@ -393,15 +747,16 @@ class LightweightEmotionAnalyzer:
             dominant_emotion = 'neutral'
             confidence = 0.5
         
-        return {
-            "emotions": emotion_scores,
-            "dominant_emotion": dominant_emotion,
-            "confidence": confidence,
-            "vader_scores": {
-                "compound": compound,
-                "positive": pos,
-                "negative": neg,
-                "neutral": neu
-            },
-            "analysis_type": "lightweight_vader"
-        }
+        return emotion_scores, dominant_emotion, confidence
+
+    def polarity_scores_batch(self, texts):
+        """VADER polarity_scores dicts for texts, in input order"""
+        if self.batch_scorer is not None:
+            return self.batch_scorer.polarity_scores(texts)
+        return [self.analyzer.polarity_scores(text) for text in texts]
+
+    def analyze_emotion_batch(self, texts):
+        """Analyze many texts, scoring identical ones once and keeping input order"""
+        unique_texts, index_map = dedupe_texts(texts)
+        unique_results = [self._emotion_result(scores) for scores in self.polarity_scores_batch(unique_texts)]
+        return [dict(unique_results[i]) for i in index_map]
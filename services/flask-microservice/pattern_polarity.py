@@ -0,0 +1,190 @@
+"""
+TextBlob-compatible polarity and subjectivity without building TextBlobs.
+
+TextBlob(text).sentiment goes through PatternAnalyzer, which creates a new
+namedtuple class on every call, looks each token up in a lazily loaded dict
+of part-of-speech dicts and scans every emoticon set for each short token.
+PolarityEngine loads the same lexicon once into a flat dict of
+(polarity, subjectivity, intensity, is_modifier) per word and a single
+lowercased emoticon table, then replays PatternAnalyzer's rules over the
+tokens:
+
+- a known word starts an assessment with the word's scores
+- an adverb ("very", "really", "-ly" words) multiplies the next known word's
+  scores by its intensity ("very good")
+- a negation ("not", "never", "no", "n't") flips and halves the next
+  assessment, also across short words ("not a good"); a negation after a
+  "-ly" modifier negates the modified word ("really not good")
+- "!" boosts the previous assessment, "(!)" marks irony and emoticons count
+  as assessments of their own
+
+Polarity and subjectivity are the means over the assessments, summed in the
+same order as TextBlob sums them, so the numbers are the same.
+
+The tokenizer is pattern's find_tokens, with its literal regex substitutions
+done as str.replace.
+"""
+
+import re
+
+from textblob.en import sentiment as pattern_sentiment
+from textblob._text import (ABBREVIATIONS, EMOTICONS, EOS, PUNCTUATION, RE_ABBR1, RE_ABBR2, RE_ABBR3,
+                            RE_EMOTICONS, RE_SARCASM, replacements)
+
+# find_tokens splits periods from words separately from the other punctuation marks
+_LEADING_PUNCTUATION = tuple(PUNCTUATION.replace(".", ""))
+_TRAILING_PUNCTUATION = _LEADING_PUNCTUATION + (".",)
+_SENTENCE_ENDS = ("...", ".", "!", "?", EOS)
+_SENTENCE_TAILS = ("'", '"', "”", "’", "...", ".", "!", "?", ")", EOS)
+_QUOTES = (("“", " “ "), ("”", " ” "), ("‘", " ‘ "), ("’", " ’ "), ("'", " ' "), ('"', ' " '))
+_LINEBREAKS = re.compile(r"\n{2,}")
+_WHITESPACE = re.compile(r"\s+")
+_TOKEN = re.compile(r"(\S+)\s")
+
+
+def _is_abbreviation(token):
+    return (token in ABBREVIATIONS or RE_ABBR1.match(token) is not None
+            or RE_ABBR2.match(token) is not None or RE_ABBR3.match(token) is not None)
+
+
+def find_tokens(string):
+    """pattern's find_tokens: the lowercased words and punctuation marks of string, in order"""
+    # The contraction keys are plain strings, so replacing them is what re.sub did with them
+    for contraction, spaced in replacements.items():
+        string = string.replace(contraction, spaced)
+    for quote, spaced in _QUOTES:
+        string = string.replace(quote, spaced)
+    string = string.replace("\r\n", "\n")
+    string = _LINEBREAKS.sub(" %s " % EOS, string)
+    string = _WHITESPACE.sub(" ", string)
+
+    tokens = []
+    for t in _TOKEN.findall(string + " "):
+        tail = []
+        while t.startswith(_LEADING_PUNCTUATION) and t not in replacements:
+            tokens.append(t[0])
+            t = t[1:]
+        while t.endswith(_TRAILING_PUNCTUATION) and t not in replacements:
+            if t.endswith(_LEADING_PUNCTUATION):
+                tail.append(t[-1])
+                t = t[:-1]
+            if t.endswith("..."):
+                tail.append("...")
+                t = t[:-3].rstrip(".")
+            if t.endswith("."):
+                if _is_abbreviation(t):
+                    break
+                tail.append(t[-1])
+                t = t[:-1]
+        if t != "":
+            tokens.append(t)
+        tokens.extend(reversed(tail))
+
+    # Sarcasm marks and emoticons are joined back up within each sentence
+    sentences, i, j = [[]], 0, 0
+    while j < len(tokens):
+        if tokens[j] in _SENTENCE_ENDS:
+            while j < len(tokens) and tokens[j] in _SENTENCE_TAILS:
+                if tokens[j] in ("'", '"') and sentences[-1].count(tokens[j]) % 2 == 0:
+                    break
+                j += 1
+            sentences[-1].extend(t for t in tokens[i:j] if t != EOS)
+            sentences.append([])
+            i = j
+        j += 1
+    sentences[-1].extend(tokens[i:j])
+
+    words = []
+    for sentence in sentences:
+        if sentence:
+            sentence = RE_SARCASM.sub("(!)", " ".join(sentence))
+            sentence = RE_EMOTICONS.sub(lambda m: m.group(1).replace(" ", "") + m.group(2), sentence)
+            words.extend(sentence.lower().split())
+    return words
+
+
+class PolarityEngine:
+    """TextBlob's (polarity, subjectivity) for one text or many, from a lexicon compiled once"""
+
+    def __init__(self, lexicon=pattern_sentiment):
+        # len() makes the lazy dict load the XML lexicon
+        len(lexicon)
+        self.negations = frozenset(lexicon.negations)
+        self.modifier = lexicon.modifier
+        # Untagged text is scored with the scores averaged over all of a word's part-of-speech tags
+        self.words = {
+            word: (*tags[None][:3], any(tag in tags for tag in lexicon.modifiers))
+            for word, tags in dict.items(lexicon)
+            if None in tags
+        }
+        # PatternAnalyzer only tries emoticons on short tokens that are not all letters or punctuation;
+        # the first emoticon set (in EMOTICONS order) holding the token wins
+        self.emoticons = {}
+        for (_, polarity), emoticons in EMOTICONS.items():
+            for emoticon in emoticons:
+                token = emoticon.lower()
+                if token.isalpha() is False and len(token) <= 5 and token not in PUNCTUATION:
+                    self.emoticons.setdefault(token, polarity)
+
+    def assessments(self, words):
+        """[polarity, subjectivity] of each assessed word or phrase in words, as PatternAnalyzer assesses them"""
+        words_lexicon, negations, emoticons = self.words, self.negations, self.emoticons
+        # Each assessment is [polarity, subjectivity, intensity, negated]
+        a = []
+        m = None  # preceding modifier word ("really")
+        n = None  # preceding negation ("not")
+        for w in words:
+            entry = words_lexicon.get(w)
+            if entry is not None:
+                p, s, i, is_modifier = entry
+                if m is None:
+                    a.append([p, s, i, False])
+                else:
+                    # The modifier's assessment takes this word's scores times the modifier's intensity
+                    last = a[-1]
+                    last[0] = max(-1.0, min(p * last[2], +1.0))
+                    last[1] = max(-1.0, min(s * last[2], +1.0))
+                    last[2] = i
+                if n is not None:
+                    a[-1][2] = 1.0 / a[-1][2]
+                    a[-1][3] = True
+                m = w if is_modifier else None
+                n = w if w in negations else None
+                continue
+
+            if w in negations:
+                n = w
+            elif n and len(w.strip("'")) > 1:
+                # Negations only carry across one-letter words ("not a good")
+                n = None
+            if n is not None and m is not None and self.modifier(m):
+                a[-1][3] = True
+                n = None
+            elif m and len(w) > 2:
+                m = None
+            if w == "!" and a:
+                a[-1][0] = max(-1.0, min(a[-1][0] * 1.25, +1.0))
+            if w == "(!)":
+                a.append([0.0, 1.0, 1.0, False])
+            polarity = emoticons.get(w)
+            if polarity is not None:
+                a.append([polarity, 1.0, 1.0, False])
+        # "not good" is slightly bad, "not bad" slightly good
+        return [(p * -0.5 if negated else p, s) for p, s, _, negated in a]
+
+    def sentiment(self, text):
+        """(polarity, subjectivity) of text, as TextBlob(text).sentiment"""
+        a = self.assessments(find_tokens(text))
+        count = float(len(a) or 1)
+        return sum(p for p, _ in a) / count, sum(s for _, s in a) / count
+
+    def sentiment_batch(self, texts):
+        """(polarity, subjectivity) of each text, in input order; identical texts are only scored once"""
+        scores = {}
+        results = []
+        for text in texts:
+            score = scores.get(text)
+            if score is None:
+                score = scores[text] = self.sentiment(text)
+            results.append(score)
+        return results
@@ -0,0 +1,327 @@
+"""
+Offline rewrite engine for moodify, used when the LLM is unavailable.
+
+The lexicon is a list of sentiment scales. Each scale lists words and phrases
+for one idea ("bad" -> "terrible", "sad" -> "devastated", ...) in three
+intensity tiers per polarity, plus neutral wordings. The first entry of a tier
+is what gets written; every entry is matched. Rewriting replaces a phrase with
+the same idea in the target polarity, at the source phrase's tier or at a
+requested intensity.
+
+Every phrase is compiled into one regex whose alternation is factored as a
+trie. At each position the regex only follows the branch matching the next
+character, so a scan costs O(len(text) x longest phrase) no matter how big the
+lexicon gets, and the longest phrase wins ("not bad" before "bad").
+Matches keep the source's capitalisation and the punctuation around them is
+never touched. An "a"/"an" before a rewritten phrase is fixed up as well.
+Phrases in KEEP are matched but never rewritten, so that e.g. the "like" in
+"looks like" is not taken for the verb.
+"""
+
+import os
+import re
+
+INTENSITIES = ("mild", "moderate", "strong")
+TARGETS = ("positive", "negative", "neutral")
+
+# Tier used when the source is neutral and no intensity is requested
+DEFAULT_TIER = 1
+
+
+def offline_intensity(value):
+    """value if it is "match" or one of INTENSITIES, else "match" with a warning"""
+    value = value.lower()
+    if value != "match" and value not in INTENSITIES:
+        print(f"⚠️  Unknown MOODIFY_OFFLINE_INTENSITY '{value}', using 'match' "
+              f"(choose match, {', '.join(INTENSITIES)})")
+        return "match"
+    return value
+
+
+# "match" keeps each phrase's own tier; otherwise one of INTENSITIES. Checked here rather
+# than per call: the offline engine is the last-resort path and must not fail on bad config
+MOODIFY_OFFLINE_INTENSITY = offline_intensity(os.getenv("MOODIFY_OFFLINE_INTENSITY", "match"))
+
+# negative / positive: (mild, moderate, strong) tiers; neutral: a flat tuple,
+# empty when the idea has no neutral wording (the phrase is then left alone)
+LEXICON = [
+    {   # quality
+        "negative": (("mediocre", "subpar", "not great", "not good", "lackluster", "underwhelming"),
+                     ("bad", "poor", "lousy", "inferior", "substandard", "crummy", "not good at all",
+                      "not great at all"),
+                     ("terrible", "awful", "horrible", "dreadful", "atrocious", "abysmal", "appalling",
+                      "horrendous", "pathetic")),
+        "neutral": ("so-so", "unremarkable"),
+        "positive": (("fine", "decent", "not bad", "not bad at all", "acceptable", "respectable"),
+                     ("good", "great", "nice", "lovely", "pleasant"),
+                     ("wonderful", "excellent", "amazing", "fantastic", "outstanding", "superb", "brilliant",
+                      "incredible", "awesome", "marvelous", "marvellous", "spectacular", "phenomenal")),
+    },
+    {   # happiness
+        "negative": (("unhappy", "glum", "down in the dumps"),
+                     ("sad", "upset", "gloomy", "sorrowful", "unhappy about it"),
+                     ("miserable", "devastated", "heartbroken", "depressed", "distraught", "crushed")),
+        "neutral": ("unmoved",),
+        "positive": (("cheerful", "in good spirits", "upbeat"),
+                     ("happy", "glad", "joyful"),
+                     ("delighted", "thrilled", "ecstatic", "overjoyed", "elated", "over the moon",
+                      "on cloud nine")),
+    },
+    {   # frustration / satisfaction
+        "negative": (("annoyed", "irritated", "bothered"),
+                     ("frustrated", "angry", "mad", "fed up", "disappointed", "let down", "displeased"),
+                     ("outraged", "furious", "livid", "enraged", "disgusted", "infuriated")),
+        "neutral": ("unbothered", "indifferent"),
+        "positive": (("satisfied", "relieved", "at ease"),
+                     ("pleased", "thankful", "appreciative"),
+                     ("impressed", "grateful", "blown away")),
+    },
+    {   # liking
+        "negative": (("dislike", "don't like", "do not like", "don't enjoy", "do not enjoy"),
+                     ("hate", "can't stand", "cannot stand", "resent"),
+                     ("really hate", "loathe", "despise", "detest", "abhor")),
+        "neutral": ("don't mind", "do not mind", "tolerate"),
+        "positive": (("enjoy", "appreciate", "really like", "like"),
+                     ("love", "really enjoy"),
+                     ("absolutely love", "adore", "cherish")),
+    },
+    {   # outcome
+        "negative": (("fell behind", "struggled", "stumbled"),
+                     ("failed", "fell short", "missed the mark"),
+                     ("failed miserably", "flopped", "bombed", "fell apart")),
+        "neutral": ("concluded",),
+        "positive": (("did fine", "managed well", "coped well", "got through"),
+                     ("did great", "did well", "succeeded", "came through"),
+                     ("did brilliantly", "triumphed", "excelled", "thrived", "nailed it")),
+    },
+    {   # comparison
+        "negative": (("slightly worse", "not as good"),
+                     ("worse",),
+                     ("much worse", "far worse", "way worse")),
+        "neutral": ("different", "about the same"),
+        "positive": (("slightly better", "a bit better"),
+                     ("better",),
+                     ("much better", "far better", "way better")),
+    },
+    {   # ranking
+        "negative": (("weakest", "lowest"), ("worst",), ("very worst", "absolute worst")),
+        "neutral": ("most typical",),
+        "positive": (("second best", "strongest"), ("best",), ("very best", "absolute best")),
+    },
+    {   # setbacks
+        "negative": (("small problem", "hiccup", "snag", "glitch"),
+                     ("failure", "problem", "setback", "mistake"),
+                     ("disaster", "catastrophe", "nightmare", "fiasco", "train wreck", "total failure")),
+        "neutral": ("situation",),
+        "positive": (("good lesson", "learning experience"),
+                     ("great opportunity", "opportunity", "advantage"),
+                     ("huge success", "success", "breakthrough", "blessing", "triumph")),
+    },
+    {   # luck
+        "negative": (("unfortunately", "regrettably"),
+                     ("sadly", "unluckily"),
+                     ("disastrously", "tragically")),
+        "neutral": ("as it happens", "incidentally"),
+        "positive": (("fortunately", "thankfully"),
+                     ("luckily", "happily"),
+                     ("wonderfully", "gloriously")),
+    },
+    {   # difficulty
+        "negative": (("awkward", "tricky", "inconvenient"),
+                     ("difficult", "tough", "complicated", "stressful"),
+                     ("impossible", "unbearable", "exhausting", "overwhelming")),
+        "neutral": ("demanding",),
+        "positive": (("straightforward", "manageable", "doable"),
+                     ("easy", "smooth", "convenient"),
+                     ("very easy", "effortless", "a breeze", "a piece of cake")),
+    },
+    {   # interest
+        "negative": (("dull", "tedious", "monotonous"),
+                     ("boring", "uninteresting", "bland"),
+                     ("unbearably boring", "mind-numbing", "excruciating")),
+        "neutral": ("uneventful", "quiet"),
+        "positive": (("interesting", "engaging", "enjoyable"),
+                     ("exciting", "fun", "entertaining"),
+                     ("thrilling", "exhilarating", "captivating", "fascinating")),
+    },
+    {   # worry
+        "negative": (("tense", "uneasy", "nervous"),
+                     ("afraid", "worried", "anxious", "scared", "stressed"),
+                     ("fearful", "terrified", "petrified", "panicked", "horrified")),
+        "neutral": ("unsure", "uncertain"),
+        "positive": (("calm", "hopeful", "reassured"),
+                     ("confident", "optimistic"),
+                     ("totally confident", "fearless")),
+    },
+    {   # value
+        "negative": (("not worth it", "overpriced"),
+                     ("useless", "pointless", "a waste of time", "a waste of money"),
+                     ("worthless", "a complete waste of time", "a total waste of time", "a complete waste")),
+        "neutral": (),
+        "positive": (("worthwhile", "worth it"),
+                     ("well worth it", "valuable", "useful"),
+                     ("worth every penny", "invaluable", "priceless")),
+    },
+    {   # praise / criticism
+        "negative": (("criticize", "criticise", "complain about"),
+                     ("blame", "condemn"),
+                     ("lambaste", "tear apart", "rip apart")),
+        "neutral": ("remarked on", "commented on"),
+        "positive": (("appreciate the effort on", "acknowledge"),
+                     ("praise", "commend"),
+                     ("celebrate", "rave about")),
+    },
+    {   # rudeness
+        "negative": (("a bit rude", "unfriendly", "curt", "brusque"),
+                     ("rude", "unhelpful", "impolite", "disrespectful"),
+                     ("hostile", "obnoxious", "insulting", "abusive")),
+        "neutral": ("businesslike", "reserved"),
+        "positive": (("courteous", "polite", "friendly enough"),
+                     ("friendly", "helpful", "considerate"),
+                     ("wonderfully kind", "incredibly helpful", "gracious", "warm-hearted")),
+    },
+    {   # mess
+        "negative": (("messy", "untidy", "cluttered"),
+                     ("dirty", "broken", "damaged"),
+                     ("filthy", "disgusting", "ruined", "wrecked")),
+        "neutral": ("lived-in",),
+        "positive": (("tidy", "neat", "presentable"),
+                     ("clean", "fresh", "intact"),
+                     ("flawless", "spotless", "pristine", "immaculate")),
+    },
+]
+
+# Matched like lexicon phrases (the longest match wins) but left as they are
+KEEP = ("look like", "looks like", "looked like", "looking like", "feel like", "feels like", "felt like",
+        "seem like", "seems like", "seemed like", "sound like", "sounds like", "sounded like",
+        "just like", "would like", "'d like")
+
+_WORD_RE = re.compile(r"\w")
+
+
+def match_case(source, replacement):
+    """Give replacement the capitalisation of source (ALL CAPS, Capitalised or lower)"""
+    letters = [c for c in source if c.isalpha()]
+    if len(letters) > 1 and all(c.isupper() for c in letters):
+        return replacement.upper()
+    if source[:1].isupper():
+        return replacement[:1].upper() + replacement[1:]
+    return replacement
+
+
+def _normalize(phrase):
+    return " ".join(phrase.lower().replace("’", "'").split())
+
+
+def _char_pattern(char):
+    if char == " ":
+        return r"\s+"
+    if char == "'":
+        return "['’]"
+    return re.escape(char)
+
+
+def _trie_pattern(node):
+    """Regex for the phrases under a trie node; optional branches are greedy, so the longest match wins"""
+    branches = [_char_pattern(char) + _trie_pattern(child) for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if "" in node:
+        if len(branches) == 1:
+            body = "(?:" + body + ")"
+        return body + "?"
+    return body
+
+
+class RewriteEngine:
+    """Single-pass phrase rewriter compiled from a list of sentiment scales"""
+
+    def __init__(self, lexicon=None, keep=KEEP):
+        self.scales = LEXICON if lexicon is None else lexicon
+        # phrase -> (scale index, polarity, tier); tier is None for neutral phrases,
+        # scale index is None for KEEP phrases
+        entries = [(phrase, None, None, None) for phrase in keep]
+        for scale_id, scale in enumerate(self.scales):
+            entries.extend((phrase, scale_id, "neutral", None) for phrase in scale["neutral"])
+            for polarity in ("negative", "positive"):
+                if len(scale[polarity]) != len(INTENSITIES):
+                    raise ValueError(f"Scale {scale_id} needs {len(INTENSITIES)} {polarity} tiers")
+                for tier, phrases in enumerate(scale[polarity]):
+                    entries.extend((phrase, scale_id, polarity, tier) for phrase in phrases)
+
+        self.index = {}
+        trie = {}
+        for phrase, scale_id, polarity, tier in entries:
+            key = _normalize(phrase)
+            if key in self.index:
+                raise ValueError(f"Phrase {phrase!r} appears in the lexicon twice")
+            self.index[key] = (scale_id, polarity, tier)
+            node = trie
+            for char in key:
+                node = node.setdefault(char, {})
+            node[""] = True
+
+        self.pattern = re.compile(r"\b(?:(?P<article>an?)\s+)?(?P<phrase>" + _trie_pattern(trie) + r")\b",
+                                  re.IGNORECASE)
+
+    def __len__(self):
+        return len(self.index)
+
+    def replacement(self, phrase, target_sentiment, intensity="match"):
+        """Lower-case replacement for a lexicon phrase, or None when it should stay as it is"""
+        scale_id, polarity, tier = self.index[_normalize(phrase)]
+        if scale_id is None:
+            return None
+        scale = self.scales[scale_id]
+        if target_sentiment == "neutral":
+            if polarity == "neutral" or not scale["neutral"]:
+                return None
+            return scale["neutral"][0]
+
+        if intensity != "match":
+            tier = INTENSITIES.index(intensity)
+        elif polarity == target_sentiment:
+            return None
+        elif tier is None:
+            tier = DEFAULT_TIER
+        replacement = scale[target_sentiment][tier][0]
+        return None if replacement == _normalize(phrase) else replacement
+
+    def rewrite(self, text, target_sentiment, intensity=None):
+        """
+        Rewrite every lexicon phrase in text toward target_sentiment.
+        intensity is "match" (keep each phrase's tier) or one of INTENSITIES and
+        defaults to MOODIFY_OFFLINE_INTENSITY. Returns (new_text, changes) where
+        changes lists (original, replacement) pairs in order.
+        """
+        if target_sentiment not in TARGETS:
+            raise ValueError(f"target_sentiment must be one of {', '.join(TARGETS)}")
+        intensity = intensity or MOODIFY_OFFLINE_INTENSITY
+        if intensity != "match" and intensity not in INTENSITIES:
+            raise ValueError(f"intensity must be 'match' or one of {', '.join(INTENSITIES)}")
+
+        changes = []
+
+        def substitute(match):
+            source = match.group("phrase")
+            replacement = self.replacement(source, target_sentiment, intensity)
+            if replacement is None:
+                return match.group(0)
+            replacement = match_case(source, replacement)
+            changes.append((source, replacement))
+
+            article = match.group("article")
+            if article is None:
+                return replacement
+            if replacement.startswith("a ") or replacement.lower().startswith("an "):
+                # The replacement brings its own article ("a breeze")
+                return match_case(article, replacement)
+            fixed = "an" if replacement[:1].lower() in "aeiou" else "a"
+            space = match.group(0)[len(article):match.start("phrase") - match.start()]
+            return match_case(article, fixed) + space + replacement
+
+        return self.pattern.sub(substitute, text), changes
+
+
+rewrite_engine = RewriteEngine()
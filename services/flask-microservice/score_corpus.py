@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+"""
+Score a CSV or JSONL corpus offline, without the web stack
+
+Rows are read lazily, grouped into chunks and scored on a process pool where
+every process loads its own copy of the model, so throughput grows with the
+number of cores. Results are appended to a JSONL file in input order, one line
+per row ({"row", "id", "<model>": {...}} or {"row", "id", "error"}). With an
+output ending in .parquet or .arrow, results are written in columns instead
+(see columnar.py) to numbered part files in that directory.
+
+Progress is checkpointed to <output>.checkpoint. Running the same command
+again after an interruption truncates anything written after the last
+checkpoint and carries on from there; use --restart to start over.
+
+Usage:
+    python score_corpus.py reviews.csv scores.jsonl --text-column body --id-column review_id
+    python score_corpus.py tweets.jsonl scores.jsonl --model heavy --processes 4
+    python score_corpus.py tweets.jsonl scores.parquet --model heavy
+"""
+
+import argparse
+import csv
+import json
+import multiprocessing
+import re
+import sys
+import os
+import time
+from collections import deque
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import columnar
+from long_text import batched
+from model import (HEAVY_MODELS_AVAILABLE, VADER_AVAILABLE, EmotionAnalyzer, LightweightEmotionAnalyzer,
+                   analyze_sentiment_batch)
+
+MODELS = ("textblob", "lightweight", "heavy")
+OUTPUT_FORMATS = ("jsonl",) + columnar.FORMATS
+DEFAULT_CHUNK_SIZE = 500
+# Rows per part file of columnar output; a checkpoint is written as each part is finished
+DEFAULT_PART_ROWS = 100000
+# Minimum seconds between checkpoints of JSONL output; one is always written when the run stops
+CHECKPOINT_INTERVAL = 5.0
+
+# The analyzer of this worker process (None for TextBlob), set by _init_worker
+_analyzer = None
+
+
+def load_analyzer(model):
+    if model == "textblob":
+        return None
+    if model == "lightweight":
+        return LightweightEmotionAnalyzer()
+    return EmotionAnalyzer()
+
+
+def _init_worker(model, threads):
+    global _analyzer
+    if model == "heavy" and threads:
+        import torch
+        # One intra-op thread pool per process; oversubscribing the cores slows every process down
+        torch.set_num_threads(threads)
+    _analyzer = load_analyzer(model)
+
+
+def score_texts(model, texts):
+    if model == "textblob":
+        return analyze_sentiment_batch(texts)
+    return _analyzer.analyze_emotion_batch(texts)
+
+
+def find_failures(score, rows):
+    """Score the valid rows one at a time; {row: exception} for the ones that fail"""
+    failures = {}
+    for number, _, text, error in rows:
+        if error is None:
+            try:
+                score([text])
+            except Exception as e:
+                failures[number] = e
+    return failures
+
+
+def score_chunk(model, rows, output_format="jsonl"):
+    """
+    Score (row, id, text, error) tuples. Returns the chunk's output (encoded
+    JSONL lines or an Arrow RecordBatch) and its error count.
+    """
+    if output_format != "jsonl":
+        return score_chunk_columns(model, rows)
+
+    valid = [row for row in rows if row[3] is None]
+    results = {}
+    try:
+        results = dict(zip((row[0] for row in valid), score_texts(model, [row[2] for row in valid])))
+    except Exception:
+        # Find the rows that fail instead of losing the whole chunk
+        for number, _, text, _ in valid:
+            try:
+                results[number] = score_texts(model, [text])[0]
+            except Exception as e:
+                results[number] = e
+
+    lines = []
+    errors = 0
+    for number, item_id, _, error in rows:
+        result = results.get(number, error)
+        if isinstance(result, dict):
+            record = {"row": number, "id": item_id, model: result}
+        else:
+            errors += 1
+            record = {"row": number, "id": item_id, "error": str(result) or "Scoring failed"}
+        lines.append(json.dumps(record, ensure_ascii=False))
+    return ("\n".join(lines) + "\n").encode("utf-8"), errors
+
+
+def score_chunk_columns(model, rows):
+    numbers, ids, texts, errors = (list(column) for column in zip(*rows))
+    try:
+        batch = columnar.score_batch(model, _analyzer, texts, ids, errors, rows=numbers)
+    except Exception:
+        failures = find_failures(lambda chunk: columnar.score_columns(model, _analyzer, chunk), rows)
+        errors = [str(failures[number]) or "Scoring failed" if number in failures else error
+                  for number, error in zip(numbers, errors)]
+        batch = columnar.score_batch(model, _analyzer, texts, ids, errors, rows=numbers)
+    return batch, sum(error is not None for error in errors)
+
+
+def detect_format(path):
+    return "csv" if path.lower().endswith((".csv", ".tsv")) else "jsonl"
+
+
+def read_rows(path, input_format, text_column="text", id_column="id"):
+    """Yield (row, id, text, error) for each record of a CSV or JSONL file; error is None for valid rows"""
+    with open(path, encoding="utf-8", newline="") as f:
+        if input_format == "csv":
+            csv.field_size_limit(min(sys.maxsize, 2 ** 31 - 1))
+            reader = csv.DictReader(f, delimiter="\t" if path.lower().endswith(".tsv") else ",")
+            if text_column not in (reader.fieldnames or []):
+                raise ValueError(f"Column '{text_column}' not found in {path}")
+            for number, item in enumerate(reader, start=1):
+                text = item.get(text_column)
+                yield number, item.get(id_column), text, None if text else "Missing text"
+            return
+
+        for number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+            except ValueError:
+                yield number, None, None, "Invalid JSON"
+                continue
+            if not isinstance(item, dict):
+                yield number, None, None, "Each line must be a JSON object"
+                continue
+            text = item.get(text_column)
+            if isinstance(text, str) and text:
+                yield number, item.get(id_column), text, None
+            else:
+                yield number, item.get(id_column), None, f"Each line must have a string '{text_column}'"
+
+
+def detect_output_format(path):
+    extension = os.path.splitext(path.rstrip("/"))[1].lower()
+    return {".parquet": "parquet", ".arrow": "arrow", ".feather": "arrow"}.get(extension, "jsonl")
+
+
+class JsonlSink:
+    """Appends JSONL chunks to a file; its position is the file's length"""
+
+    def __init__(self, path, position):
+        self.file = open(path, "a+b")
+        # Drop anything written after the last checkpoint (a chunk cut off mid-write)
+        self.file.truncate(position)
+        self.position = position
+        self.last_commit = time.monotonic()
+
+    def write(self, data):
+        self.file.write(data)
+        self.position += len(data)
+
+    def due(self):
+        return time.monotonic() - self.last_commit >= CHECKPOINT_INTERVAL
+
+    def commit(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.last_commit = time.monotonic()
+        return self.position
+
+    def close(self):
+        self.file.close()
+
+
+class PartSink:
+    """
+    Writes RecordBatches to numbered Arrow or Parquet part files in a
+    directory; its position is the number of finished parts. A part is
+    written under a temporary name and renamed once it is complete.
+    """
+    PART_RE = re.compile(r"^part-(\d+)\.(?:arrow|parquet)(?:\.tmp)?$")
+
+    def __init__(self, directory, output_format, position, part_rows=DEFAULT_PART_ROWS):
+        os.makedirs(directory, exist_ok=True)
+        # Drop parts written after the last checkpoint, and any left half-written
+        for name in os.listdir(directory):
+            match = self.PART_RE.match(name)
+            if match and (name.endswith(".tmp") or int(match.group(1)) >= position):
+                os.remove(os.path.join(directory, name))
+        self.directory = directory
+        self.output_format = output_format
+        self.position = position
+        self.part_rows = part_rows
+        self.writer = None
+        self.rows = 0
+
+    def part_path(self):
+        return os.path.join(self.directory, f"part-{self.position:05d}.{self.output_format}")
+
+    def write(self, batch):
+        if self.writer is None:
+            self.writer = columnar.ColumnarWriter(self.part_path() + ".tmp", self.output_format)
+        self.writer.write(batch)
+        self.rows += batch.num_rows
+
+    def due(self):
+        return self.rows >= self.part_rows
+
+    def commit(self):
+        if self.writer is not None:
+            self.writer.close()
+            with open(self.writer.path, "rb") as f:
+                os.fsync(f.fileno())
+            os.replace(self.writer.path, self.part_path())
+            self.writer = None
+            self.rows = 0
+            self.position += 1
+        return self.position
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def output_exists(path):
+    if os.path.isdir(path):
+        return bool(os.listdir(path))
+    return os.path.exists(path) and os.path.getsize(path) > 0
+
+
+class Checkpoint:
+    """How many rows are durably written to the output, stored next to it"""
+
+    def __init__(self, output_path, settings):
+        self.path = output_path.rstrip("/") + ".checkpoint"
+        self.settings = settings
+        self.rows = 0
+        # Byte length of JSONL output, or the number of finished part files
+        self.position = 0
+        self.errors = 0
+
+    def load(self):
+        """Pick up a previous run's progress; False if there is none"""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                saved = json.load(f)
+        except FileNotFoundError:
+            return False
+        if saved["settings"] != self.settings:
+            raise ValueError(f"{self.path} was written with different settings {saved['settings']}; "
+                             f"use --restart to start over")
+        self.rows, self.position, self.errors = saved["rows"], saved["position"], saved["errors"]
+        return True
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"settings": self.settings, "rows": self.rows, "position": self.position,
+                       "errors": self.errors}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+
+def score_corpus(input_path, output_path, model="lightweight", processes=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                 text_column="text", id_column="id", input_format=None, output_format=None, limit=None,
+                 restart=False, threads_per_process=None, part_rows=DEFAULT_PART_ROWS, log=print):
+    """
+    Score input_path into output_path, resuming from its checkpoint unless
+    restart is set. limit caps the rows scored by this run. Returns a summary
+    dict with the total rows and errors in the output.
+    """
+    output_format = output_format or detect_output_format(output_path)
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"output format must be one of {', '.join(OUTPUT_FORMATS)}")
+    if output_format != "jsonl" and not columnar.PYARROW_AVAILABLE:
+        raise RuntimeError("pyarrow not installed")
+    if model not in MODELS:
+        raise ValueError(f"model must be one of {', '.join(MODELS)}")
+    if model == "heavy" and not HEAVY_MODELS_AVAILABLE:
+        raise RuntimeError("torch/transformers not installed")
+    if model == "lightweight" and not VADER_AVAILABLE:
+        raise RuntimeError("vaderSentiment not installed")
+
+    input_format = input_format or detect_format(input_path)
+    processes = processes or os.cpu_count() or 1
+    threads_per_process = threads_per_process or max(1, (os.cpu_count() or 1) // processes)
+    checkpoint = Checkpoint(output_path, {"input": os.path.abspath(input_path), "model": model,
+                                          "text_column": text_column, "id_column": id_column,
+                                          "output_format": output_format})
+    if not restart and checkpoint.load():
+        log(f"↩️  Resuming after row {checkpoint.rows} ({checkpoint.errors} errors so far)")
+    elif not restart and output_exists(output_path):
+        raise ValueError(f"{output_path} already exists without a checkpoint; use --restart to overwrite it")
+
+    rows = read_rows(input_path, input_format, text_column, id_column)
+    for _ in range(checkpoint.rows):
+        next(rows, None)
+    if limit is not None:
+        rows = (row for _, row in zip(range(limit), rows))
+
+    if output_format == "jsonl":
+        sink = JsonlSink(output_path, checkpoint.position)
+    else:
+        sink = PartSink(output_path, output_format, checkpoint.position, part_rows)
+
+    start = time.monotonic()
+    scored = 0
+    # Rows and errors written since the last checkpoint
+    unsaved = [0, 0]
+    context = multiprocessing.get_context("spawn" if model == "heavy" else None)
+    with context.Pool(processes, initializer=_init_worker, initargs=(model, threads_per_process)) as pool:
+
+        def write(count, result):
+            nonlocal scored
+            data, errors = result.get()
+            sink.write(data)
+            scored += count
+            unsaved[0] += count
+            unsaved[1] += errors
+            if sink.due():
+                save()
+                log(f"📈 {checkpoint.rows} rows, {scored / (time.monotonic() - start):.0f} rows/s")
+
+        def save():
+            checkpoint.position = sink.commit()
+            checkpoint.rows += unsaved[0]
+            checkpoint.errors += unsaved[1]
+            unsaved[0] = unsaved[1] = 0
+            checkpoint.save()
+
+        # Chunks are submitted as earlier ones finish, so only a few are in memory at once
+        # and results are written in input order
+        pending = deque()
+        try:
+            for chunk in batched(rows, chunk_size):
+                if len(pending) >= 2 * processes:
+                    write(*pending.popleft())
+                pending.append((len(chunk), pool.apply_async(score_chunk, (model, chunk, output_format))))
+            while pending:
+                write(*pending.popleft())
+        finally:
+            try:
+                save()
+            finally:
+                sink.close()
+
+    elapsed = time.monotonic() - start
+    return {
+        "rows": checkpoint.rows,
+        "errors": checkpoint.errors,
+        "scored": scored,
+        "elapsed_s": round(elapsed, 1),
+        "rows_per_s": round(scored / elapsed, 1) if elapsed else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="CSV/TSV file with a header row, or JSONL")
+    parser.add_argument("output", help="JSONL file the results are appended to, or a directory for columnar output")
+    parser.add_argument("--model", default="lightweight", choices=MODELS)
+    parser.add_argument("--format", dest="input_format", choices=["csv", "jsonl"],
+                        help="input format (default: from the file extension)")
+    parser.add_argument("--output-format", choices=OUTPUT_FORMATS,
+                        help="jsonl, or arrow/parquet part files (default: from the output's extension)")
+    parser.add_argument("--part-rows", type=int, default=DEFAULT_PART_ROWS,
+                        help="rows per arrow/parquet part file")
+    parser.add_argument("--text-column", default="text")
+    parser.add_argument("--id-column", default="id")
+    parser.add_argument("--processes", type=int, default=os.cpu_count(), help="worker processes (default: all cores)")
+    parser.add_argument("--threads-per-process", type=int,
+                        help="torch threads per process for --model heavy (default: cores / processes)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="rows per task sent to a worker")
+    parser.add_argument("--limit", type=int, help="score at most this many more rows, then stop")
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and overwrite the output")
+    args = parser.parse_args()
+
+    print(f"📊 Scoring {args.input} with {args.model} on {args.processes} processes")
+    try:
+        summary = score_corpus(args.input, args.output, model=args.model, processes=args.processes,
+                               chunk_size=args.chunk_size, text_column=args.text_column, id_column=args.id_column,
+                               input_format=args.input_format, output_format=args.output_format,
+                               limit=args.limit, restart=args.restart,
+                               threads_per_process=args.threads_per_process, part_rows=args.part_rows)
+    except (ValueError, RuntimeError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        print("\n⏸️  Interrupted; run the same command again to resume")
+        sys.exit(130)
+    print(f"✅ {summary['rows']} rows in {args.output} ({summary['errors']} errors), "
+          f"{summary['scored']} this run at {summary['rows_per_s']} rows/s")
+
+
+if __name__ == "__main__":
+    main()
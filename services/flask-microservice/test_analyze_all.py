@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Test script for the unified /analyze-all endpoint
+Replaces the per-model runners with slow fakes to check that the models run
+concurrently, and that a failing or unavailable model doesn't fail the request
+"""
+
+import sys
+import os
+import time
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import app as app_module
+
+
+def slow(name, delay):
+    def run(text, bypass=False):
+        time.sleep(delay)
+        return {"model": name, "text": text}
+    return run
+
+
+def with_fake_models(**overrides):
+    originals = {name: getattr(app_module, name) for name in overrides}
+    for name, value in overrides.items():
+        setattr(app_module, name, value)
+    return originals
+
+
+def test_merged_document_with_timings():
+    app_module.models_ready.wait(30)
+    response = app_module.app.test_client().post("/analyze-all", json={"text": "  I love this amazing day! "})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["text"] == "I love this amazing day!"
+    assert body["textblob"]["sentiment"] == "positive"
+    assert set(body["models"]) == {"textblob", "lightweight", "heavy"}
+    assert body["models"]["textblob"]["status"] == "ok" and body["models"]["textblob"]["elapsed_ms"] >= 0
+    if not app_module.heavy_model_available:
+        assert body["heavy"] is None and body["models"]["heavy"]["status"] != "ok"
+
+
+def test_models_run_concurrently():
+    originals = with_fake_models(run_sentiment=slow("textblob", 0.3), run_lightweight=slow("lightweight", 0.3),
+                                 run_heavy=slow("heavy", 0.3), lightweight_model_available=True,
+                                 heavy_model_available=True)
+    try:
+        start = time.monotonic()
+        body = app_module.app.test_client().post("/analyze-all", json={"text": "hello"}).get_json()
+        elapsed = time.monotonic() - start
+        assert [body[name]["model"] for name in ("textblob", "lightweight", "heavy")] == ["textblob", "lightweight", "heavy"]
+        # Three 0.3s models: about 0.3s in parallel, 0.9s in sequence
+        assert elapsed < 0.6, elapsed
+        assert all(report["elapsed_ms"] >= 290 for report in body["models"].values())
+    finally:
+        with_fake_models(**originals)
+
+
+def test_failing_model_is_reported():
+    def broken(text, bypass=False):
+        raise RuntimeError("model exploded")
+
+    originals = with_fake_models(run_lightweight=broken, lightweight_model_available=True)
+    try:
+        response = app_module.app.test_client().post("/analyze-all", json={"text": "This is terrible"})
+        assert response.status_code == 200
+        body = response.get_json()
+        assert body["lightweight"] is None
+        report = body["models"]["lightweight"]
+        assert report["status"] == "error" and report["error"] == "model exploded"
+        assert body["textblob"]["sentiment"] == "negative"
+    finally:
+        with_fake_models(**originals)
+
+
+def test_missing_text():
+    client = app_module.app.test_client()
+    assert client.post("/analyze-all", json={}).status_code == 400
+    assert client.post("/analyze-all", json={"text": 42}).status_code == 400
+
+
+if __name__ == "__main__":
+    print("🚀 Testing /analyze-all")
+    print("-" * 60)
+    test_merged_document_with_timings()
+    test_models_run_concurrently()
+    test_failing_model_is_reported()
+    test_missing_text()
+    print("\n✅ All /analyze-all tests passed!")
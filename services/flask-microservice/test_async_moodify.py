@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Test script for the async /moodify path
+Replaces the AsyncOpenAI client with a fake so no API key or network is needed
+"""
+
+import asyncio
+import json
+import sys
+import os
+import threading
+from types import SimpleNamespace
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import async_moodify
+from async_moodify import MoodifyGate, run_moodify, stream_moodify
+
+
+class FakeAsyncCompletions:
+    def __init__(self, reply, delay=0.0):
+        self.reply = reply
+        self.delay = delay
+        self.calls = 0
+        self.threads = set()
+
+    async def create(self, stream=False, **kwargs):
+        self.calls += 1
+        self.threads.add(threading.current_thread().name)
+        await asyncio.sleep(self.delay)
+        if stream:
+            return self._stream()
+        message = SimpleNamespace(content=self.reply)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    async def _stream(self):
+        for word in self.reply.split(" "):
+            delta = SimpleNamespace(content=word + " ")
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+
+def with_fake_client(completions):
+    async_moodify.runner.get_client()
+    original = async_moodify.runner.client
+    async_moodify.runner.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return original
+
+
+def test_gate_rejects_when_full():
+    gate = MoodifyGate(2)
+    assert gate.try_acquire() and gate.try_acquire()
+    assert not gate.try_acquire()
+    gate.release()
+    assert gate.try_acquire()
+    stats = gate.stats()
+    assert stats["in_flight"] == 2 and stats["rejected"] == 1
+
+
+def test_llm_call_runs_on_event_loop():
+    completions = FakeAsyncCompletions("What a wonderful, delightful day!")
+    original = with_fake_client(completions)
+    try:
+        result = run_moodify("This is a terrible day", "positive", use_cache=False)
+        assert result["success"]
+        assert result["modified_text"] == "What a wonderful, delightful day!"
+        assert completions.threads == {"async-llm-loop"}
+    finally:
+        async_moodify.runner.client = original
+
+
+def test_slow_llm_falls_back_after_timeout():
+    completions = FakeAsyncCompletions("What a wonderful day!", delay=2.0)
+    original = with_fake_client(completions)
+    try:
+        result = run_moodify("This is a terrible day", "positive", use_cache=False, timeout=0.1)
+        assert result["changes_made"][0].startswith("Fallback method used")
+        assert result["cached"] is False
+    finally:
+        async_moodify.runner.client = original
+
+
+def test_stream_yields_tokens_then_result():
+    completions = FakeAsyncCompletions("What a wonderful, delightful day!")
+    original = with_fake_client(completions)
+    try:
+        events = list(stream_moodify("This is a terrible day", "positive", use_cache=False))
+        tokens = [payload["token"] for event, payload in events if event == "token"]
+        assert len(tokens) == 5
+        assert events[-1][0] == "done" and [event for event, _ in events].count("done") == 1
+        result = events[-1][1]
+        assert result["modified_text"] == "What a wonderful, delightful day!"
+        assert result["success"] and result["new_sentiment"] == "positive"
+    finally:
+        async_moodify.runner.client = original
+
+
+def test_moodify_stream_endpoint_emits_sse():
+    from app import app
+
+    completions = FakeAsyncCompletions("What a wonderful, delightful day!")
+    original = with_fake_client(completions)
+    try:
+        response = app.test_client().post("/moodify-stream", json={
+            "text": "This is a terrible day", "target_sentiment": "positive", "cache": False
+        })
+        assert response.status_code == 200
+        assert response.mimetype == "text/event-stream"
+        body = response.get_data(as_text=True)
+        assert body.count("event: token") == 5
+        done = body.split("event: done\ndata: ")[1].strip()
+        assert json.loads(done)["success"]
+    finally:
+        async_moodify.runner.client = original
+
+
+def test_moodify_returns_503_when_saturated():
+    from app import app, moodify_gate
+
+    held = 0
+    while moodify_gate.try_acquire():
+        held += 1
+    try:
+        response = app.test_client().post("/moodify", json={"text": "I hate this", "target_sentiment": "positive"})
+        assert response.status_code == 503
+        assert response.headers.get("Retry-After")
+    finally:
+        for _ in range(held):
+            moodify_gate.release()
+
+
+if __name__ == "__main__":
+    print("🚀 Testing async moodify")
+    print("-" * 60)
+    test_gate_rejects_when_full()
+    test_llm_call_runs_on_event_loop()
+    test_slow_llm_falls_back_after_timeout()
+    test_stream_yields_tokens_then_result()
+    test_moodify_stream_endpoint_emits_sse()
+    test_moodify_returns_503_when_saturated()
+    print("\n✅ All async moodify tests passed!")
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test script for the micro-batching scheduler
+Uses a fake batch function so it runs without torch/transformers
+"""
+
+import sys
+import os
+import threading
+import time
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from batching import MicroBatcher
+
+
+def make_recorder():
+    calls = []
+
+    def batch_fn(texts):
+        calls.append(list(texts))
+        time.sleep(0.01)
+        return [{"text": text, "length": len(text)} for text in texts]
+
+    return calls, batch_fn
+
+
+def test_concurrent_calls_are_batched():
+    calls, batch_fn = make_recorder()
+    batcher = MicroBatcher(batch_fn, max_batch_size=8, max_wait_ms=50)
+
+    texts = [f"text number {i}" for i in range(8)]
+    results = [None] * len(texts)
+
+    def worker(i):
+        results[i] = batcher.submit(texts[i], timeout=5)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(len(texts))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Every caller gets its own result back
+    assert [result["text"] for result in results] == texts
+    # ...and far fewer forward passes than callers were needed
+    assert len(calls) < len(texts)
+
+    stats = batcher.stats()
+    assert stats["requests"] == len(texts)
+    assert stats["batches"] == len(calls)
+    assert stats["max_batch_size"] <= 8
+
+
+def test_max_batch_size_is_respected():
+    calls, batch_fn = make_recorder()
+    batcher = MicroBatcher(batch_fn, max_batch_size=3, max_wait_ms=50)
+
+    threads = [threading.Thread(target=batcher.submit, args=(f"t{i}", 5)) for i in range(7)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert all(len(call) <= 3 for call in calls)
+    assert sum(len(call) for call in calls) == 7
+
+
+def test_errors_reach_every_caller():
+    def failing(texts):
+        raise ValueError("model exploded")
+
+    batcher = MicroBatcher(failing, max_batch_size=4, max_wait_ms=1)
+    try:
+        batcher.submit("hello", timeout=5)
+    except ValueError as e:
+        assert "model exploded" in str(e)
+    else:
+        raise AssertionError("expected the batch error to propagate")
+
+
+if __name__ == "__main__":
+    print("🚀 Testing micro-batching scheduler")
+    print("-" * 60)
+    test_concurrent_calls_are_batched()
+    test_max_batch_size_is_respected()
+    test_errors_reach_every_caller()
+    print("\n✅ All micro-batching tests passed!")
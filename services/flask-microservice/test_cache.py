@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Test script for the in-process result cache
+Covers LRU/TTL eviction, key normalization and partial batch hits
+"""
+
+import sys
+import os
+import time
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from cache import ResultCache, make_key, cached_call, cached_batch
+
+
+def test_keys_normalize_whitespace_and_include_version():
+    assert make_key("vader", "1", "so  tired ") == make_key("vader", "1", "so tired")
+    assert make_key("vader", "1", "so tired") != make_key("vader", "2", "so tired")
+    assert make_key("vader", "1", "so tired") != make_key("bert", "1", "so tired")
+    # Case matters to VADER (caps emphasis), so it is not normalized away
+    assert make_key("vader", "1", "SO tired") != make_key("vader", "1", "so tired")
+    # Exact keys keep the layout: windowed long-text results depend on line breaks and offsets
+    assert make_key("bert-long", "1", "Title\nI loved it.", exact=True) != \
+        make_key("bert-long", "1", "Title I loved it.", exact=True)
+
+
+def test_lru_eviction():
+    cache = ResultCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", {"v": 1})
+    cache.set("b", {"v": 2})
+    cache.get("a")  # "b" is now least recently used
+    cache.set("c", {"v": 3})
+    assert cache.get("b") is None
+    assert cache.get("a") == {"v": 1}
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_expiry():
+    cache = ResultCache(max_entries=10, ttl_seconds=0.05)
+    cache.set("a", {"v": 1})
+    assert cache.get("a") == {"v": 1}
+    time.sleep(0.1)
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_cached_values_are_copies():
+    cache = ResultCache()
+    cache.set("a", {"emotions": {"joy": 0.9}})
+    hit = cache.get("a")
+    hit["analysis_type"] = "heavy_bert"
+    assert "analysis_type" not in cache.get("a")
+
+
+def test_cached_call_and_bypass():
+    cache = ResultCache()
+    calls = []
+
+    def analyze(text):
+        calls.append(text)
+        return {"text": text}
+
+    cached_call(cache, "m", "1", analyze, "I'm fine")
+    cached_call(cache, "m", "1", analyze, "I'm fine")
+    assert calls == ["I'm fine"]
+
+    cached_call(cache, "m", "1", analyze, "I'm fine", bypass=True)
+    assert calls == ["I'm fine", "I'm fine"]
+
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+
+
+def test_cached_batch_only_computes_misses():
+    cache = ResultCache()
+    batches = []
+
+    def analyze_batch(texts):
+        batches.append(list(texts))
+        return [{"text": text} for text in texts]
+
+    cached_batch(cache, "m", "1", analyze_batch, ["a", "b"])
+    results = cached_batch(cache, "m", "1", analyze_batch, ["b", "c", "a"])
+    assert [result["text"] for result in results] == ["b", "c", "a"]
+    assert batches == [["a", "b"], ["c"]]
+
+
+if __name__ == "__main__":
+    print("🚀 Testing result cache")
+    print("-" * 60)
+    test_keys_normalize_whitespace_and_include_version()
+    test_lru_eviction()
+    test_ttl_expiry()
+    test_cached_values_are_copies()
+    test_cached_call_and_bypass()
+    test_cached_batch_only_computes_misses()
+    print("\n✅ All cache tests passed!")
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Parity test for the compiled EmotionAnalyzer backends
+Checks that ONNX Runtime and TorchScript outputs match eager PyTorch
+Skipped automatically when torch/transformers/onnxruntime are not installed
+"""
+
+import sys
+import os
+
+import pytest
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from model import HEAVY_MODELS_AVAILABLE
+
+TEST_TEXTS = [
+    "I am so excited about this new opportunity!",
+    "This is absolutely terrible and I hate it.",
+    "The weather is okay today, nothing special.",
+    "I'm really disappointed with the service, but the staff tried their best.",
+]
+
+# Rounded probabilities may differ in the last digit between runtimes
+TOLERANCE = 2e-3
+
+
+def _compare(backend):
+    if not HEAVY_MODELS_AVAILABLE:
+        pytest.skip("torch/transformers not installed")
+
+    from model import EmotionAnalyzer
+    from emotion_backends import ONNX_AVAILABLE
+    if backend == "onnx" and not ONNX_AVAILABLE:
+        pytest.skip("onnxruntime not installed")
+
+    eager = EmotionAnalyzer(backend="pytorch")
+    compiled = EmotionAnalyzer(backend=backend)
+
+    expected = eager.analyze_emotion_batch(TEST_TEXTS)
+    actual = compiled.analyze_emotion_batch(TEST_TEXTS)
+    for text, want, got in zip(TEST_TEXTS, expected, actual):
+        assert got["dominant_emotion"] == want["dominant_emotion"], text
+        assert abs(got["confidence"] - want["confidence"]) <= TOLERANCE, text
+        for label in set(want["emotions"]) | set(got["emotions"]):
+            assert abs(got["emotions"].get(label, 0.0) - want["emotions"].get(label, 0.0)) <= TOLERANCE + 0.01, (text, label)
+
+    # Single-text path goes through the same backend
+    assert compiled.analyze_emotion(TEST_TEXTS[0])["dominant_emotion"] == expected[0]["dominant_emotion"]
+    print(f"✅ {backend} matches eager PyTorch on {len(TEST_TEXTS)} texts")
+
+
+def test_onnx_parity():
+    _compare("onnx")
+
+
+def test_torchscript_parity():
+    _compare("torchscript")
+
+
+if __name__ == "__main__":
+    print("🚀 Testing compiled emotion backends against eager PyTorch")
+    print("-" * 60)
+    for test in (test_onnx_parity, test_torchscript_parity):
+        try:
+            test()
+        except pytest.skip.Exception as e:
+            print(f"⏭️  Skipped: {e.msg}")
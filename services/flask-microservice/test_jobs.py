@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Test script for the persistent moodify job queue
+Uses a temporary SQLite file and a fake task function, so no API key is needed
+"""
+
+import sys
+import os
+import json
+import tempfile
+import time
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from jobs import JobStore, JobWorkerPool
+
+
+def fake_moodify(text, target_sentiment, use_cache):
+    return {"original_text": text, "modified_text": f"{text} ({target_sentiment})", "success": True}
+
+
+def wait_for_completion(store, job_id, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = store.get_job(job_id)
+        if job["status"] == "completed":
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} did not complete")
+
+
+def test_pool_drains_job_in_order():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = JobStore(os.path.join(tmp, "jobs.sqlite3"))
+        pool = JobWorkerPool(store, fake_moodify, concurrency=3, poll_interval=0.05)
+        tasks = [(f"text {i}", "positive") for i in range(10)]
+        job_id = store.create_job(tasks)
+        assert store.get_job(job_id)["status"] == "queued"
+
+        pool.notify()
+        job = wait_for_completion(store, job_id)
+        assert job["completed"] == 10 and job["failed"] == 0
+        assert [r["index"] for r in job["results"]] == list(range(10))
+        assert job["results"][3]["result"]["modified_text"] == "text 3 (positive)"
+
+
+def test_expired_lease_is_reclaimed():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "jobs.sqlite3")
+        store = JobStore(path, lease_seconds=0.1)
+        job_id = store.create_job([("survives a restart", "negative")])
+
+        # A worker claims the task and then "dies" without finishing it
+        claimed = store.claim()
+        assert claimed["attempts"] == 1
+        assert store.claim() is None
+
+        time.sleep(0.15)
+        restarted = JobStore(path, lease_seconds=0.1)
+        assert restarted.has_runnable()
+        reclaimed = restarted.claim()
+        assert reclaimed["index"] == claimed["index"] and reclaimed["attempts"] == 2
+        restarted.complete(job_id, reclaimed["index"], {"success": True})
+        assert restarted.get_job(job_id)["status"] == "completed"
+
+
+def test_failing_task_is_retried_then_failed():
+    calls = []
+
+    def flaky(text, target_sentiment, use_cache):
+        calls.append(text)
+        raise RuntimeError("upstream exploded")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = JobStore(os.path.join(tmp, "jobs.sqlite3"), max_attempts=2)
+        pool = JobWorkerPool(store, flaky, concurrency=1, poll_interval=0.05)
+        job_id = store.create_job([("doomed", "positive")])
+        pool.notify()
+        job = wait_for_completion(store, job_id)
+        assert job["failed"] == 1 and len(calls) == 2
+        assert job["results"][0]["error"] == "upstream exploded"
+
+
+def test_job_endpoints():
+    import app as app_module
+
+    with tempfile.TemporaryDirectory() as tmp:
+        original = app_module.job_pool
+        store = JobStore(os.path.join(tmp, "jobs.sqlite3"))
+        app_module.job_pool = JobWorkerPool(store, fake_moodify, concurrency=2, poll_interval=0.05)
+        try:
+            client = app_module.app.test_client()
+            assert client.post("/moodify-jobs", json={"texts": ["no target"]}).status_code == 400
+            assert client.get("/moodify-jobs/unknown").status_code == 404
+
+            response = client.post("/moodify-jobs", json={
+                "texts": ["I hate this", "This is bad"], "target_sentiment": "positive"
+            })
+            assert response.status_code == 202
+            job_id = response.get_json()["job_id"]
+
+            body = client.get(f"/moodify-jobs/{job_id}/stream").get_data(as_text=True)
+            assert body.count("event: result") == 2
+            done = json.loads(body.split("event: done\ndata: ")[1].strip())
+            assert done["completed"] == 2
+
+            job = client.get(f"/moodify-jobs/{job_id}").get_json()
+            assert job["status"] == "completed" and len(job["results"]) == 2
+
+            # Streams take moodify slots and give them back when they end
+            gate = app_module.moodify_gate
+            assert gate.stats()["in_flight"] == 0
+            held = 0
+            while gate.try_acquire():
+                held += 1
+            try:
+                response = client.get(f"/moodify-jobs/{job_id}/stream")
+                assert response.status_code == 503
+                assert response.get_json()["status_url"] == f"/moodify-jobs/{job_id}"
+            finally:
+                for _ in range(held):
+                    gate.release()
+        finally:
+            app_module.job_pool = original
+
+
+if __name__ == "__main__":
+    print("🚀 Testing moodify job queue")
+    print("-" * 60)
+    test_pool_drains_job_in_order()
+    test_expired_lease_is_reclaimed()
+    test_failing_task_is_retried_then_failed()
+    test_job_endpoints()
+    print("\n✅ All job queue tests passed!")
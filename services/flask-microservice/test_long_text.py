@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Test script for long-document windowing and aggregation
+Uses a whitespace "tokenizer" so it runs without torch; the BERT check at the
+end is skipped automatically when torch/transformers are not installed
+"""
+
+import sys
+import os
+
+import pytest
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from long_text import ProbabilityAggregator, long_text_mode, sentence_spans, sentence_windows
+from model import HEAVY_MODELS_AVAILABLE
+
+
+def count_words(texts):
+    return [len(text.split()) for text in texts]
+
+
+def sentences(count, words=5):
+    return " ".join(" ".join([f"s{i}"] * (words - 1)) + " end." for i in range(count))
+
+
+def test_sentence_spans():
+    text = "First one. Second one!  Third?\nA line without a stop\n\nLast"
+    assert [text[start:end] for start, end in sentence_spans(text)] == [
+        "First one.", "Second one!", "Third?", "A line without a stop", "Last"
+    ]
+    # Abbreviations without a following space don't end a sentence
+    assert len(list(sentence_spans("Version 1.5 is out."))) == 1
+
+
+def test_windows_fit_and_overlap():
+    text = sentences(20)
+    windows = list(sentence_windows(text, count_words, max_tokens=20, overlap_tokens=5))
+    assert all(tokens <= 20 for _, _, tokens in windows)
+    assert all(len(text[start:end].split()) == tokens for start, end, tokens in windows)
+    # Each window starts with the last sentence of the one before
+    for (_, previous_end, _), (start, _, _) in zip(windows, windows[1:]):
+        assert text[start:previous_end].endswith("end.") and start < previous_end
+    assert windows[0][0] == 0 and windows[-1][1] == len(text)
+
+
+def test_windows_without_overlap_cover_text_once():
+    text = sentences(12)
+    windows = list(sentence_windows(text, count_words, max_tokens=20))
+    assert sum(tokens for _, _, tokens in windows) == len(text.split())
+    assert len(windows) == 3
+
+
+def test_overlong_sentence_is_split_at_words():
+    text = "word " * 50 + "end. Short one."
+    windows = list(sentence_windows(text, count_words, max_tokens=16))
+    assert all(tokens <= 16 for _, _, tokens in windows)
+    assert sum(tokens for _, _, tokens in windows) == len(text.split())
+
+
+def test_windows_are_lazy():
+    calls = []
+
+    def counting(texts):
+        calls.append(len(texts))
+        return count_words(texts)
+
+    # A very large document: only the first block of sentences is tokenized for the first window
+    windows = sentence_windows(sentences(100000), counting, max_tokens=50)
+    next(windows)
+    assert sum(calls) <= 256
+
+
+def test_aggregation_strategies():
+    rows = [([0.8, 0.2], 10), ([0.2, 0.8], 30)]
+
+    def combine(strategy):
+        aggregator = ProbabilityAggregator(strategy)
+        for probs, weight in rows:
+            aggregator.add(probs, weight)
+        return [round(value, 4) for value in aggregator.result()]
+
+    assert combine("mean") == [0.5, 0.5]
+    assert combine("weighted") == [0.35, 0.65]
+    assert combine("max") == [0.5, 0.5]
+    try:
+        ProbabilityAggregator("median")
+        raise AssertionError("expected an unknown strategy to be rejected")
+    except ValueError:
+        pass
+
+
+def test_analyze_validates_long_text_options():
+    from app import app, models_ready
+
+    models_ready.wait(60)
+    client = app.test_client()
+    assert client.post("/analyze", json={"text": "hi", "aggregation": "median"}).status_code == 400
+    assert client.post("/analyze", json={"text": "hi", "long_text": "sometimes"}).status_code == 400
+    assert client.post("/analyze", json={"text": "hi", "long_text": False}).status_code == 200
+    assert client.post("/analyze", json={"text": "hi", "aggregation": "max"}).status_code == 200
+
+
+def test_long_text_mode_settings():
+    # The env setting and the request body accept the same spellings
+    assert [long_text_mode(value) for value in (True, False, "TRUE", "false", "on", "off", "Auto")] == \
+        ["on", "off", "on", "off", "on", "off", "auto"]
+    assert long_text_mode("sometimes") is None and long_text_mode(1) is None
+
+
+def test_bert_long_text():
+    if not HEAVY_MODELS_AVAILABLE:
+        pytest.skip("torch/transformers not installed")
+
+    from model import EmotionAnalyzer
+    analyzer = EmotionAnalyzer()
+    text = "I am so happy and grateful for my friends. " * 60 + "Then everything fell apart and I was furious. " * 60
+    assert analyzer.is_long(text) and not analyzer.is_long("I am happy")
+    result = analyzer.analyze_long_text(text, aggregation="weighted", include_segments=True)
+    assert result["long_text"]["windows"] > 1 and len(result["segments"]) == result["long_text"]["windows"]
+    emotions = {segment["dominant_emotion"] for segment in result["segments"]}
+    assert len(emotions) > 1, emotions
+
+
+if __name__ == "__main__":
+    print("🚀 Testing long-document analysis")
+    print("-" * 60)
+    test_sentence_spans()
+    test_windows_fit_and_overlap()
+    test_windows_without_overlap_cover_text_once()
+    test_overlong_sentence_is_split_at_words()
+    test_windows_are_lazy()
+    test_aggregation_strategies()
+    test_analyze_validates_long_text_options()
+    test_long_text_mode_settings()
+    try:
+        test_bert_long_text()
+    except pytest.skip.Exception as e:
+        print(f"⏭️  Skipped: {e.msg}")
+    print("\n✅ All long-document tests passed!")
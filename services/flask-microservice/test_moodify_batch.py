@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Test script for multi-text moodify batching
+Replaces the OpenRouter clients with fakes that answer the batch JSON contract
+"""
+
+import sys
+import os
+import asyncio
+import json
+import tempfile
+from types import SimpleNamespace
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import model
+import async_moodify
+from jobs import JobStore
+
+NEGATIVE_TEXTS = [
+    "This is a terrible day",
+    "I hate waiting in line",
+    "The food was awful",
+    "My commute was horrible",
+]
+REWRITE = "What a wonderful, delightful day!"
+
+
+def batch_reply(messages, drop=()):
+    """Answer a batch prompt the way a well-behaved model would, omitting ids in drop"""
+    payload = messages[1]["content"].split("Input:\n", 1)[1].split("\n\nRequirements:", 1)[0]
+    items = json.loads(payload)
+    return "```json\n" + json.dumps([{"id": item["id"], "text": REWRITE} for item in items
+                                    if item["id"] not in drop]) + "\n```"
+
+
+class FakeCompletions:
+    def __init__(self, drop=(), error=None):
+        self.drop = drop
+        self.error = error
+        self.batch_calls = 0
+        self.single_calls = 0
+
+    def _reply(self, messages):
+        if self.error:
+            raise self.error
+        if messages[0]["content"] == model.MOODIFY_BATCH_SYSTEM_PROMPT:
+            self.batch_calls += 1
+            return batch_reply(messages, self.drop)
+        self.single_calls += 1
+        return REWRITE
+
+    def create(self, messages, **kwargs):
+        message = SimpleNamespace(content=self._reply(messages))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+class FakeAsyncCompletions(FakeCompletions):
+    async def create(self, messages, **kwargs):
+        return FakeCompletions.create(self, messages, **kwargs)
+
+
+def fake_client(completions):
+    return SimpleNamespace(chat=SimpleNamespace(completions=completions))
+
+
+def test_parse_batch_response():
+    assert model.parse_moodify_batch_response('[{"id": 1, "text": "b"}, {"id": 0, "text": "a"}]', 2) == ["a", "b"]
+    assert model.parse_moodify_batch_response('Sure! [{"id": 0, "text": "a"}] Hope it helps', 2) == ["a", None]
+    assert model.parse_moodify_batch_response('[{"id": 0, "text": "a"}, {"id": 0, "text": "b"}]', 1) == [None]
+    assert model.parse_moodify_batch_response('[{"id": 7, "text": "a"}, {"id": "0", "text": "b"}]', 1) == [None]
+    assert model.parse_moodify_batch_response("not json at all", 2) == [None, None]
+
+
+def test_batch_uses_one_call_per_chunk():
+    completions = FakeCompletions()
+    original = model.client
+    model.client = fake_client(completions)
+    try:
+        items = [(text, "positive") for text in NEGATIVE_TEXTS] + [("I love sunny days", "positive")]
+        results = model.moodify_batch(items, use_cache=False)
+        assert completions.batch_calls == 1 and completions.single_calls == 0
+        assert [r["modified_text"] for r in results[:4]] == [REWRITE] * 4
+        assert all(r["success"] and r["new_sentiment"] == "positive" for r in results[:4])
+        # Already positive: no LLM work, returned unchanged
+        assert results[4]["modified_text"] == "I love sunny days"
+    finally:
+        model.client = original
+
+
+def test_missing_items_are_retried_individually():
+    completions = FakeCompletions(drop={1})
+    original = model.client
+    model.client = fake_client(completions)
+    try:
+        results = model.moodify_batch([(text, "positive") for text in NEGATIVE_TEXTS], use_cache=False)
+        assert completions.batch_calls == 1 and completions.single_calls == 1
+        assert all(r["modified_text"] == REWRITE for r in results)
+    finally:
+        model.client = original
+
+
+def test_failed_batch_call_falls_back_per_item():
+    completions = FakeCompletions(error=RuntimeError("upstream down"))
+    original = model.client
+    model.client = fake_client(completions)
+    try:
+        results = model.moodify_batch([(text, "positive") for text in NEGATIVE_TEXTS], use_cache=False)
+        assert len(results) == len(NEGATIVE_TEXTS)
+        assert all(r["changes_made"][0].startswith("Fallback method used") for r in results)
+    finally:
+        model.client = original
+
+
+def test_async_batch_matches_contract():
+    completions = FakeAsyncCompletions(drop={2})
+    async_moodify.runner.get_client()
+    original = async_moodify.runner.client
+    async_moodify.runner.client = fake_client(completions)
+    try:
+        items = [(text, "positive") for text in NEGATIVE_TEXTS * 3]
+        results = async_moodify.run_moodify_batch(items, use_cache=False)
+        assert len(results) == 12
+        # 12 items in chunks of MOODIFY_BATCH_SIZE, plus one retry in every chunk that has an id 2
+        size = model.MOODIFY_BATCH_SIZE
+        chunk_sizes = [min(size, 12 - start) for start in range(0, 12, size)]
+        assert completions.batch_calls == len(chunk_sizes)
+        assert completions.single_calls == sum(chunk_size > 2 for chunk_size in chunk_sizes)
+        assert all(r["modified_text"] == REWRITE for r in results)
+    finally:
+        async_moodify.runner.client = original
+
+
+class SlowAsyncCompletions(FakeCompletions):
+    """Records how many calls are in flight at once"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.in_flight = 0
+        self.peak = 0
+
+    async def create(self, messages, **kwargs):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(0.02)
+            return FakeCompletions.create(self, messages, **kwargs)
+        finally:
+            self.in_flight -= 1
+
+
+def test_async_batch_bounds_concurrent_calls():
+    completions = SlowAsyncCompletions(drop={0, 1, 2, 3, 4})
+    async_moodify.runner.get_client()
+    original = async_moodify.runner.client
+    async_moodify.runner.client = fake_client(completions)
+    try:
+        items = [(text, "positive") for text in NEGATIVE_TEXTS * 15]
+        results = async_moodify.run_moodify_batch(items, use_cache=False, max_concurrency=2)
+        assert all(r["modified_text"] == REWRITE for r in results)
+        # Chunk calls and the many individual retries both stay within the bound
+        assert completions.single_calls > 2 and completions.peak == 2
+    finally:
+        async_moodify.runner.client = original
+
+
+def test_claim_many_stays_within_one_job():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = JobStore(os.path.join(tmp, "jobs.sqlite3"))
+        first = store.create_job([(f"a{i}", "positive") for i in range(3)])
+        store.create_job([(f"b{i}", "positive") for i in range(3)])
+        claimed = store.claim_many(10)
+        assert [task["job_id"] for task in claimed] == [first] * 3
+        assert [task["index"] for task in claimed] == [0, 1, 2]
+        assert len(store.claim_many(2)) == 2
+
+
+def test_moodify_batch_endpoint():
+    from app import app
+
+    completions = FakeAsyncCompletions()
+    async_moodify.runner.get_client()
+    original = async_moodify.runner.client
+    async_moodify.runner.client = fake_client(completions)
+    try:
+        client = app.test_client()
+        response = client.post("/moodify-batch", json={"texts": NEGATIVE_TEXTS, "target_sentiment": "positive",
+                                                       "cache": False})
+        assert response.status_code == 200
+        body = response.get_json()
+        assert body["count"] == len(NEGATIVE_TEXTS)
+        assert [r["original_text"] for r in body["results"]] == NEGATIVE_TEXTS
+        assert completions.batch_calls == 1
+        assert client.post("/moodify-batch", json={"texts": ["no target"]}).status_code == 400
+
+        import app as app_module
+        too_many = {"texts": ["x"] * (app_module.MOODIFY_BATCH_MAX_TEXTS + 1), "target_sentiment": "positive"}
+        assert client.post("/moodify-batch", json=too_many).status_code == 413
+
+        # A batch needing more slots than are free is turned away
+        gate = app_module.moodify_gate
+        assert gate.try_acquire(gate.max_concurrency - 1)
+        try:
+            big = {"texts": NEGATIVE_TEXTS * 10, "target_sentiment": "positive", "cache": False}
+            assert client.post("/moodify-batch", json=big).status_code == 503
+        finally:
+            gate.release(gate.max_concurrency - 1)
+        assert gate.stats()["in_flight"] == 0
+    finally:
+        async_moodify.runner.client = original
+
+
+if __name__ == "__main__":
+    print("🚀 Testing moodify batching")
+    print("-" * 60)
+    test_parse_batch_response()
+    test_batch_uses_one_call_per_chunk()
+    test_missing_items_are_retried_individually()
+    test_failed_batch_call_falls_back_per_item()
+    test_async_batch_matches_contract()
+    test_async_batch_bounds_concurrent_calls()
+    test_claim_many_stays_within_one_job()
+    test_moodify_batch_endpoint()
+    print("\n✅ All moodify batch tests passed!")
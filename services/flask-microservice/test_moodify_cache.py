@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Test script for the moodify LLM response cache
+Replaces the OpenRouter client with a fake so no API key or network is needed
+"""
+
+import sys
+import os
+from types import SimpleNamespace
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import model
+from cache import ResultCache
+
+
+class FakeCompletions:
+    def __init__(self, reply=None, error=None):
+        self.reply = reply
+        self.error = error
+        self.calls = 0
+
+    def create(self, **kwargs):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        message = SimpleNamespace(content=self.reply)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def with_fake_client(completions):
+    original_client, original_cache = model.client, model.moodify_cache
+    model.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    model.moodify_cache = ResultCache(max_entries=10, ttl_seconds=60)
+    return original_client, original_cache
+
+
+def restore(original):
+    model.client, model.moodify_cache = original
+
+
+def test_successful_llm_result_is_cached():
+    completions = FakeCompletions(reply="This is a wonderful, delightful day!")
+    original = with_fake_client(completions)
+    try:
+        first = model.moodify_text("This is a terrible day", "positive")
+        second = model.moodify_text("This is a terrible day", "positive")
+        assert first["success"] and first["cached"] is False
+        assert second["cached"] is True
+        assert second["modified_text"] == first["modified_text"]
+        assert completions.calls == 1
+
+        # A different target or an explicit bypass goes back to the LLM
+        model.moodify_text("This is a terrible day", "positive", use_cache=False)
+        assert completions.calls == 2
+    finally:
+        restore(original)
+
+
+def test_fallback_results_are_never_cached():
+    completions = FakeCompletions(error=RuntimeError("rate limited"))
+    original = with_fake_client(completions)
+    try:
+        first = model.moodify_text("This is a terrible day", "positive")
+        second = model.moodify_text("This is a terrible day", "positive")
+        assert first["cached"] is False and second["cached"] is False
+        assert completions.calls == 2
+        assert model.moodify_cache.stats()["entries"] == 0
+    finally:
+        restore(original)
+
+
+if __name__ == "__main__":
+    print("🚀 Testing moodify response cache")
+    print("-" * 60)
+    test_successful_llm_result_is_cached()
+    test_fallback_results_are_never_cached()
+    print("\n✅ All moodify cache tests passed!")
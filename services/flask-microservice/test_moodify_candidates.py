@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Test script for multi-candidate moodify
+Replaces the AsyncOpenAI client with a fake whose answer and latency depend on
+the sampling temperature, so each concurrent candidate behaves differently
+"""
+
+import sys
+import os
+import asyncio
+import time
+from types import SimpleNamespace
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import async_moodify
+from async_moodify import candidate_temperatures, run_moodify_candidates
+from model import candidate_score, analyze_sentiment
+
+
+class FakeAsyncCompletions:
+    """replies maps a temperature to (delay_seconds, reply)"""
+
+    def __init__(self, replies):
+        self.replies = replies
+        self.started = 0
+        self.finished = 0
+
+    async def create(self, temperature, **kwargs):
+        self.started += 1
+        delay, reply = self.replies[round(temperature, 1)]
+        await asyncio.sleep(delay)
+        self.finished += 1
+        message = SimpleNamespace(content=reply)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def with_fake_client(completions):
+    async_moodify.runner.get_client()
+    original = async_moodify.runner.client
+    async_moodify.runner.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return original
+
+
+def test_candidate_score_prefers_hits_then_margin():
+    hit = candidate_score(analyze_sentiment("What a wonderful day!"), "positive")
+    near = candidate_score(analyze_sentiment("It is a day"), "positive")
+    miss = candidate_score(analyze_sentiment("This is a terrible day"), "positive")
+    assert hit > near > miss
+
+
+def test_returns_first_hit_and_cancels_the_rest():
+    completions = FakeAsyncCompletions({
+        0.7: (0.05, "This is a terrible day, sadly"),
+        0.9: (0.1, "What a wonderful, delightful day!"),
+        1.1: (3.0, "What a great day!"),
+    })
+    original = with_fake_client(completions)
+    try:
+        start = time.monotonic()
+        result = run_moodify_candidates("This is a terrible day", "positive", candidates=3, use_cache=False)
+        assert time.monotonic() - start < 1.0
+        assert result["success"] and result["modified_text"] == "What a wonderful, delightful day!"
+        assert result["candidates"] == {"requested": 3, "evaluated": 2, "failed": 0, "stopped_early": True}
+        time.sleep(0.1)
+        assert completions.started == 3 and completions.finished == 2
+    finally:
+        async_moodify.runner.client = original
+
+
+def test_without_a_hit_picks_closest_to_target():
+    completions = FakeAsyncCompletions({
+        0.7: (0.05, "This is a terrible day"),
+        0.9: (0.1, "This is a day"),
+        1.1: (0.15, "This is a bad day"),
+    })
+    original = with_fake_client(completions)
+    try:
+        result = run_moodify_candidates("This is a terrible day", "positive", candidates=3, use_cache=False)
+        assert result["candidates"]["evaluated"] == 3
+        assert result["modified_text"] == "This is a day" and not result["success"]
+    finally:
+        async_moodify.runner.client = original
+
+
+def test_candidate_temperatures_are_spread():
+    assert candidate_temperatures(1) == [0.7]
+    assert candidate_temperatures(3) == [0.7, 0.9, 1.1]
+    assert candidate_temperatures(5) == [0.7, 0.8, 0.9, 1.0, 1.1]
+
+
+def test_candidates_validation():
+    from app import app, moodify_gate
+
+    client = app.test_client()
+    for candidates in (0, "3", 99, True):
+        response = client.post("/moodify", json={"text": "I hate this", "target_sentiment": "positive",
+                                                 "candidates": candidates})
+        assert response.status_code == 400
+
+    # Three candidates need three free permits
+    held = moodify_gate.max_concurrency - 2
+    assert moodify_gate.try_acquire(held)
+    try:
+        response = client.post("/moodify", json={"text": "I hate this", "target_sentiment": "positive",
+                                                 "candidates": 3})
+        assert response.status_code == 503
+    finally:
+        moodify_gate.release(held)
+    assert moodify_gate.stats()["in_flight"] == 0
+
+
+if __name__ == "__main__":
+    print("🚀 Testing multi-candidate moodify")
+    print("-" * 60)
+    test_candidate_score_prefers_hits_then_margin()
+    test_returns_first_hit_and_cancels_the_rest()
+    test_without_a_hit_picks_closest_to_target()
+    test_candidate_temperatures_are_spread()
+    test_candidates_validation()
+    print("\n✅ All multi-candidate moodify tests passed!")
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Parity test for the TextBlob-compatible polarity engine (pattern_polarity.py)
+Compares PolarityEngine with TextBlob(text).sentiment on texts exercising
+intensifiers, negations, punctuation and emoticons, and on a generated corpus
+"""
+
+import sys
+import os
+import random
+
+from textblob import TextBlob
+from textblob.en import sentiment as pattern_lexicon
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from pattern_polarity import PolarityEngine, find_tokens
+from model import analyze_sentiment, analyze_sentiment_batch
+
+# Both sum the same numbers in the same order, so the results should be identical
+TOLERANCE = 1e-9
+
+RULE_TEXTS = [
+    "The movie was good.",
+    "The movie was very good.",
+    "The movie was really not good.",
+    "The movie was not good.",
+    "The movie was not a good one.",
+    "The movie was not bad at all",
+    "I never liked it, and I'm not sure I ever will.",
+    "It wasn't terrible, it was terribly boring!",
+    "Great!!! Just great!",
+    "Oh sure, that went well (!)",
+    "Best day ever :) :D <3",
+    "Worst day ever :( :'(",
+    "He said \"that's awful\" and left... U.S. politics, etc.",
+    "First paragraph is happy.\n\nSecond one is sad and ugly.",
+    "no no no, absolutely not",
+    "EXTREMELY HAPPY, slightly sad",
+    "",
+    "   ",
+]
+
+VOCABULARY = ("good bad great terrible happy sad very really extremely slightly not never no n't isn't don't "
+              "a the movie is it ! ? . ... , (!) :) :( :D ;) <3 U.S. etc. \" ' “ ” \n\n").split(" ")
+
+
+def generated_texts(count, seed=11):
+    """Texts mixing lexicon words, modifiers, negations, punctuation, quotes and emoticons"""
+    rng = random.Random(seed)
+    lexicon_words = sorted(dict.keys(pattern_lexicon))
+    texts = []
+    for _ in range(count):
+        words = []
+        for _ in range(rng.randint(0, 25)):
+            word = rng.choice(lexicon_words) if rng.random() < 0.4 else rng.choice(VOCABULARY)
+            roll = rng.random()
+            if roll < 0.1:
+                word = word.upper()
+            elif roll < 0.2:
+                word = word.capitalize()
+            if rng.random() < 0.15:
+                word += rng.choice(["!", "?", ".", ",", ")", "...", "'", '"'])
+            words.append(word)
+        texts.append(" ".join(words))
+    return texts
+
+
+def _compare(engine, texts):
+    for text, (polarity, subjectivity) in zip(texts, engine.sentiment_batch(texts)):
+        expected = TextBlob(text).sentiment
+        assert abs(polarity - expected.polarity) <= TOLERANCE, (text, polarity, expected)
+        assert abs(subjectivity - expected.subjectivity) <= TOLERANCE, (text, subjectivity, expected)
+
+
+def test_rule_texts_match_textblob():
+    _compare(PolarityEngine(), RULE_TEXTS)
+
+
+def test_generated_corpus_matches_textblob():
+    _compare(PolarityEngine(), generated_texts(3000))
+
+
+def test_tokens_match_pattern_tokenizer():
+    for text in RULE_TEXTS + generated_texts(300, seed=12):
+        expected = [word.lower() for word in " ".join(pattern_lexicon.tokenizer(text)).split()]
+        assert find_tokens(text) == expected, text
+
+
+def test_batch_results_match_single_texts():
+    texts = RULE_TEXTS + RULE_TEXTS[:4]
+    assert analyze_sentiment_batch(texts) == [analyze_sentiment(text) for text in texts]
+
+
+if __name__ == "__main__":
+    print("🚀 Testing the TextBlob-compatible polarity engine")
+    print("-" * 60)
+    test_rule_texts_match_textblob()
+    test_generated_corpus_matches_textblob()
+    test_tokens_match_pattern_tokenizer()
+    test_batch_results_match_single_texts()
+    print("\n✅ All polarity engine tests passed!")
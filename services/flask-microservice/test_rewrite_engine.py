@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Test script for the offline rewrite engine
+Checks phrase matching, case and punctuation handling, intensity tiers and
+that the moodify fallback goes through it; no API key is needed
+"""
+
+import sys
+import os
+import time
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import model
+from rewrite_engine import LEXICON, RewriteEngine, offline_intensity, rewrite_engine
+
+
+def test_lexicon_compiles_and_is_large():
+    assert len(rewrite_engine) > 300
+    try:
+        RewriteEngine([LEXICON[0], LEXICON[0]])
+        raise AssertionError("expected duplicate phrases to be rejected")
+    except ValueError:
+        pass
+
+
+def test_preserves_case_and_punctuation():
+    text, changes = rewrite_engine.rewrite("Terrible service; the food was AWFUL, and I hate it!", "positive")
+    assert text == "Wonderful service; the food was WONDERFUL, and I love it!"
+    assert changes == [("Terrible", "Wonderful"), ("AWFUL", "WONDERFUL"), ("hate", "love")]
+
+
+def test_longest_phrase_wins():
+    text, _ = rewrite_engine.rewrite("I'm fed up. It was a waste of time, not bad at all", "negative")
+    # Already-negative phrases are left alone; "not bad at all" is rewritten as a whole, not as "bad"
+    assert text == "I'm fed up. It was a waste of time, mediocre"
+    assert rewrite_engine.rewrite("The soup was not bad", "negative")[0] == "The soup was mediocre"
+    text, _ = rewrite_engine.rewrite("I’m fed   up with it", "positive")
+    assert text == "I’m pleased with it"
+
+
+def test_like_as_a_verb_only():
+    assert rewrite_engine.rewrite("I like it", "negative")[0] == "I dislike it"
+    assert rewrite_engine.rewrite("I dislike it", "positive")[0] == "I enjoy it"
+    # Comparisons and requests are not opinions
+    assert rewrite_engine.rewrite("It looks like rain", "negative") == ("It looks like rain", [])
+    assert rewrite_engine.rewrite("I'd like a good one", "negative")[0] == "I'd like a bad one"
+
+
+def test_no_partial_word_matches():
+    text, changes = rewrite_engine.rewrite("Badly baddest sadness", "positive")
+    assert text == "Badly baddest sadness" and changes == []
+
+
+def test_article_follows_replacement():
+    text, _ = rewrite_engine.rewrite("What an awful meal. A bad start.", "positive")
+    assert text == "What a wonderful meal. A good start."
+    text, _ = rewrite_engine.rewrite("It was a good movie", "negative")
+    assert text == "It was a bad movie"
+
+
+def test_intensity_tiers():
+    assert rewrite_engine.rewrite("The food was bad", "positive")[0] == "The food was good"
+    assert rewrite_engine.rewrite("The food was terrible", "positive")[0] == "The food was wonderful"
+    assert rewrite_engine.rewrite("The food was terrible", "positive", intensity="mild")[0] == "The food was fine"
+    assert rewrite_engine.rewrite("The food was bad", "positive", intensity="strong")[0] == "The food was wonderful"
+    assert rewrite_engine.rewrite("The food was amazing", "neutral")[0] == "The food was so-so"
+    try:
+        rewrite_engine.rewrite("The food was bad", "positive", intensity="extreme")
+        raise AssertionError("expected an invalid intensity to be rejected")
+    except ValueError:
+        pass
+
+
+def test_bad_intensity_setting_falls_back_to_match():
+    assert offline_intensity("Strong") == "strong"
+    assert offline_intensity("high") == "match"
+
+
+def test_long_text_is_linear():
+    sentence = "Honestly the service was terrible, I hate waiting, and the whole trip was a waste of time. "
+    start = time.perf_counter()
+    short_text, _ = rewrite_engine.rewrite(sentence * 200, "positive")
+    short_elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    long_text, changes = rewrite_engine.rewrite(sentence * 2000, "positive")
+    long_elapsed = time.perf_counter() - start
+    assert len(changes) == 3 * 2000 and long_text.count("wonderful") == 2000
+    # 10x the text should cost roughly 10x the time, not more
+    assert long_elapsed < max(short_elapsed, 0.001) * 30
+    print(f"✅ Rewrote {len(sentence) * 2000} characters in {long_elapsed * 1000:.1f}ms")
+
+
+def test_fallback_uses_engine():
+    result = model.fallback_word_replacement("This is a terrible day", "positive", "negative", "no key")
+    assert result["modified_text"] == "This is a wonderful day"
+    assert result["changes_made"] == ["Fallback method used (API error: no key)", "'terrible' → 'wonderful'"]
+    assert result["success"] and result["new_sentiment"] == "positive"
+
+
+if __name__ == "__main__":
+    print("🚀 Testing offline rewrite engine")
+    print("-" * 60)
+    test_lexicon_compiles_and_is_large()
+    test_preserves_case_and_punctuation()
+    test_longest_phrase_wins()
+    test_like_as_a_verb_only()
+    test_no_partial_word_matches()
+    test_article_follows_replacement()
+    test_intensity_tiers()
+    test_bad_intensity_setting_falls_back_to_match()
+    test_long_text_is_linear()
+    test_fallback_uses_engine()
+    print("\n✅ All offline rewrite engine tests passed!")
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Test script for the offline corpus scoring CLI (score_corpus.py)
+Scores small CSV and JSONL files on a process pool and checks that an
+interrupted run resumes to the same output as an uninterrupted one
+"""
+
+import sys
+import os
+import csv
+import json
+import tempfile
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from score_corpus import score_corpus
+
+TEXTS = ["I love this so much!", "This is terrible", "It is a table", "What a wonderful day", ""]
+
+
+def quiet(message):
+    pass
+
+
+def write_csv(path, count):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["review_id", "body"])
+        for i in range(count):
+            writer.writerow([f"r{i}", TEXTS[i % len(TEXTS)]])
+
+
+def read_output(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_csv_in_input_order():
+    with tempfile.TemporaryDirectory() as tmp:
+        source, output = os.path.join(tmp, "in.csv"), os.path.join(tmp, "out.jsonl")
+        write_csv(source, 103)
+        summary = score_corpus(source, output, model="textblob", processes=2, chunk_size=10,
+                               text_column="body", id_column="review_id", log=quiet)
+        records = read_output(output)
+        assert summary["rows"] == 103 and summary["errors"] == 20
+        assert [record["row"] for record in records] == list(range(1, 104))
+        assert records[0]["id"] == "r0" and records[0]["textblob"]["sentiment"] == "positive"
+        assert records[1]["textblob"]["sentiment"] == "negative"
+        assert records[4] == {"row": 5, "id": "r4", "error": "Missing text"}
+
+
+def test_resume_matches_uninterrupted_run():
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "in.jsonl")
+        with open(source, "w", encoding="utf-8") as f:
+            for i in range(250):
+                f.write(json.dumps({"id": i, "text": f"{TEXTS[i % 4]} #{i}"}) + "\n")
+            f.write("not json\n")
+
+        reference = os.path.join(tmp, "reference.jsonl")
+        score_corpus(source, reference, model="lightweight", processes=2, chunk_size=16, log=quiet)
+
+        output = os.path.join(tmp, "out.jsonl")
+        first = score_corpus(source, output, model="lightweight", processes=2, chunk_size=16, limit=100, log=quiet)
+        assert first["rows"] == 100
+        # A chunk that was being written when the process died
+        with open(output, "a", encoding="utf-8") as f:
+            f.write('{"row": 101, "id": 100, "lightw')
+
+        second = score_corpus(source, output, model="lightweight", processes=2, chunk_size=16, log=quiet)
+        assert second["scored"] == 151 and second["rows"] == 251 and second["errors"] == 1
+        assert read_output(output) == read_output(reference)
+
+        # Nothing left to do
+        assert score_corpus(source, output, model="lightweight", processes=2, log=quiet)["scored"] == 0
+
+
+def test_refuses_mismatched_checkpoint():
+    with tempfile.TemporaryDirectory() as tmp:
+        source, output = os.path.join(tmp, "in.csv"), os.path.join(tmp, "out.jsonl")
+        write_csv(source, 5)
+        score_corpus(source, output, model="textblob", processes=1, text_column="body", log=quiet)
+        try:
+            score_corpus(source, output, model="lightweight", processes=1, text_column="body", log=quiet)
+            raise AssertionError("expected a checkpoint for another model to be rejected")
+        except ValueError:
+            pass
+        summary = score_corpus(source, output, model="lightweight", processes=1, text_column="body",
+                               restart=True, log=quiet)
+        assert summary["rows"] == 5 and "lightweight" in read_output(output)[0]
+
+
+if __name__ == "__main__":
+    print("🚀 Testing offline corpus scoring")
+    print("-" * 60)
+    test_csv_in_input_order()
+    test_resume_matches_uninterrupted_run()
+    test_refuses_mismatched_checkpoint()
+    print("\n✅ All corpus scoring tests passed!")
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Test script for NDJSON bulk scoring (/score-stream)
+Runs the app on a local threaded server so chunked uploads and streamed
+responses go over a real socket
+"""
+
+import sys
+import os
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from werkzeug.serving import make_server
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import app as app_module
+from bulk_stream import InputSpool, stream_results
+
+
+def ndjson(count):
+    for i in range(count):
+        text = "I love this" if i % 2 else "This is terrible"
+        yield (json.dumps({"id": i, "text": text}) + "\n").encode()
+
+
+def start_server():
+    server = make_server("127.0.0.1", 0, app_module.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def test_bounded_in_flight_batches():
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def score(texts):
+        with lock:
+            running.append(1)
+            peak.append(len(running))
+        threading.Event().wait(0.01)
+        with lock:
+            running.pop()
+        return [{"length": len(text)} for text in texts]
+
+    lines = ((i + 1, json.dumps({"id": i, "text": "x" * i}).encode()) for i in range(200))
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(stream_results(lines, score, executor, batch_size=10, max_in_flight=2))
+    assert sorted(result["id"] for result in results) == list(range(200))
+    assert all(result["length"] == result["id"] for result in results)
+    assert max(peak) <= 2
+
+
+def test_spool_splits_lines_across_chunks():
+    class Trickle:
+        def __init__(self, data):
+            self.data = data
+
+        def read(self, size):
+            chunk, self.data = self.data[:3], self.data[3:]
+            return chunk
+
+    spool = InputSpool(Trickle(b'{"id": 1}\n' + b"x" * 50 + b'\n{"id": 2}'))
+    try:
+        lines = list(spool.iter_lines(max_line_bytes=20))
+    finally:
+        spool.close()
+    assert lines == [(1, b'{"id": 1}'), (2, None), (3, b'{"id": 2}')]
+
+
+def test_spool_stops_at_upload_cap():
+    class Chunks:
+        def __init__(self, chunks):
+            self.chunks = chunks
+
+        def read(self, size):
+            return self.chunks.pop(0) if self.chunks else b""
+
+    spool = InputSpool(Chunks([b'{"id": 1}\n{"id": 2}\n{"id"', b": 3}\n" * 100]), max_bytes=50)
+    try:
+        lines = list(spool.iter_lines())
+    finally:
+        spool.close()
+    # The line cut off at the cap is dropped rather than reported as invalid JSON
+    assert lines == [(1, b'{"id": 1}'), (2, b'{"id": 2}')]
+    assert spool.truncated and "BULK_MAX_UPLOAD_BYTES" in spool.error
+
+    client = app_module.app.test_client()
+    limit = app_module.BULK_MAX_UPLOAD_BYTES
+    app_module.BULK_MAX_UPLOAD_BYTES = 10
+    try:
+        assert client.post("/score-stream", data=b'{"id": 1, "text": "ok"}\n').status_code == 413
+    finally:
+        app_module.BULK_MAX_UPLOAD_BYTES = limit
+
+
+def test_chunked_upload_streams_results():
+    server = start_server()
+    try:
+        url = f"http://127.0.0.1:{server.server_port}/score-stream?models=textblob"
+        # requests uploads the whole generator before reading the response; several MB
+        # of results must not deadlock against the upload
+        count = 20000
+        response = requests.post(url, data=ndjson(count), stream=True, timeout=60,
+                                 headers={"Content-Type": "application/x-ndjson"})
+        assert response.status_code == 200
+        assert response.headers["Content-Type"].startswith("application/x-ndjson")
+
+        seen = set()
+        summary = None
+        for line in response.iter_lines():
+            record = json.loads(line)
+            if record.get("done"):
+                summary = record
+                continue
+            expected = "positive" if record["id"] % 2 else "negative"
+            assert record["textblob"]["sentiment"] == expected
+            seen.add(record["id"])
+        assert seen == set(range(count))
+        assert summary["count"] == count and summary["errors"] == 0
+    finally:
+        server.shutdown()
+
+
+def test_bad_lines_and_model_selection():
+    client = app_module.app.test_client()
+    body = b'{"id": 1, "text": "I love it"}\n\nnot json\n{"id": "x", "text": 5}\n'
+    lines = client.post("/score-stream", data=body).get_data(as_text=True).splitlines()
+    records = [json.loads(line) for line in lines]
+    assert records[0]["id"] == 1 and records[0]["line"] == 1
+    assert records[0]["textblob"]["sentiment"] == "positive"
+    assert records[1] == {"id": None, "line": 3, "error": "Invalid JSON"}
+    assert records[2]["id"] == "x" and records[2]["line"] == 4 and "error" in records[2]
+    assert records[3]["done"] and records[3]["errors"] == 2
+    assert client.post("/score-stream?models=textblob,unknown", data=b"").status_code == 400
+
+
+if __name__ == "__main__":
+    print("🚀 Testing NDJSON bulk scoring")
+    print("-" * 60)
+    test_bounded_in_flight_batches()
+    test_spool_splits_lines_across_chunks()
+    test_spool_stops_at_upload_cap()
+    test_chunked_upload_streams_results()
+    test_bad_lines_and_model_selection()
+    print("\n✅ All NDJSON bulk scoring tests passed!")
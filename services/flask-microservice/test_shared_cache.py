@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Test script for the shared (second-tier) result cache
+Uses a temporary SQLite file and an in-process fake Redis client
+"""
+
+import sys
+import os
+import tempfile
+import time
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from cache import ResultCache, TieredCache, SQLiteCacheBackend, RedisCacheBackend, cached_call, cached_batch
+
+
+class FakeRedis:
+    """Just enough of the redis-py client for RedisCacheBackend"""
+
+    def __init__(self):
+        self.store = {}
+        self.round_trips = 0
+
+    def get(self, key):
+        self.round_trips += 1
+        return self._get(key)
+
+    def mget(self, keys):
+        self.round_trips += 1
+        return [self._get(key) for key in keys]
+
+    def setex(self, key, ttl, value):
+        self.round_trips += 1
+        self._setex(key, ttl, value)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def _get(self, key):
+        value, expires_at = self.store.get(key, (None, 0))
+        return value.encode() if value is not None and expires_at > time.time() else None
+
+    def _setex(self, key, ttl, value):
+        self.store[key] = (value, time.time() + ttl)
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def setex(self, key, ttl, value):
+        self.commands.append((key, ttl, value))
+
+    def execute(self):
+        self.client.round_trips += 1
+        for command in self.commands:
+            self.client._setex(*command)
+
+
+class BrokenBackend:
+    name = "broken"
+
+    def __init__(self):
+        self.calls = 0
+
+    def get_many(self, keys):
+        self.calls += 1
+        raise ConnectionError("backend down")
+
+    def set_many(self, items, ttl_seconds):
+        self.calls += 1
+        raise ConnectionError("backend down")
+
+
+def _shared_by_two_workers(make_backend):
+    """Two 'workers' with their own first tier see each other's results through the backend"""
+    calls = []
+
+    def analyze(text):
+        calls.append(text)
+        return {"text": text, "score": 0.5}
+
+    worker_a = TieredCache(ResultCache(), make_backend())
+    worker_b = TieredCache(ResultCache(), make_backend())
+
+    assert cached_call(worker_a, "vader", "1", analyze, "so tired") == {"text": "so tired", "score": 0.5}
+    assert cached_call(worker_b, "vader", "1", analyze, "so tired") == {"text": "so tired", "score": 0.5}
+    assert calls == ["so tired"]
+    assert worker_b.stats()["shared"]["hits"] == 1
+
+
+def test_sqlite_backend_shared_and_persistent():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "results.sqlite3")
+        _shared_by_two_workers(lambda: SQLiteCacheBackend(path))
+
+        # A fresh backend on the same file (e.g. after a restart) still has the entry
+        restarted = SQLiteCacheBackend(path)
+        tiered = TieredCache(ResultCache(), restarted)
+        assert cached_call(tiered, "vader", "1", lambda text: {"recomputed": True}, "so tired")["text"] == "so tired"
+
+
+def test_sqlite_backend_expiry_and_pruning():
+    with tempfile.TemporaryDirectory() as tmp:
+        backend = SQLiteCacheBackend(os.path.join(tmp, "results.sqlite3"), max_entries=3, prune_every=1)
+        backend.set("expired", {"v": 0}, ttl_seconds=-1)
+        assert backend.get("expired") is None
+        for i in range(5):
+            backend.set(f"k{i}", {"v": i}, ttl_seconds=60 + i)
+        count = backend._connection().execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        assert count == 3
+        assert backend.get("k4") == {"v": 4}
+
+
+def test_redis_backend_with_fake_client():
+    fake = FakeRedis()
+    _shared_by_two_workers(lambda: RedisCacheBackend(client=fake))
+    assert all(key.startswith("moodify:result:") for key in fake.store)
+
+
+def test_batches_use_one_round_trip():
+    fake = FakeRedis()
+    tiered = TieredCache(ResultCache(), RedisCacheBackend(client=fake))
+    texts = [f"text {i}" for i in range(100)]
+    assert cached_batch(tiered, "vader", "1", lambda batch: [{"t": t} for t in batch], texts)[5] == {"t": "text 5"}
+    # One MGET for the misses and one pipelined write
+    assert fake.round_trips == 2
+
+    fresh = TieredCache(ResultCache(), RedisCacheBackend(client=fake))
+    assert cached_batch(fresh, "vader", "1", lambda batch: [{"recomputed": True}] * len(batch), texts) == \
+        [{"t": t} for t in texts]
+    assert fake.round_trips == 3 and fresh.stats()["shared"]["hits"] == 100
+
+
+def test_sqlite_batches():
+    with tempfile.TemporaryDirectory() as tmp:
+        backend = SQLiteCacheBackend(os.path.join(tmp, "results.sqlite3"))
+        backend.set_many([(f"k{i}", {"v": i}) for i in range(1200)], ttl_seconds=60)
+        assert backend.get_many(["k3", "missing", "k1199"]) == [{"v": 3}, None, {"v": 1199}]
+        assert len([value for value in backend.get_many([f"k{i}" for i in range(1200)]) if value]) == 1200
+
+
+def test_backend_errors_fall_back_to_local():
+    broken = BrokenBackend()
+    tiered = TieredCache(ResultCache(), broken, error_backoff=60)
+    assert cached_call(tiered, "vader", "1", lambda text: {"ok": True}, "hello") == {"ok": True}
+    assert cached_call(tiered, "vader", "1", lambda text: {"ok": False}, "hello") == {"ok": True}
+    assert tiered.stats()["shared"]["errors"] == 1
+
+    # While backing off, the backend isn't tried at all
+    cached_batch(tiered, "vader", "1", lambda batch: [{"ok": True}] * len(batch), [f"t{i}" for i in range(50)])
+    stats = tiered.stats()["shared"]
+    assert broken.calls == 1 and stats["backing_off"] and stats["skipped"] >= 2
+
+    tiered._retry_at = 0.0
+    assert cached_call(tiered, "vader", "1", lambda text: {"ok": True}, "again") == {"ok": True}
+    assert broken.calls == 2
+
+
+if __name__ == "__main__":
+    print("🚀 Testing shared result cache")
+    print("-" * 60)
+    test_sqlite_backend_shared_and_persistent()
+    test_sqlite_backend_expiry_and_pruning()
+    test_redis_backend_with_fake_client()
+    test_batches_use_one_round_trip()
+    test_sqlite_batches()
+    test_backend_errors_fall_back_to_local()
+    print("\n✅ All shared cache tests passed!")
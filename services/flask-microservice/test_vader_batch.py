@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Parity test for the batch VADER scorer (vader_batch.py)
+Compares VaderBatchScorer with SentimentIntensityAnalyzer.polarity_scores on
+texts exercising every VADER rule and on a generated corpus
+Skipped automatically when vaderSentiment or numpy is not installed
+"""
+
+import sys
+import os
+import random
+
+import pytest
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from model import VADER_AVAILABLE, LightweightEmotionAnalyzer
+from vader_batch import VADER_BATCH_AVAILABLE, SCORE_KEYS
+
+# One unit in the last rounded place: pos/neg/neu have 3 decimals, compound 4
+TOLERANCE = {"neg": 1e-3, "neu": 1e-3, "pos": 1e-3, "compound": 1e-4}
+
+RULE_TEXTS = [
+    "VADER is smart, handsome, and funny.",
+    "VADER is smart, handsome, and funny!",
+    "VADER is very smart, handsome, and funny.",
+    "VADER is VERY SMART, handsome, and FUNNY!!!",
+    "VADER is not smart, handsome, nor funny.",
+    "The book was good.",
+    "At least it isn't a horrible book.",
+    "The book was only kind of good.",
+    "The plot was good, but the characters are uncompelling and the dialog is not great.",
+    "Today SUX!",
+    "Today only kinda sux! But I'll get by, lol",
+    "Make sure you :) or :D today!",
+    "Catch utf-8 emoji such as such as 💘 and 💋 and 😁",
+    "Not bad at all",
+    "no problems, no worries",
+    "There is no love, no joy or hope left",
+    "It was the least helpful reply, at least at first",
+    "I never so loved a movie without doubt",
+    "That movie was the bomb, the shit even",
+    "yeah right, a kiss of death",
+    "good good good but bad bad bad but good",
+    "I don't like it and it doesn't work",
+    "Why??? Why would you do this?!?!",
+    "😁😁😁",
+    "",
+    "   ",
+    ":(",
+]
+
+VOCABULARY = ("love hate good bad terrible great horrible wonderful happy sad kind of sort the bomb shit yeah "
+              "right kiss death no not never nor or so this without doubt least at very extremely barely but "
+              "isn't don't cannot table day movie :) :( :D").split()
+
+
+def generated_texts(count, seed=3):
+    """Texts mixing lexicon words, boosters, negations, capitals, punctuation and emoji"""
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        words = []
+        for _ in range(rng.randint(1, 20)):
+            word = rng.choice(VOCABULARY)
+            roll = rng.random()
+            if roll < 0.1:
+                word = word.upper()
+            elif roll < 0.2:
+                word = word.capitalize()
+            if rng.random() < 0.1:
+                word += rng.choice("!?.,")
+            if rng.random() < 0.02:
+                word = rng.choice("😁💔🎉") + word
+            words.append(word)
+        texts.append(" ".join(words) + rng.choice(["", "!", "!!!!!", "??", "?!?!?"]))
+    return texts
+
+
+def _compare(texts, analyzer):
+    expected = [analyzer.analyzer.polarity_scores(text) for text in texts]
+    actual = analyzer.batch_scorer.polarity_scores(texts)
+    exact = 0
+    for text, want, got in zip(texts, expected, actual):
+        assert list(got) == list(SCORE_KEYS), text
+        for key in SCORE_KEYS:
+            assert abs(got[key] - want[key]) <= TOLERANCE[key] + 1e-12, (text, key, got, want)
+        exact += got == want
+    return exact
+
+
+def test_rule_texts_match_polarity_scores():
+    if not (VADER_AVAILABLE and VADER_BATCH_AVAILABLE):
+        pytest.skip("vaderSentiment/numpy not installed")
+    analyzer = LightweightEmotionAnalyzer()
+    assert _compare(RULE_TEXTS, analyzer) == len(RULE_TEXTS)
+
+
+def test_generated_corpus_matches_polarity_scores():
+    if not (VADER_AVAILABLE and VADER_BATCH_AVAILABLE):
+        pytest.skip("vaderSentiment/numpy not installed")
+    analyzer = LightweightEmotionAnalyzer()
+    texts = generated_texts(3000)
+    # Differences are only allowed where float summation order flips a rounding
+    assert _compare(texts, analyzer) >= 0.99 * len(texts)
+    # Scoring doesn't depend on what else is in the batch
+    assert analyzer.batch_scorer.polarity_scores(texts[:7]) == analyzer.batch_scorer.polarity_scores(texts)[:7]
+    assert analyzer.batch_scorer.polarity_scores([]) == []
+
+
+def test_emotion_batch_matches_single_texts():
+    if not VADER_AVAILABLE:
+        pytest.skip("vaderSentiment not installed")
+    analyzer = LightweightEmotionAnalyzer()
+    texts = RULE_TEXTS + RULE_TEXTS[:3]
+    for text, result in zip(texts, analyzer.analyze_emotion_batch(texts)):
+        single = analyzer.analyze_emotion(text)
+        assert result["dominant_emotion"] == single["dominant_emotion"], text
+        assert abs(result["vader_scores"]["compound"] - single["vader_scores"]["compound"]) <= 1e-4, text
+
+
+if __name__ == "__main__":
+    print("🚀 Testing the batch VADER scorer")
+    print("-" * 60)
+    for test in (test_rule_texts_match_polarity_scores, test_generated_corpus_matches_polarity_scores,
+                 test_emotion_batch_matches_single_texts):
+        try:
+            test()
+        except pytest.skip.Exception as e:
+            print(f"⏭️  Skipped: {e.msg}")
+    print("\n✅ All batch VADER tests passed!")
@@ -0,0 +1,323 @@
+"""
+Batch VADER scoring with NumPy.
+
+SentimentIntensityAnalyzer.polarity_scores scores one text at a time and
+looks every rule up by string: each lexicon word lowercases and rescans the
+whole sentence a few times over. VaderBatchScorer compiles the lexicon, the
+booster/negation word lists and the idioms into arrays indexed by word id
+once. A batch is then tokenized in a single pass (each distinct token is
+stripped and lowercased once per batch), and the valence rules run as array
+operations over every token of the batch:
+
+- lexicon valence, "no" negation and ALL CAPS emphasis
+- boosters/dampeners and negations up to three words back
+- special idioms and booster n-grams ("kind of", "the bomb", ...)
+- "least" negation, then the per-text sums, punctuation emphasis and normalization
+
+The "but" rule is the only one that depends on list order in VADER (it
+re-finds each score with list.index), so it is replayed exactly per text,
+and only for texts containing "but".
+
+Results match polarity_scores up to float summation order; in practice they
+are identical after rounding.
+"""
+
+import re
+import string
+import sys
+
+try:
+    import numpy as np
+    VADER_BATCH_AVAILABLE = True
+except ImportError:
+    VADER_BATCH_AVAILABLE = False
+
+# Column order of VaderBatchScorer.score, the same as polarity_scores' keys
+SCORE_KEYS = ("neg", "neu", "pos", "compound")
+
+# Word ids with no entry in the compiled vocabulary; the second one is a negation ("...n't")
+UNKNOWN, UNKNOWN_NEGATION = 0, 1
+
+# Boosters two and three words back are dampened by distance
+BOOSTER_DISTANCE_SCALE = (1.0, 0.95, 0.9)
+
+RULE_WORDS = ("no", "or", "nor", "kind", "of", "never", "so", "this", "without", "doubt", "least", "at", "very", "but")
+
+
+class _NgramTable:
+    """Values of two- and three-word phrases, looked up by the word ids of each position"""
+
+    def __init__(self, phrases, vocab):
+        self.size = len(vocab)
+        tables = {2: {}, 3: {}}
+        for phrase, value in phrases.items():
+            words = phrase.split(" ")
+            if len(words) in tables:
+                tables[len(words)][self._key([vocab[word] for word in words])] = float(value)
+        self.tables = {}
+        for length, entries in tables.items():
+            keys = np.array(sorted(entries), dtype=np.int64)
+            self.tables[length] = (keys, np.array([entries[key] for key in keys.tolist()], dtype=np.float64))
+
+    def _key(self, ids):
+        key = 0
+        for word_id in ids:
+            key = key * self.size + word_id
+        return key
+
+    def lookup(self, *columns):
+        """(found, value) arrays for the phrases made of the word ids in columns"""
+        keys, values = self.tables[len(columns)]
+        query = np.zeros(len(columns[0]), dtype=np.int64)
+        for column in columns:
+            query = query * self.size + column
+        if not len(keys):
+            return np.zeros(len(query), dtype=bool), np.zeros(len(query))
+        index = np.minimum(np.searchsorted(keys, query), len(keys) - 1)
+        return keys[index] == query, values[index]
+
+
+def _shifted(values, offset, valid):
+    """values moved offset tokens later (earlier for a negative offset), 0 where not valid"""
+    out = np.zeros_like(values)
+    if offset > 0:
+        out[offset:] = values[:-offset]
+    else:
+        out[:offset] = values[-offset:]
+    out[~valid] = 0
+    return out
+
+
+def _character_class(characters):
+    """A regex character class of characters, as ranges of consecutive code points"""
+    points = sorted(ord(character) for character in characters)
+    ranges = []
+    for point in points:
+        if ranges and point == ranges[-1][1] + 1:
+            ranges[-1][1] = point
+        else:
+            ranges.append([point, point])
+    return "[" + "".join(re.escape(chr(first)) if first == last else f"{re.escape(chr(first))}-{re.escape(chr(last))}"
+                         for first, last in ranges) + "]"
+
+
+def _but_check(sentiments, but_index):
+    """VADER's "but" rule as it runs in polarity_scores, list.index lookups included"""
+    for sentiment in sentiments:
+        si = sentiments.index(sentiment)
+        if si < but_index:
+            sentiments[si] = sentiment * 0.5
+        elif si > but_index:
+            sentiments[si] = sentiment * 1.5
+    return sentiments
+
+
+class VaderBatchScorer:
+    """polarity_scores for many texts at once, from an existing SentimentIntensityAnalyzer's lexicon"""
+
+    def __init__(self, analyzer):
+        # The rule constants live next to the analyzer class, whichever way vaderSentiment was imported
+        rules = sys.modules[type(analyzer).__module__]
+        self.b_incr, self.c_incr, self.n_scalar = rules.B_INCR, rules.C_INCR, rules.N_SCALAR
+
+        words = set(analyzer.lexicon) | set(rules.NEGATE) | set(RULE_WORDS)
+        for phrase in list(rules.BOOSTER_DICT) + list(rules.SPECIAL_CASES):
+            words.update(phrase.split(" "))
+        self.vocab = {word: i for i, word in enumerate(sorted(words), start=2)}
+        size = len(self.vocab) + 2
+
+        self.valence = np.zeros(size)
+        self.in_lexicon = np.zeros(size, dtype=bool)
+        self.booster = np.zeros(size)
+        self.is_booster = np.zeros(size, dtype=bool)
+        self.negation = np.zeros(size, dtype=bool)
+        self.negation[UNKNOWN_NEGATION] = True
+        for word, i in self.vocab.items():
+            if word in analyzer.lexicon:
+                self.valence[i] = analyzer.lexicon[word]
+                self.in_lexicon[i] = True
+            if word in rules.BOOSTER_DICT:
+                self.booster[i] = rules.BOOSTER_DICT[word]
+                self.is_booster[i] = True
+            self.negation[i] = word in rules.NEGATE or "n't" in word
+        self.ids = {word: self.vocab[word] for word in RULE_WORDS}
+
+        self.special_cases = _NgramTable(rules.SPECIAL_CASES, self.vocab)
+        self.booster_ngrams = _NgramTable(rules.BOOSTER_DICT, self.vocab)
+
+        # polarity_scores replaces emoji characters one at a time, so only single-character entries apply
+        self.emojis = {emoji: description for emoji, description in analyzer.emojis.items() if len(emoji) == 1}
+        self.emoji_re = re.compile(_character_class(self.emojis))
+        self.ascii_emojis = any(emoji.isascii() for emoji in self.emojis)
+
+    def _replace_emoji(self, match):
+        text, start = match.string, match.start()
+        # A description gets a space in front unless it starts the text or follows a space
+        if start == 0 or text[start - 1] == " ":
+            return self.emojis[match.group()]
+        return " " + self.emojis[match.group()]
+
+    def _token(self, word):
+        """(word id, ALL CAPS) of a whitespace-separated token"""
+        stripped = word.strip(string.punctuation)
+        # Tokens that strip down to two characters or fewer are likely emoticons and stay as they are
+        item = word if len(stripped) <= 2 else stripped
+        lower = item.lower()
+        word_id = self.vocab.get(lower, UNKNOWN_NEGATION if "n't" in lower else UNKNOWN)
+        return word_id, item.isupper()
+
+    def _tokenize(self, texts):
+        tokens = {}
+        ids, upper, lengths, exclamations, questions = [], [], [], [], []
+        for text in texts:
+            if (self.ascii_emojis or not text.isascii()) and self.emoji_re.search(text):
+                text = self.emoji_re.sub(self._replace_emoji, text)
+            words = text.split()
+            lengths.append(len(words))
+            exclamations.append(text.count("!"))
+            questions.append(text.count("?"))
+            for word in words:
+                token = tokens.get(word)
+                if token is None:
+                    token = tokens[word] = self._token(word)
+                ids.append(token[0])
+                upper.append(token[1])
+        return (np.array(ids, dtype=np.int64), np.array(upper, dtype=bool), np.array(lengths, dtype=np.int64),
+                np.array(exclamations, dtype=np.int64), np.array(questions, dtype=np.int64))
+
+    def _negation(self, start_i, valence, p1, p2, p3):
+        """VADER's _negation_check for the word start_i + 1 positions back"""
+        ids = self.ids
+        if start_i == 0:
+            return np.where(self.negation[p1], valence * self.n_scalar, valence)
+        if start_i == 1:
+            never_so = (p2 == ids["never"]) & ((p1 == ids["so"]) | (p1 == ids["this"]))
+            without_doubt = (p2 == ids["without"]) & (p1 == ids["doubt"])
+            negated = self.negation[p2]
+        else:
+            never_so = (((p3 == ids["never"]) & ((p2 == ids["so"]) | (p2 == ids["this"])))
+                        | (p1 == ids["so"]) | (p1 == ids["this"]))
+            without_doubt = (p3 == ids["without"]) & ((p2 == ids["doubt"]) | (p1 == ids["doubt"]))
+            negated = self.negation[p3]
+        return np.where(never_so, valence * 1.25,
+                        np.where(~without_doubt & negated, valence * self.n_scalar, valence))
+
+    def _idioms(self, valence, w, p1, p2, p3, n1, n2):
+        """VADER's _special_idioms_check"""
+        # The first phrase that matches, in VADER's order, sets the valence
+        for columns in ((p3, p2), (p3, p2, p1), (p2, p1), (p2, p1, w), (p1, w)):
+            found, value = self.special_cases.lookup(*columns)
+            valence = np.where(found, value, valence)
+        # Phrases starting at the word itself override that; a missing next word is id 0 and never matches
+        for columns in ((w, n1), (w, n1, n2)):
+            found, value = self.special_cases.lookup(*columns)
+            valence = np.where(found, value, valence)
+        for columns in ((p3, p2, p1), (p3, p2), (p2, p1)):
+            found, value = self.booster_ngrams.lookup(*columns)
+            valence = valence + np.where(found, value, 0.0)
+        return valence
+
+    def _valence(self, w, up, cap_diff, i, n, p, up_prev, n1, n2):
+        """VADER's sentiment_valence for lexicon words w at positions i of texts with n words"""
+        ids = self.ids
+        p1, p2, p3 = p
+        base = self.valence[w]
+        valence = base.copy()
+        # "no" followed by a lexicon word negates that word instead of counting itself
+        valence[(w == ids["no"]) & (i != n - 1) & self.in_lexicon[n1]] = 0.0
+        after_no = (((i > 0) & (p1 == ids["no"])) | ((i > 1) & (p2 == ids["no"]))
+                    | ((i > 2) & (p3 == ids["no"]) & ((p1 == ids["or"]) | (p1 == ids["nor"]))))
+        valence = np.where(after_no, base * self.n_scalar, valence)
+
+        capitals = up & cap_diff
+        valence = np.where(capitals, np.where(valence > 0, valence + self.c_incr, valence - self.c_incr), valence)
+
+        for start_i in range(3):
+            word, word_upper = p[start_i], up_prev[start_i]
+            applies = (i > start_i) & ~self.in_lexicon[word]
+            boost = self.booster[word]
+            scalar = np.where(valence < 0, boost * -1, boost)
+            emphasis = self.is_booster[word] & word_upper & cap_diff
+            scalar = np.where(emphasis, np.where(valence > 0, scalar + self.c_incr, scalar - self.c_incr), scalar)
+            scalar = scalar * BOOSTER_DISTANCE_SCALE[start_i]
+            valence = np.where(applies, valence + scalar, valence)
+            valence = np.where(applies, self._negation(start_i, valence, p1, p2, p3), valence)
+            if start_i == 2:
+                valence = np.where(applies, self._idioms(valence, w, p1, p2, p3, n1, n2), valence)
+
+        # "least" negates the next word, except in "at least" and "very least"
+        least = ((i > 0) & (p1 == ids["least"]) & ~self.in_lexicon[p1]
+                 & (p2 != ids["at"]) & (p2 != ids["very"]))
+        return np.where(least, valence * self.n_scalar, valence)
+
+    def score(self, texts):
+        """
+        Scores of texts as a float array with one row per text and the
+        columns in SCORE_KEYS, rounded as polarity_scores rounds them
+        """
+        texts = list(texts)
+        count = len(texts)
+        ids, upper, lengths, exclamations, questions = self._tokenize(texts)
+        text_of = np.repeat(np.arange(count), lengths)
+        starts = np.cumsum(lengths) - lengths
+        pos = np.arange(len(ids)) - starts[text_of]
+        size = lengths[text_of]
+
+        # ALL CAPS only counts as emphasis when some but not all words of the text are in capitals
+        capitals = np.bincount(text_of, weights=upper.astype(np.float64), minlength=count)
+        cap_diff = ((capitals > 0) & (capitals < lengths))[text_of]
+
+        prev = [_shifted(ids, k, pos >= k) for k in (1, 2, 3)]
+        prev_upper = [_shifted(upper, k, pos >= k) for k in (1, 2, 3)]
+        next1 = _shifted(ids, -1, pos < size - 1)
+        next2 = _shifted(ids, -2, pos < size - 2)
+
+        # Boosters and the "kind" of "kind of" score 0 themselves; so does every word outside the lexicon
+        scored = (self.in_lexicon[ids] & ~self.is_booster[ids]
+                  & ~((ids == self.ids["kind"]) & (next1 == self.ids["of"])))
+        at = np.flatnonzero(scored)
+        sentiments = np.zeros(len(ids))
+        sentiments[at] = self._valence(ids[at], upper[at], cap_diff[at], pos[at], size[at],
+                                       [p[at] for p in prev], [u[at] for u in prev_upper], next1[at], next2[at])
+
+        for text in np.unique(text_of[ids == self.ids["but"]]).tolist():
+            start, end = starts[text], starts[text] + lengths[text]
+            but_index = int(np.argmax(ids[start:end] == self.ids["but"]))
+            sentiments[start:end] = _but_check(sentiments[start:end].tolist(), but_index)
+
+        return self._combine(sentiments, text_of, lengths, exclamations, questions)
+
+    def _combine(self, sentiments, text_of, lengths, exclamations, questions):
+        """VADER's score_valence for every text; bincount adds each text's scores in order, as sum() does"""
+        count = len(lengths)
+        total = np.bincount(text_of, weights=sentiments, minlength=count)
+        pos_sum = np.bincount(text_of, weights=np.where(sentiments > 0, sentiments + 1, 0.0), minlength=count)
+        neg_sum = np.bincount(text_of, weights=np.where(sentiments < 0, sentiments - 1, 0.0), minlength=count)
+        neu_count = np.bincount(text_of, weights=(sentiments == 0).astype(np.float64), minlength=count)
+
+        # Emphasis from up to four exclamation marks and from two or more question marks
+        emphasis = np.minimum(exclamations, 4) * 0.292
+        emphasis = emphasis + np.where(questions > 1, np.where(questions <= 3, questions * 0.18, 0.96), 0)
+
+        total = np.where(total > 0, total + emphasis, np.where(total < 0, total - emphasis, total))
+        compound = np.clip(total / np.sqrt(total * total + 15), -1.0, 1.0)
+
+        more_positive = pos_sum > np.abs(neg_sum)
+        more_negative = pos_sum < np.abs(neg_sum)
+        pos_sum = np.where(more_positive, pos_sum + emphasis, pos_sum)
+        neg_sum = np.where(more_negative, neg_sum - emphasis, neg_sum)
+
+        scores = np.zeros((count, len(SCORE_KEYS)))
+        words = lengths > 0
+        divisor = (pos_sum + np.abs(neg_sum) + neu_count)[words]
+        scores[words, 0] = np.abs(neg_sum[words] / divisor)
+        scores[words, 1] = np.abs(neu_count[words] / divisor)
+        scores[words, 2] = np.abs(pos_sum[words] / divisor)
+        scores[words, 3] = compound[words]
+        scores[:, :3] = np.round(scores[:, :3], 3)
+        scores[:, 3] = np.round(scores[:, 3], 4)
+        return scores
+
+    def polarity_scores(self, texts):
+        """polarity_scores dicts for texts, in input order"""
+        return [dict(zip(SCORE_KEYS, row)) for row in self.score(texts).tolist()]
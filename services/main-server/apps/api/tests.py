@@ -1,3 +1,28 @@
+from unittest import mock
+
+import requests
 from django.test import TestCase
 
-# Create your tests here.
+ARROW_MIMETYPE = 'application/vnd.apache.arrow.stream'
+# An Arrow IPC stream starts with a continuation marker that isn't valid UTF-8
+ARROW_BODY = b'\xff\xff\xff\xff\x78\x00\x00\x00' + bytes(range(256))
+
+
+def flask_reply(body, content_type, status=200):
+    reply = requests.Response()
+    reply.status_code = status
+    reply._content = body
+    reply.headers['Content-Type'] = content_type
+    return reply
+
+
+class ColumnarBatchProxyTests(TestCase):
+    def test_arrow_results_are_relayed_unchanged(self):
+        with mock.patch('apps.api.views.requests.request',
+                        return_value=flask_reply(ARROW_BODY, ARROW_MIMETYPE)):
+            response = self.client.post('/api/predict-batch/', {'texts': ['a', 'b'], 'format': 'arrow'},
+                                        content_type='application/json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], ARROW_MIMETYPE)
+        self.assertEqual(response.content, ARROW_BODY)
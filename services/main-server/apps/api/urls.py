@@ -23,7 +23,25 @@ urlpatterns = [
     path('emotion-light/', views.LightEmotionAnalysisView.as_view(), name='light_emotion_analysis'),
     path('analyze-light/', views.LightEmotionAnalysisView.as_view(), name='analyze_light'),  # Direct mapping to Flask
     
+    path('analyze-all/', views.AnalyzeAllView.as_view(), name='analyze_all'),  # TextBlob + VADER + BERT in one call
+    
     path('moodify/', views.MoodifyView.as_view(), name='moodify'),  # Direct mapping to Flask
+    path('moodify-stream/', views.MoodifyStreamView.as_view(), name='moodify_stream'),  # Server-Sent Events
+    
+    path('moodify-batch/', views.MoodifyBatchView.as_view(), name='moodify_batch'),
+    
+    # Moodify job queue - submit, then poll or stream progress
+    path('moodify-jobs/', views.MoodifyJobsView.as_view(), name='moodify_jobs'),
+    path('moodify-jobs/<str:job_id>/', views.MoodifyJobStatusView.as_view(), name='moodify_job_status'),
+    path('moodify-jobs/<str:job_id>/stream/', views.MoodifyJobStreamView.as_view(), name='moodify_job_stream'),
+    
+    # Batch variants - {"texts": [...]} in, ordered results out
+    path('predict-batch/', views.BatchSentimentAnalysisView.as_view(), name='predict_batch'),
+    path('analyze-batch/', views.BatchEmotionAnalysisView.as_view(), name='analyze_batch'),
+    path('analyze-light-batch/', views.BatchLightEmotionAnalysisView.as_view(), name='analyze_light_batch'),
+    
+    # NDJSON bulk scoring - streamed upload, streamed results
+    path('score-stream/', views.ScoreStreamView.as_view(), name='score_stream'),
     
     path('flask-health/', views.flask_health_check, name='flask_health'),
     
@@ -3,7 +3,8 @@ import json
 from django.conf import settings
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views import View
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
@@ -13,6 +14,9 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Piece size when forwarding a streamed request body to Flask
+UPLOAD_CHUNK_BYTES = 64 * 1024
+
 
 @csrf_exempt
 def simple_health_check(request):
@@ -28,6 +32,9 @@ def simple_health_check(request):
 class FlaskProxyMixin:
     """Mixin for proxying requests to Flask microservice"""
     
+    # Seconds to wait for the Flask service; batch views raise this
+    proxy_timeout = 30
+    
     def get_flask_url(self, endpoint):
         """Get the full Flask service URL for an endpoint"""
         base_url = getattr(settings, 'FLASK_SERVICE_URL', 'http://localhost:5000')
@@ -39,14 +46,16 @@ class FlaskProxyMixin:
             flask_url = self.get_flask_url(endpoint)
             
             # Prepare request data
-            kwargs = {'timeout': 30}
+            kwargs = {'timeout': self.proxy_timeout}
             
             if request.method == 'POST':
                 if hasattr(request, 'data') and request.data:
                     kwargs['json'] = request.data
                 else:
                     kwargs['json'] = {}
-                kwargs['headers'] = {'Content-Type': 'application/json'}
+                # Lets Flask size LLM deadlines to fit inside this proxy's timeout
+                kwargs['headers'] = {'Content-Type': 'application/json',
+                                     'X-Request-Timeout': str(self.proxy_timeout)}
             elif request.method == 'GET':
                 kwargs['params'] = request.GET
             
@@ -57,6 +66,14 @@ class FlaskProxyMixin:
                 **kwargs
             )
             
+            # Columnar batch results ("format": "arrow"/"parquet") are binary; relay them as they are
+            content_type = response.headers.get('Content-Type', '')
+            if response.content and not content_type.startswith('application/json'):
+                relayed = HttpResponse(response.content, content_type=content_type, status=response.status_code)
+                if 'X-Model' in response.headers:
+                    relayed['X-Model'] = response.headers['X-Model']
+                return relayed
+
             # Return Flask response
             try:
                 response_data = response.json() if response.content else {}
@@ -85,6 +102,64 @@ class FlaskProxyMixin:
                 {'error': 'Internal server error'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+    
+    def stream_from_flask(self, request, endpoint, raw_body=False):
+        """
+        Proxy a request to a streaming Flask endpoint, relaying chunks as they arrive
+        instead of buffering the whole body. Used from plain Django views, since
+        DRF content negotiation rejects Accept: text/event-stream.
+        With raw_body, the request body is forwarded as a chunked upload (read
+        piece by piece, never held in memory) along with its query string.
+        """
+        flask_url = self.get_flask_url(endpoint)
+        kwargs = {'stream': True, 'timeout': self.proxy_timeout}
+        if raw_body:
+            kwargs['data'] = iter(lambda: request.read(UPLOAD_CHUNK_BYTES), b'')
+            kwargs['params'] = request.GET
+            kwargs['headers'] = {'Content-Type': request.META.get('CONTENT_TYPE') or 'application/x-ndjson'}
+        elif request.method == 'POST':
+            try:
+                kwargs['json'] = json.loads(request.body) if request.body else {}
+            except json.JSONDecodeError:
+                return JsonResponse({'error': 'Invalid JSON body'}, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            kwargs['params'] = request.GET
+        
+        try:
+            # The read timeout bounds the gap between chunks, not the whole stream
+            upstream = requests.request(request.method, flask_url, **kwargs)
+        except requests.exceptions.ConnectionError:
+            return JsonResponse(
+                {
+                    'error': 'Flask microservice unavailable',
+                    'message': 'Please ensure the Flask service is running on the configured URL',
+                    'flask_url': flask_url
+                },
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        except requests.exceptions.Timeout:
+            return JsonResponse({'error': 'Flask microservice timeout'}, status=status.HTTP_504_GATEWAY_TIMEOUT)
+        
+        def relay():
+            try:
+                # chunk_size=None yields data as soon as it is received
+                for chunk in upstream.iter_content(chunk_size=None):
+                    yield chunk
+            except requests.exceptions.RequestException as e:
+                logger.error(f"Flask stream interrupted: {e}")
+            finally:
+                upstream.close()
+        
+        response = StreamingHttpResponse(
+            relay(),
+            status=upstream.status_code,
+            content_type=upstream.headers.get('Content-Type', 'application/octet-stream')
+        )
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        if 'Retry-After' in upstream.headers:
+            response['Retry-After'] = upstream.headers['Retry-After']
+        return response
 
 
 @csrf_exempt
@@ -156,6 +231,20 @@ class LightEmotionAnalysisView(APIView, FlaskProxyMixin):
         return self.proxy_to_flask(request, 'analyze-light')
 
 
+@method_decorator(csrf_exempt, name='dispatch')
+class AnalyzeAllView(APIView, FlaskProxyMixin):
+    """
+    Combined analysis endpoint - proxies to Flask /analyze-all
+    TextBlob, VADER and BERT results for one text in a single round-trip
+    """
+    authentication_classes = []  # Explicitly disable authentication
+    permission_classes = [AllowAny]
+    
+    def post(self, request):
+        """Run every analysis model on the text concurrently"""
+        return self.proxy_to_flask(request, 'analyze-all')
+
+
 @method_decorator(csrf_exempt, name='dispatch')
 class MoodifyView(APIView, FlaskProxyMixin):
     """
@@ -170,19 +259,142 @@ class MoodifyView(APIView, FlaskProxyMixin):
         return self.proxy_to_flask(request, 'moodify')
 
 
+@method_decorator(csrf_exempt, name='dispatch')
+class MoodifyStreamView(View, FlaskProxyMixin):
+    """
+    Streaming text transformation endpoint - proxies to Flask /moodify-stream
+    Relays Server-Sent Events unbuffered; the final 'done' event carries the result
+    """
+    proxy_timeout = 60
+    
+    def post(self, request):
+        """Transform text to target sentiment, streaming tokens as they are generated"""
+        return self.stream_from_flask(request, 'moodify-stream')
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class MoodifyBatchView(APIView, FlaskProxyMixin):
+    """
+    Multi-text transformation endpoint - proxies to Flask /moodify-batch
+    Several texts share each LLM call; results are returned in input order
+    """
+    authentication_classes = []  # Explicitly disable authentication
+    permission_classes = [AllowAny]
+    proxy_timeout = 120
+    
+    def post(self, request):
+        """Transform many texts to their target sentiment"""
+        return self.proxy_to_flask(request, 'moodify-batch')
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class MoodifyJobsView(APIView, FlaskProxyMixin):
+    """
+    Moodify job submission - proxies to Flask /moodify-jobs
+    Queues many transformations and returns a job ID immediately (202)
+    """
+    authentication_classes = []  # Explicitly disable authentication
+    permission_classes = [AllowAny]
+    
+    def post(self, request):
+        """Queue moodify tasks as a job"""
+        return self.proxy_to_flask(request, 'moodify-jobs')
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class MoodifyJobStatusView(APIView, FlaskProxyMixin):
+    """
+    Moodify job progress - proxies to Flask /moodify-jobs/<job_id>
+    Supports ?results=false and ?since=N
+    """
+    authentication_classes = []  # Explicitly disable authentication
+    permission_classes = [AllowAny]
+    
+    def get(self, request, job_id):
+        """Poll a moodify job"""
+        return self.proxy_to_flask(request, f'moodify-jobs/{job_id}')
+
+
+class MoodifyJobStreamView(View, FlaskProxyMixin):
+    """
+    Moodify job progress stream - proxies to Flask /moodify-jobs/<job_id>/stream
+    Relays Server-Sent Events unbuffered until the job completes
+    """
+    proxy_timeout = 60
+    
+    def get(self, request, job_id):
+        """Stream results of a moodify job as they finish"""
+        return self.stream_from_flask(request, f'moodify-jobs/{job_id}/stream')
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class ScoreStreamView(View, FlaskProxyMixin):
+    """
+    NDJSON bulk scoring endpoint - proxies to Flask /score-stream
+    Streams the upload to Flask and the NDJSON results back, buffering neither
+    """
+    # Bounds the wait for each chunk of results, not the whole stream
+    proxy_timeout = 120
+    
+    def post(self, request):
+        """Score an NDJSON upload of {"id", "text"} lines"""
+        return self.stream_from_flask(request, 'score-stream', raw_body=True)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class BatchSentimentAnalysisView(APIView, FlaskProxyMixin):
+    """
+    Batch sentiment analysis endpoint - proxies to Flask /predict-batch
+    Body: {"texts": [...]}, results are returned in the same order
+    """
+    authentication_classes = []  # Explicitly disable authentication
+    permission_classes = [AllowAny]
+    proxy_timeout = 120
+    
+    def post(self, request):
+        """Analyze sentiment of many texts in one call"""
+        return self.proxy_to_flask(request, 'predict-batch')
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class BatchEmotionAnalysisView(APIView, FlaskProxyMixin):
+    """
+    Batch emotion analysis endpoint - proxies to Flask /analyze-batch
+    Uses BERT model with fallback to VADER
+    """
+    authentication_classes = []  # Explicitly disable authentication
+    permission_classes = [AllowAny]
+    proxy_timeout = 120
+    
+    def post(self, request):
+        """Analyze emotions in many texts using advanced models"""
+        return self.proxy_to_flask(request, 'analyze-batch')
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class BatchLightEmotionAnalysisView(APIView, FlaskProxyMixin):
+    """
+    Batch lightweight emotion analysis endpoint - proxies to Flask /analyze-light-batch
+    Uses VADER sentiment analysis (fast, low memory)
+    """
+    authentication_classes = []  # Explicitly disable authentication
+    permission_classes = [AllowAny]
+    proxy_timeout = 120
+    
+    def post(self, request):
+        """Analyze emotions in many texts using lightweight VADER model"""
+        return self.proxy_to_flask(request, 'analyze-light-batch')
+
+
 @csrf_exempt
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def flask_health_check(request):
-    """Flask service health check - proxies to Flask /"""
+    """Flask service health check - proxies to the Flask /readyz readiness probe"""
+    flask_url = getattr(settings, 'FLASK_SERVICE_URL', 'http://localhost:5000')
     try:
-        flask_url = getattr(settings, 'FLASK_SERVICE_URL', 'http://localhost:5000')
-        
-        # Prepare request data
-        kwargs = {'timeout': 30}
-        
-        # Make request to Flask service
-        response = requests.get(flask_url, **kwargs)
+        # /readyz answers 200 once models are warmed up and 503 while they are loading
+        response = requests.get(f"{flask_url}/readyz", timeout=5)
         
         # Return Flask response
         try:
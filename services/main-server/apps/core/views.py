@@ -23,7 +23,13 @@ def status_view(request):
             'sentiment': '/api/sentiment/ or /api/predict/',
             'emotion_analysis': '/api/emotion/ or /api/analyze/',
             'light_emotion': '/api/emotion-light/ or /api/analyze-light/',
+            'analyze_all': '/api/analyze-all/',
             'moodify': '/api/moodify/',
+            'moodify_stream': '/api/moodify-stream/',
+            'moodify_batch': '/api/moodify-batch/',
+            'moodify_jobs': '/api/moodify-jobs/',
+            'batch': '/api/predict-batch/, /api/analyze-batch/, /api/analyze-light-batch/',
+            'score_stream': '/api/score-stream/',
             'flask_health': '/api/flask-health/',
             'api_info': '/api/core/info/',
         }
@@ -75,6 +81,12 @@ def info_view(request):
                 'body': '{"text": "your text here"}',
                 'note': 'Optimized for low memory usage, ideal for high-volume requests'
             },
+            'combined_analysis': {
+                'url': '/api/analyze-all/',
+                'method': 'POST',
+                'description': 'TextBlob sentiment, VADER and BERT emotions in one call (models run concurrently, per-model timings)',
+                'body': '{"text": "your text here"}'
+            },
             'text_transformation': {
                 'url': '/api/moodify/',
                 'method': 'POST',
@@ -85,6 +97,36 @@ def info_view(request):
                     'response': '{"original_text": "This is terrible", "transformed_text": "This is wonderful", "target_sentiment": "positive"}'
                 }
             },
+            'text_transformation_stream': {
+                'url': '/api/moodify-stream/',
+                'method': 'POST',
+                'description': 'Streaming text transformation: LLM tokens as Server-Sent Events, the final "done" event carries the result',
+                'body': '{"text": "your text", "target_sentiment": "positive|negative|neutral"}'
+            },
+            'text_transformation_batch': {
+                'url': '/api/moodify-batch/',
+                'method': 'POST',
+                'description': 'Transform several texts in one request (several texts share each LLM call)',
+                'body': '{"texts": ["first text", "second text"], "target_sentiment": "positive"}'
+            },
+            'text_transformation_jobs': {
+                'url': '/api/moodify-jobs/',
+                'method': 'POST',
+                'description': 'Queue many transformations; poll GET /api/moodify-jobs/<job_id>/ or stream /api/moodify-jobs/<job_id>/stream/',
+                'body': '{"texts": ["first text", "second text"], "target_sentiment": "positive"}'
+            },
+            'batch_analysis': {
+                'url': '/api/predict-batch/, /api/analyze-batch/, /api/analyze-light-batch/',
+                'method': 'POST',
+                'description': 'Batch variants of the analysis endpoints (duplicates scored once, order preserved)',
+                'body': '{"texts": ["first text", "second text"]}'
+            },
+            'bulk_scoring': {
+                'url': '/api/score-stream/?models=textblob,lightweight,heavy',
+                'method': 'POST',
+                'description': 'NDJSON bulk scoring: upload one {"id", "text"} object per line, results are streamed back as NDJSON',
+                'body': '{"id": 1, "text": "first text"}\n{"id": 2, "text": "second text"}'
+            },
             'health_checks': {
                 'api_gateway': '/api/health/',
                 'flask_service': '/api/flask-health/',